@@ -0,0 +1,98 @@
+"""
+Decoding a page of enrollments from the DynamoDB wire format.
+
+"resource" is the boto3 Table path the service used before: boto3's
+TypeDeserializer (Decimal numbers) and Enrollment.from_dict into a regular
+dataclass, kept below as the baseline. "generic" is codec.from_item plus
+from_dict, "direct" is codec.decode_enrollment into the slotted Enrollment.
+Items are generated in the shape the low-level client returns, so moto's
+own scan cost is left out. Reports the best time and the memory retained by
+the decoded list.
+
+    python -m benchmarks.bench_codec --rows 100000
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+from dataclasses import dataclass
+from boto3.dynamodb.types import TypeDeserializer
+
+from benchmarks.common import generate_cpfs
+from src.codec import decode_enrollment, encode_enrollment, from_item
+from src.domain import Enrollment
+
+@dataclass
+class PreviousEnrollment:
+    name: str
+    age: int
+    cpf: str
+    age_group_id: str
+    age_group_name: str
+    created_at: str
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "PreviousEnrollment":
+        return cls(
+            cpf=data["cpf"],
+            name=data["name"],
+            age=int(data["age"]),
+            age_group_id=data["age_group_id"],
+            age_group_name=data["age_group_name"],
+            created_at=data["created_at"]
+        )
+
+def resource_path(items):
+    deserializer = TypeDeserializer()
+    return [
+        PreviousEnrollment.from_dict({key: deserializer.deserialize(value) for key, value in item.items()})
+        for item in items
+    ]
+
+def generic_path(items):
+    return [Enrollment.from_dict(from_item(item)) for item in items]
+
+def direct_path(items):
+    return [decode_enrollment(item) for item in items]
+
+def measure(func, items, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(items)
+        best = min(best, time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    decoded = func(items)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del decoded
+    return best, retained, peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    items = [
+        encode_enrollment(Enrollment(
+            name="Bench Person Name",
+            age=18 + i % 48,
+            cpf=cpf,
+            age_group_id="adults",
+            age_group_name="Adults",
+            created_at="2024-01-01T00:00:00.000000"
+        ))
+        for i, cpf in enumerate(generate_cpfs(args.rows))
+    ]
+
+    for name, func in (("resource", resource_path), ("generic", generic_path), ("direct", direct_path)):
+        best, retained, peak = measure(func, items, args.repeat)
+        print(
+            f"{name:<9} rows={args.rows} time={best * 1000:9.2f}ms rows/s={args.rows / best:11.0f} "
+            f"retained={retained / 2**20:6.1f} MiB peak={peak / 2**20:6.1f} MiB"
+        )
+
+if __name__ == "__main__":
+    main()
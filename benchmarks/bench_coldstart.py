@@ -0,0 +1,140 @@
+"""
+Lambda cold start: import time of src.main and latency of the first requests.
+
+Every run starts a fresh interpreter. Import time is read from
+`python -X importtime -c "import src.main"`; the first requests go through
+the Mangum handler with API Gateway events against moto. moto itself
+imports boto3 before the app, so the request timings leave out the boto3
+import but include building the clients on first use.
+
+    python -m benchmarks.bench_coldstart --runs 5
+    python -m benchmarks.bench_coldstart --save-baseline benchmarks/baselines/coldstart.json
+    python -m benchmarks.bench_coldstart --baseline benchmarks/baselines/coldstart.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FIRST_REQUESTS = '''
+import base64, json, time
+from moto import mock_dynamodb
+
+def event(method, path, auth=None, body=None):
+    headers = {"host": "bench"}
+    if auth:
+        headers["authorization"] = "Basic " + base64.b64encode(auth.encode()).decode()
+    if body is not None:
+        headers["content-type"] = "application/json"
+    return {
+        "resource": "/{proxy+}", "path": path, "httpMethod": method, "headers": headers,
+        "multiValueHeaders": {}, "queryStringParameters": None, "multiValueQueryStringParameters": None,
+        "requestContext": {"resourcePath": "/{proxy+}", "httpMethod": method, "path": path, "stage": "bench"},
+        "body": json.dumps(body) if body is not None else None, "isBase64Encoded": False
+    }
+
+with mock_dynamodb():
+    import boto3
+    from benchmarks.common import create_tables
+    create_tables(boto3.resource("dynamodb"))
+
+    timings = {}
+    start = time.perf_counter()
+    from src.main import handler
+    timings["import_ms"] = (time.perf_counter() - start) * 1000
+    requests = [
+        ("hello_ms", event("GET", "/hello")),
+        ("first_db_request_ms", event("GET", "/config/age-groups", "config_admin:admin123")),
+        ("second_db_request_ms", event("GET", "/config/age-groups", "config_admin:admin123"))
+    ]
+    for name, request in requests:
+        start = time.perf_counter()
+        response = handler(request, None)
+        timings[name] = (time.perf_counter() - start) * 1000
+        assert response["statusCode"] == 200, response
+    print(json.dumps(timings))
+'''
+
+def _env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    env.setdefault("AWS_ACCESS_KEY_ID", "testing")
+    env.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+    env.setdefault("AGE_GROUPS_TABLE", "bench-age-groups")
+    env.setdefault("ENROLLMENTS_TABLE", "bench-enrollments")
+    env["PYTHONDONTWRITEBYTECODE"] = "0"
+    return env
+
+def parse_importtime(stderr: str) -> Dict[str, Dict[str, int]]:
+    """Map module name to its self and cumulative import time in microseconds"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = {"self_us": int(self_us), "cumulative_us": int(cumulative_us)}
+    return modules
+
+def measure_import() -> Dict[str, Dict[str, int]]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import src.main"],
+        cwd=ROOT, env=_env(), capture_output=True, text=True, check=True
+    )
+    return parse_importtime(result.stderr)
+
+def measure_first_requests() -> Dict[str, float]:
+    result = subprocess.run(
+        [sys.executable, "-c", FIRST_REQUESTS],
+        cwd=ROOT, env=_env(), capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def run(runs: int) -> Dict[str, object]:
+    samples: Dict[str, List[float]] = {}
+    modules: Dict[str, Dict[str, int]] = {}
+    for _ in range(runs):
+        modules = measure_import()
+        samples.setdefault("importtime_src_main_ms", []).append(modules["src.main"]["cumulative_us"] / 1000)
+        for name, value in measure_first_requests().items():
+            samples.setdefault(name, []).append(value)
+
+    slowest = sorted(modules.items(), key=lambda item: item[1]["self_us"], reverse=True)[:10]
+    return {
+        "runs": runs,
+        "median": {name: round(statistics.median(values), 2) for name, values in samples.items()},
+        "heaviest_imports_ms": {name: round(value["self_us"] / 1000, 2) for name, value in slowest},
+        "boto3_imported": "boto3" in modules,
+        "numpy_imported": "numpy" in modules
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--baseline", help="Compare the medians with a saved baseline")
+    parser.add_argument("--save-baseline", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = run(args.runs)
+    print(json.dumps(results, indent=2))
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["median"]
+        for name, value in results["median"].items():
+            if name in baseline:
+                change = (value - baseline[name]) / baseline[name] * 100 if baseline[name] else 0.0
+                print(f"{name:<24} baseline={baseline[name]:9.2f}ms now={value:9.2f}ms ({change:+.1f}%)")
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.save_baseline) or ".", exist_ok=True)
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+
+if __name__ == "__main__":
+    main()
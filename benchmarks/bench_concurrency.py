@@ -0,0 +1,108 @@
+"""
+Request throughput under concurrency: blocking DynamoDB calls on the event
+loop versus the thread-pool backed AsyncDatabaseService.
+
+Runs the real app in-process over ASGI against moto. Every DynamoDB call
+sleeps --latency-ms to stand in for the network round trip that moto does
+not have. The "blocking" mode calls the synchronous DatabaseService
+directly from the handlers, as the app did before. GETs read CPFs enrolled
+before the run so none races the POST of its own CPF; only requests answered
+with their expected status count towards rps, the others are reported.
+
+    python -m benchmarks.bench_concurrency --requests 400 --concurrency 50
+"""
+import argparse
+import asyncio
+import time
+from typing import Dict
+import boto3
+import httpx
+from moto import mock_dynamodb
+
+from benchmarks.common import create_tables, generate_cpfs, serialized_moto, summarize
+
+class BlockingDatabaseService:
+    """Awaitable facade that runs DatabaseService calls on the event loop thread"""
+
+    def __init__(self, db_service):
+        self.db_service = db_service
+
+    @property
+    def age_group_cache(self):
+        return self.db_service.age_group_cache
+
+    def __getattr__(self, name):
+        method = getattr(self.db_service, name)
+
+        async def call(*args, **kwargs):
+            return method(*args, **kwargs)
+
+        return call
+
+async def drive(app, requests: int, concurrency: int, new_cpfs, enrolled_cpfs):
+    semaphore = asyncio.Semaphore(concurrency)
+    samples = []
+    errors: Dict[str, int] = {}
+    auth = ("final_user1", "password1")
+
+    # Unhandled errors become 500s counted as errors instead of aborting the run
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one(i):
+            async with semaphore:
+                start = time.perf_counter()
+                if i % 2:
+                    method, expected = "GET", 200
+                    response = await client.get(f"/enrollments/{enrolled_cpfs[i // 2]}", auth=auth)
+                else:
+                    method, expected = "POST", 201
+                    response = await client.post("/enroll", json={"name": "Bench Person Name", "age": 30, "cpf": new_cpfs[i // 2]}, auth=auth)
+                if response.status_code == expected:
+                    samples.append(time.perf_counter() - start)
+                else:
+                    key = f"{method} {response.status_code}"
+                    errors[key] = errors.get(key, 0) + 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        elapsed = time.perf_counter() - start
+    return len(samples) / elapsed, summarize(samples), errors
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    with mock_dynamodb(), serialized_moto():
+        create_tables(boto3.resource("dynamodb"))
+        from src import main as api
+        from src.domain import AgeGroup, Enrollment
+        # Measure the API, not the per-user limits
+        api.rate_limiter.enabled = False
+
+        age_group = api.db_service.create_age_group(AgeGroup(name="Adults", min_age=18, max_age=65))
+        cpfs = generate_cpfs(args.requests * 2)
+        enrolled_cpfs, new_cpfs = cpfs[:args.requests], cpfs[args.requests:]
+        api.db_service.create_enrollments([
+            Enrollment(name="Bench Person Name", age=30, cpf=cpf, age_group_id=age_group.id, age_group_name=age_group.name)
+            for cpf in enrolled_cpfs
+        ])
+
+        def network_latency(**kwargs):
+            time.sleep(args.latency_ms / 1000)
+
+        api.db_service.client.meta.events.register("before-call.dynamodb.*", network_latency)
+
+        async_db_service = api.async_db_service
+        for mode, service in (("blocking", BlockingDatabaseService(api.db_service)), ("thread-pool", async_db_service)):
+            api.async_db_service = service
+            rps, summary, errors = asyncio.run(drive(api.app, args.requests, args.concurrency, new_cpfs, enrolled_cpfs))
+            new_cpfs = new_cpfs[(args.requests + 1) // 2:]
+            print(f"{mode:<12} rps={rps:8.1f} p50={summary['p50_ms']:8.2f}ms p99={summary['p99_ms']:8.2f}ms"
+                  + (f" errors={errors}" if errors else ""))
+        api.async_db_service = async_db_service
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Bulk CPF validation: validate_cpf in a loop versus validate_cpfs.
+
+Inputs mix valid and invalid CPFs, half of them formatted with dots and
+dash. Larger sizes repeat a 100k sample to keep generation cheap.
+
+    python -m benchmarks.bench_cpf --sizes 1000 100000 10000000
+"""
+import argparse
+import random
+import time
+
+from benchmarks.common import generate_cpfs
+from src import validators
+from src.validators import format_cpf, validate_cpf, validate_cpfs
+
+def sample(size: int):
+    random.seed(42)
+    base = []
+    for i, cpf in enumerate(generate_cpfs(min(size, 100000) // 2 + 1)):
+        base.append(format_cpf(cpf) if i % 2 else cpf)
+        base.append("".join(random.choice("0123456789") for _ in range(11)))
+    return (base * (size // len(base) + 1))[:size]
+
+def timed(func, cpfs):
+    start = time.perf_counter()
+    result = func(cpfs)
+    return time.perf_counter() - start, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000, 10000000])
+    args = parser.parse_args()
+
+    # validate_cpfs imports numpy on first use; keep that out of the first size
+    validate_cpfs(sample(10))
+    if validators.np is None:
+        print("numpy is not installed: validate_cpfs uses the pure Python fallback")
+
+    for size in args.sizes:
+        cpfs = sample(size)
+        loop_seconds, expected = timed(lambda items: [validate_cpf(cpf) for cpf in items], cpfs)
+        bulk_seconds, mask = timed(validate_cpfs, cpfs)
+        assert [bool(valid) for valid in mask] == expected
+        print(f"size={size:<9} loop={loop_seconds:8.3f}s bulk={bulk_seconds:8.3f}s "
+              f"speedup={loop_seconds / bulk_seconds:5.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Enroll path latency: read-before-write versus a single conditional write.
+
+The previous POST /enroll issued get_enrollment before create_enrollment;
+the conditional put alone already rejects duplicate CPFs. Each pass runs
+both variants on freshly created tables, alternating which goes first, and
+the medians over --runs passes are reported with DynamoDB calls per enroll.
+moto answers in-process, so --latency-ms adds the network round trip each
+call pays against real DynamoDB.
+
+    python -m benchmarks.bench_enroll --count 500 --runs 5 --latency-ms 2
+"""
+import argparse
+import statistics
+import time
+from typing import Callable, Dict, List
+import boto3
+from moto import mock_dynamodb
+
+from benchmarks.common import count_aws_calls, create_tables, generate_cpfs, summarize
+from src.database import DatabaseService
+from src.domain import AgeGroup, Enrollment
+
+def enroll_read_before_write(db_service: DatabaseService, enrollment: Enrollment):
+    if db_service.get_enrollment(enrollment.cpf):
+        raise ValueError("CPF already enrolled")
+    db_service.create_enrollment(enrollment)
+
+def enroll_conditional_write(db_service: DatabaseService, enrollment: Enrollment):
+    db_service.create_enrollment(enrollment)
+
+VARIANTS = {
+    "read-before-write": enroll_read_before_write,
+    "conditional-write": enroll_conditional_write
+}
+
+def run_once(dynamodb, enroll: Callable, cpfs: List[str], latency_ms: float) -> Dict[str, float]:
+    """One variant on freshly created tables"""
+    tables = create_tables(dynamodb)
+    db_service = DatabaseService()
+    try:
+        age_group = db_service.create_age_group(AgeGroup(name="Adults", min_age=18, max_age=65))
+
+        def network_latency(**kwargs):
+            time.sleep(latency_ms / 1000)
+
+        if latency_ms:
+            db_service.client.meta.events.register("before-call.dynamodb.*", network_latency)
+        samples = []
+        try:
+            with count_aws_calls(db_service.client) as calls:
+                for cpf in cpfs:
+                    enrollment = Enrollment(
+                        name="Bench Person Name",
+                        age=30,
+                        cpf=cpf,
+                        age_group_id=age_group.id,
+                        age_group_name=age_group.name
+                    )
+                    start = time.perf_counter()
+                    enroll(db_service, enrollment)
+                    samples.append(time.perf_counter() - start)
+        finally:
+            db_service.client.meta.events.unregister("before-call.dynamodb.*", network_latency)
+        summary = summarize(samples)
+        summary["calls_per_enroll"] = sum(calls.values()) / len(cpfs)
+        return summary
+    finally:
+        for table in tables:
+            table.delete()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=500)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    cpfs = generate_cpfs(args.count)
+    passes: Dict[str, List[Dict[str, float]]] = {name: [] for name in VARIANTS}
+    with mock_dynamodb():
+        dynamodb = boto3.resource("dynamodb")
+        for run in range(args.runs):
+            # Alternate the order so neither variant always runs on a warmer process
+            order = list(VARIANTS) if run % 2 == 0 else list(reversed(VARIANTS))
+            for name in order:
+                passes[name].append(run_once(dynamodb, VARIANTS[name], cpfs, args.latency_ms))
+
+    for name, results in passes.items():
+        p50 = statistics.median(result["p50_ms"] for result in results)
+        p99 = statistics.median(result["p99_ms"] for result in results)
+        print(f"{name:<22} p50={p50:7.3f}ms p99={p99:7.3f}ms calls/enroll={results[-1]['calls_per_enroll']:.2f}")
+
+if __name__ == "__main__":
+    main()
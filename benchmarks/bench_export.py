@@ -0,0 +1,82 @@
+"""
+Throughput benchmark for the parallel segmented enrollment export.
+
+Seeds a moto-backed enrollments table and exports it with different
+segment counts. moto ignores Segment/TotalSegments (every segment gets the
+whole table), so against moto only one segment count produces a correct
+export; pass --endpoint-url to run the full sweep against DynamoDB Local.
+
+    python -m benchmarks.bench_export --rows 100000 --segments 1 2 4 8
+"""
+import argparse
+import io
+import os
+import time
+import boto3
+from moto import mock_dynamodb
+
+from src.export import parallel_scan, write_csv, write_ndjson
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+
+TABLE_NAME = "bench-enrollments"
+
+def create_table(dynamodb):
+    table = dynamodb.create_table(
+        TableName=TABLE_NAME,
+        KeySchema=[{"AttributeName": "cpf", "KeyType": "HASH"}],
+        AttributeDefinitions=[{"AttributeName": "cpf", "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST"
+    )
+    table.wait_until_exists()
+    return table
+
+def seed(table, rows: int):
+    with table.batch_writer() as batch:
+        for i in range(rows):
+            batch.put_item(Item={
+                "cpf": f"{i:011d}",
+                "name": f"Bench Person {i}",
+                "age": 18 + i % 60,
+                "age_group_id": "bench-group",
+                "age_group_name": "Adults",
+                "created_at": "2024-01-01T00:00:00"
+            })
+
+def run(table, segments, export_format):
+    writer = write_csv if export_format == "csv" else write_ndjson
+    for total_segments in segments:
+        start = time.perf_counter()
+        count = writer(parallel_scan(table, total_segments=total_segments), io.StringIO())
+        elapsed = time.perf_counter() - start
+        print(f"segments={total_segments:<3} rows={count:<8} "
+              f"seconds={elapsed:8.2f} rows/s={count / elapsed:10.0f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--segments", type=int, nargs="+", default=[1])
+    parser.add_argument("--format", choices=("csv", "ndjson"), default="ndjson")
+    parser.add_argument("--endpoint-url", help="DynamoDB Local endpoint instead of moto")
+    args = parser.parse_args()
+
+    if args.endpoint_url:
+        dynamodb = boto3.resource("dynamodb", endpoint_url=args.endpoint_url)
+        table = create_table(dynamodb)
+        try:
+            seed(table, args.rows)
+            run(table, args.segments, args.format)
+        finally:
+            table.delete()
+        return
+
+    with mock_dynamodb():
+        table = create_table(boto3.resource("dynamodb"))
+        print(f"Seeding {args.rows} rows into moto...")
+        seed(table, args.rows)
+        run(table, args.segments, args.format)
+
+if __name__ == "__main__":
+    main()
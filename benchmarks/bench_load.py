@@ -0,0 +1,244 @@
+"""
+Load test of the real app: throughput, latency percentiles and DynamoDB
+calls per request for the enroll, get, list and config-CRUD workloads.
+
+Requests go in-process over ASGI (httpx) to `src.main:app`, against moto by
+default (one moto request at a time, see common.serialized_moto) or
+DynamoDB Local with --endpoint-url. --latency-ms makes every
+DynamoDB call sleep to stand in for the network round trip. Each config-CRUD
+cycle is four requests (create, get, update and delete of a one-age group),
+including the regrouping job scheduled after each write. Every pass runs
+on freshly created tables and the medians of --runs passes are reported.
+
+    python -m benchmarks.bench_load --requests 400 --concurrency 50
+    python -m benchmarks.bench_load --save-baseline benchmarks/baselines/load.json
+    python -m benchmarks.bench_load --baseline benchmarks/baselines/load.json
+
+With --baseline the run exits with status 1 when a workload is slower than
+the baseline by more than --tolerance (throughput or p95), fails more
+requests, or makes more DynamoDB calls per request.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from typing import Dict, List, Tuple
+import boto3
+import httpx
+from moto import mock_dynamodb
+
+from benchmarks.common import count_aws_calls, create_tables, generate_cpfs, serialized_moto, summarize
+
+WORKLOADS = ("enroll", "get", "list", "config")
+FINAL_AUTH = ("final_user1", "password1")
+CONFIG_AUTH = ("config_admin", "admin123")
+
+# Allowed growth of DynamoDB calls per request against the baseline
+CALLS_TOLERANCE = 0.05
+
+# Ages left free by the seeded 18-65 group for the config-CRUD cycles
+CONFIG_AGES = range(66, 121)
+
+class Recorder:
+    def __init__(self):
+        self.samples: List[float] = []
+        self.errors: Dict[str, int] = {}
+
+    async def request(self, client: httpx.AsyncClient, expected: int, method: str, url: str, **kwargs) -> httpx.Response:
+        start = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        self.samples.append(time.perf_counter() - start)
+        if response.status_code != expected:
+            key = f"{method} {response.status_code}"
+            self.errors[key] = self.errors.get(key, 0) + 1
+        return response
+
+async def drive(app, workload: str, requests: int, concurrency: int, cpfs: List[str], page_size: int) -> Tuple[float, Recorder]:
+    recorder = Recorder()
+    rng = random.Random(42)
+
+    # Unhandled errors become 500s counted as errors instead of aborting the run
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        if workload == "config":
+            free_ages: asyncio.Queue = asyncio.Queue()
+            for age in CONFIG_AGES:
+                free_ages.put_nowait(age)
+            jobs = [None] * (requests // 4)
+        else:
+            jobs = list(range(requests))
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def config_cycle():
+            age = await free_ages.get()
+            try:
+                body = {"name": f"Bench {age}", "min_age": age, "max_age": age}
+                created = await recorder.request(client, 201, "POST", "/config/age-groups", json=body, auth=CONFIG_AUTH)
+                if created.status_code != 201:
+                    return
+                url = f"/config/age-groups/{created.json()['id']}"
+                await recorder.request(client, 200, "GET", url, auth=CONFIG_AUTH)
+                await recorder.request(client, 200, "PUT", url, json={"name": f"Bench {age} renamed"}, auth=CONFIG_AUTH)
+                await recorder.request(client, 204, "DELETE", url, auth=CONFIG_AUTH)
+            finally:
+                free_ages.put_nowait(age)
+
+        async def one(i):
+            async with semaphore:
+                if workload == "enroll":
+                    body = {"name": "Bench Person Name", "age": rng.randint(18, 65), "cpf": cpfs[i]}
+                    await recorder.request(client, 201, "POST", "/enroll", json=body, auth=FINAL_AUTH)
+                elif workload == "get":
+                    await recorder.request(client, 200, "GET", f"/enrollments/{cpfs[i % len(cpfs)]}", auth=FINAL_AUTH)
+                elif workload == "list":
+                    await recorder.request(client, 200, "GET", f"/enrollments?limit={page_size}", auth=FINAL_AUTH)
+                else:
+                    await config_cycle()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(len(jobs))))
+        elapsed = time.perf_counter() - start
+    return len(recorder.samples) / elapsed, recorder
+
+def run_once(api, args, dynamodb, cpfs: List[str]) -> Dict[str, dict]:
+    """One pass over the workloads on freshly created tables"""
+    from src.cache import AgeGroupCache
+    from src.domain import AgeGroup
+
+    tables = create_tables(dynamodb)
+    api.db_service.age_group_cache = AgeGroupCache()
+    api.db_service.create_age_group(AgeGroup(name="Adults", min_age=18, max_age=65))
+    results = {}
+    try:
+        for workload in args.workloads:
+            concurrency = args.config_concurrency if workload == "config" else args.concurrency
+            with count_aws_calls(api.db_service.client) as calls:
+                rps, recorder = asyncio.run(drive(api.app, workload, args.requests, concurrency, cpfs, args.page_size))
+            summary = summarize(recorder.samples)
+            results[workload] = {
+                "requests": summary["count"],
+                "errors": sum(recorder.errors.values()),
+                "rps": rps,
+                "p50_ms": summary["p50_ms"],
+                "p95_ms": summary["p95_ms"],
+                "p99_ms": summary["p99_ms"],
+                "db_calls_per_request": round(sum(calls.values()) / max(summary["count"], 1), 2),
+                "db_calls": dict(sorted(calls.items())),
+                "error_statuses": recorder.errors
+            }
+    finally:
+        for table in tables:
+            table.delete()
+    return results
+
+def run(args, dynamodb) -> Dict[str, dict]:
+    """Median throughput and latency over --runs passes; calls and errors of the last one"""
+    from src import main as api
+    # Measure the API, not the per-user limits
+    api.rate_limiter.enabled = False
+
+    if args.latency_ms:
+        def network_latency(**kwargs):
+            time.sleep(args.latency_ms / 1000)
+
+        api.db_service.client.meta.events.register("before-call.dynamodb.*", network_latency)
+
+    cpfs = generate_cpfs(args.requests)
+    passes = [run_once(api, args, dynamodb, cpfs) for _ in range(args.runs)]
+    results = {}
+    for workload in args.workloads:
+        last = passes[-1][workload]
+        results[workload] = {
+            **{
+                metric: round(statistics.median(p[workload][metric] for p in passes), 2)
+                for metric in ("rps", "p50_ms", "p95_ms", "p99_ms")
+            },
+            "requests": last["requests"],
+            "errors": last["errors"],
+            "db_calls_per_request": last["db_calls_per_request"],
+            "db_calls": last["db_calls"]
+        }
+        if last["error_statuses"]:
+            results[workload]["error_statuses"] = last["error_statuses"]
+    return results
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    """Regressions of `results` against `baseline`, as printable lines"""
+    regressions = []
+    for workload, now in results.items():
+        before = baseline.get(workload)
+        if not before:
+            continue
+        if now["rps"] < before["rps"] * (1 - tolerance):
+            regressions.append(f"{workload}: rps {before['rps']} -> {now['rps']}")
+        if now["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{workload}: p95 {before['p95_ms']}ms -> {now['p95_ms']}ms")
+        # Concurrent config writes may lose the config version race now and then
+        if now["errors"] / max(now["requests"], 1) > before["errors"] / max(before["requests"], 1) + 0.01:
+            regressions.append(f"{workload}: errors {before['errors']} -> {now['errors']}")
+        # Calls per request barely vary (only config retries and cache refreshes race)
+        if now["db_calls_per_request"] > before["db_calls_per_request"] * (1 + CALLS_TOLERANCE) + 0.01:
+            regressions.append(
+                f"{workload}: DynamoDB calls per request {before['db_calls_per_request']} -> {now['db_calls_per_request']}"
+            )
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200, help="Requests per workload")
+    parser.add_argument("--runs", type=int, default=3, help="Passes over the workloads; medians are reported")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument(
+        "--config-concurrency", type=int, default=4,
+        help="Concurrency of the config-CRUD workload; every write contends on the config version"
+    )
+    parser.add_argument("--workloads", nargs="+", choices=WORKLOADS, default=list(WORKLOADS))
+    parser.add_argument("--page-size", type=int, default=50, help="limit of the list workload")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--endpoint-url", help="DynamoDB Local endpoint instead of moto")
+    parser.add_argument("--baseline", help="Compare with a saved baseline and fail on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown against the baseline")
+    parser.add_argument("--save-baseline", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    if args.endpoint_url:
+        os.environ["AWS_ENDPOINT_URL_DYNAMODB"] = args.endpoint_url
+        results = run(args, boto3.resource("dynamodb", endpoint_url=args.endpoint_url))
+    else:
+        with mock_dynamodb(), serialized_moto():
+            results = run(args, boto3.resource("dynamodb"))
+
+    for workload, result in results.items():
+        print(
+            f"{workload:<7} rps={result['rps']:8.1f} p50={result['p50_ms']:7.2f}ms p95={result['p95_ms']:7.2f}ms "
+            f"p99={result['p99_ms']:7.2f}ms db_calls/req={result['db_calls_per_request']:5.2f} errors={result['errors']}"
+        )
+
+    settings = {
+        name: getattr(args, name)
+        for name in ("requests", "runs", "concurrency", "config_concurrency", "page_size", "latency_ms")
+    }
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.save_baseline) or ".", exist_ok=True)
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump({"settings": settings, "workloads": results}, f, indent=2)
+            f.write("\n")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline["settings"] != settings:
+            print(f"Warning: baseline was recorded with {baseline['settings']}")
+        regressions = compare(results, baseline["workloads"], args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against the baseline")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+SQS processor throughput: one put_item per record versus batch_writer.
+
+Messages are sent to and received from a moto SQS queue to build the
+Lambda event, then both handlers write them to a moto enrollments table.
+
+    python -m benchmarks.bench_processor --sizes 10 100 1000
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import time
+from datetime import datetime
+import boto3
+from moto import mock_dynamodb, mock_sqs
+
+from benchmarks.common import create_tables, generate_cpfs
+
+os.environ.setdefault("TABLE_NAME", os.environ["ENROLLMENTS_TABLE"])
+
+from processor import processor
+
+def build_event(sqs, queue_url, cpfs):
+    entries = [
+        {"Id": str(i), "MessageBody": json.dumps({"name": "Bench Person Name", "age": 30, "cpf": cpf})}
+        for i, cpf in enumerate(cpfs)
+    ]
+    for start in range(0, len(entries), 10):
+        sqs.send_message_batch(QueueUrl=queue_url, Entries=entries[start:start + 10])
+
+    records = []
+    while len(records) < len(cpfs):
+        response = sqs.receive_message(QueueUrl=queue_url, MaxNumberOfMessages=10)
+        for message in response.get("Messages", []):
+            records.append({"messageId": message["MessageId"], "body": message["Body"]})
+            sqs.delete_message(QueueUrl=queue_url, ReceiptHandle=message["ReceiptHandle"])
+    return {"Records": records}
+
+def put_per_record_handler(event, context):
+    """Previous processor: one put_item per record"""
+    for record in event["Records"]:
+        body = json.loads(record["body"])
+        processor.table.put_item(Item={
+            "cpf": body["cpf"],
+            "name": body["name"],
+            "age": body["age"],
+            "created_at": datetime.utcnow().isoformat()
+        })
+    return {"statusCode": 200}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    args = parser.parse_args()
+
+    with mock_dynamodb(), mock_sqs():
+        create_tables(boto3.resource("dynamodb"))
+        sqs = boto3.client("sqs")
+        queue_url = sqs.create_queue(QueueName="bench-enrollments")["QueueUrl"]
+        cpfs = generate_cpfs(sum(args.sizes) * 2)
+
+        for size in args.sizes:
+            for name, handler in (("put-per-record", put_per_record_handler), ("batch-writer", processor.handler)):
+                event = build_event(sqs, queue_url, cpfs[:size])
+                cpfs = cpfs[size:]
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    handler(event, None)
+                elapsed = time.perf_counter() - start
+                print(f"records={size:<6} {name:<15} seconds={elapsed:7.3f} records/s={size / elapsed:9.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Serializing enrollment lists: pydantic response models versus the
+FastJSONResponse fast path (src/responses.py).
+
+"models" is what GET /enrollments did before: an EnrollmentResponse per
+row, then FastAPI's response_model validation and jsonable_encoder pass
+(serialize_response with the route's own field) and stdlib json. "fast"
+builds plain dicts and renders them with orjson (or the stdlib fallback
+with --no-orjson). Also reports peak allocated memory of each path.
+
+    python -m benchmarks.bench_responses --rows 1000 50000
+"""
+import argparse
+import asyncio
+import time
+import tracemalloc
+from unittest.mock import patch
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+
+from benchmarks.common import generate_cpfs
+from src import responses
+from src.domain import Enrollment
+from src.main import _enrollment_response, app
+from src.responses import FastJSONResponse, enrollment_body
+
+def enrollments(rows: int):
+    return [
+        Enrollment(
+            name="Bench Person Name",
+            age=18 + i % 48,
+            cpf=cpf,
+            age_group_id="adults",
+            age_group_name="Adults",
+            created_at="2024-01-01T00:00:00.000000"
+        )
+        for i, cpf in enumerate(generate_cpfs(rows))
+    ]
+
+def models_path(field, items) -> bytes:
+    content = asyncio.run(serialize_response(field=field, response_content=[_enrollment_response(e) for e in items]))
+    return JSONResponse(content).body
+
+def fast_path(items) -> bytes:
+    return FastJSONResponse([enrollment_body(e) for e in items]).body
+
+def measure(func, *args, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = func(*args)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, body
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 50000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--no-orjson", action="store_true", help="Render the fast path with the stdlib fallback")
+    args = parser.parse_args()
+
+    route = next(r for r in app.routes if getattr(r, "path", None) == "/enrollments" and "GET" in r.methods)
+    field = route.secure_cloned_response_field
+
+    with patch.object(responses, "orjson", None if args.no_orjson else responses.orjson):
+        encoder = "orjson" if responses.orjson is not None else "json"
+        for rows in args.rows:
+            items = enrollments(rows)
+            models_time, models_peak, models_body = measure(models_path, field, items, repeat=args.repeat)
+            fast_time, fast_peak, fast_body = measure(fast_path, items, repeat=args.repeat)
+            assert len(models_body) == len(fast_body)
+            print(
+                f"rows={rows:<7} models={models_time * 1000:9.2f}ms ({models_peak / 2**20:6.1f} MiB) "
+                f"fast[{encoder}]={fast_time * 1000:8.2f}ms ({fast_peak / 2**20:6.1f} MiB) "
+                f"speedup={models_time / fast_time:5.1f}x"
+            )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Microbenchmarks for the single CPF and name validators.
+
+Compares the current functions in src/validators.py with the previous
+implementations (uncompiled regexes, per-digit int() and two loops),
+kept below as the baseline.
+
+    python -m benchmarks.bench_validators --number 100000
+"""
+import argparse
+import re
+import timeit
+
+from src.validators import check_cpf, clean_cpf, format_cpf, validate_cpf, validate_name
+
+def previous_validate_cpf(cpf: str) -> bool:
+    cpf = re.sub(r'\D', '', cpf)
+    if len(cpf) != 11:
+        return False
+    if cpf == cpf[0] * 11:
+        return False
+    sum1 = 0
+    for i in range(9):
+        sum1 += int(cpf[i]) * (10 - i)
+    remainder1 = sum1 % 11
+    digit1 = 0 if remainder1 < 2 else 11 - remainder1
+    if int(cpf[9]) != digit1:
+        return False
+    sum2 = 0
+    for i in range(10):
+        sum2 += int(cpf[i]) * (11 - i)
+    remainder2 = sum2 % 11
+    digit2 = 0 if remainder2 < 2 else 11 - remainder2
+    return int(cpf[10]) == digit2
+
+def previous_clean_cpf(cpf: str) -> str:
+    return re.sub(r'\D', '', cpf)
+
+def previous_format_cpf(cpf: str) -> str:
+    cpf = re.sub(r'\D', '', cpf)
+    if len(cpf) == 11:
+        return f"{cpf[:3]}.{cpf[3:6]}.{cpf[6:9]}-{cpf[9:]}"
+    return cpf
+
+def previous_validate_name(name: str) -> bool:
+    name = name.strip()
+    if not name:
+        return False
+    name_parts = name.split()
+    if len(name_parts) < 2:
+        return False
+    for part in name_parts:
+        if len(part) < 2:
+            return False
+    return bool(re.match(r'^[a-zA-ZÀ-ÿ\s]+$', name))
+
+def previous_model_cpf(cpf: str) -> str:
+    """EnrollmentRequest.validate_cpf_field before check_cpf: clean, then validate"""
+    cpf_clean = previous_clean_cpf(cpf)
+    previous_validate_cpf(cpf_clean)
+    return cpf_clean
+
+CASES = [
+    ("validate_cpf plain", previous_validate_cpf, validate_cpf, "11144477735"),
+    ("validate_cpf formatted", previous_validate_cpf, validate_cpf, "111.444.777-35"),
+    ("clean_cpf plain", previous_clean_cpf, clean_cpf, "11144477735"),
+    ("clean_cpf formatted", previous_clean_cpf, clean_cpf, "111.444.777-35"),
+    ("format_cpf", previous_format_cpf, format_cpf, "11144477735"),
+    ("validate_name", previous_validate_name, validate_name, "Maria da Silva Santos"),
+    ("model cpf field", previous_model_cpf, check_cpf, "111.444.777-35")
+]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=100000)
+    args = parser.parse_args()
+
+    for name, previous, current, value in CASES:
+        before = min(timeit.repeat(lambda: previous(value), number=args.number, repeat=3))
+        after = min(timeit.repeat(lambda: current(value), number=args.number, repeat=3))
+        print(f"{name:<24} before={before / args.number * 1e9:7.0f}ns "
+              f"after={after / args.number * 1e9:7.0f}ns speedup={before / after:4.1f}x")
+
+if __name__ == "__main__":
+    main()
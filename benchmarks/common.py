@@ -0,0 +1,118 @@
+"""Shared helpers for the benchmark scripts"""
+import os
+import statistics
+from contextlib import contextmanager
+from typing import Dict, List
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+os.environ.setdefault("AGE_GROUPS_TABLE", "bench-age-groups")
+os.environ.setdefault("ENROLLMENTS_TABLE", "bench-enrollments")
+
+def create_tables(dynamodb):
+    """Create the age groups and enrollments tables used by the API"""
+    age_groups = dynamodb.create_table(
+        TableName=os.environ["AGE_GROUPS_TABLE"],
+        KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
+        AttributeDefinitions=[{"AttributeName": "id", "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST"
+    )
+    enrollments = dynamodb.create_table(
+        TableName=os.environ["ENROLLMENTS_TABLE"],
+        KeySchema=[{"AttributeName": "cpf", "KeyType": "HASH"}],
+        AttributeDefinitions=[
+            {"AttributeName": "cpf", "AttributeType": "S"},
+            {"AttributeName": "age_group_id", "AttributeType": "S"},
+            {"AttributeName": "age", "AttributeType": "N"},
+            {"AttributeName": "created_at", "AttributeType": "S"}
+        ],
+        GlobalSecondaryIndexes=[
+            {
+                "IndexName": "age-group-index",
+                "KeySchema": [
+                    {"AttributeName": "age_group_id", "KeyType": "HASH"},
+                    {"AttributeName": "created_at", "KeyType": "RANGE"}
+                ],
+                "Projection": {"ProjectionType": "ALL"}
+            },
+            {
+                "IndexName": "age-index",
+                "KeySchema": [
+                    {"AttributeName": "age", "KeyType": "HASH"},
+                    {"AttributeName": "created_at", "KeyType": "RANGE"}
+                ],
+                "Projection": {"ProjectionType": "ALL"}
+            }
+        ],
+        BillingMode="PAY_PER_REQUEST"
+    )
+    return age_groups, enrollments
+
+def generate_cpfs(count: int, start: int = 100000000) -> List[str]:
+    """Generate `count` distinct valid CPFs"""
+    cpfs = []
+    base = start
+    while len(cpfs) < count:
+        base += 1
+        digits = [int(d) for d in f"{base:09d}"]
+        if len(set(digits)) == 1:
+            continue
+        for weight_start in (10, 11):
+            total = sum(d * w for d, w in zip(digits, range(weight_start, 1, -1)))
+            remainder = total % 11
+            digits.append(0 if remainder < 2 else 11 - remainder)
+        cpfs.append("".join(map(str, digits)))
+    return cpfs
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    position = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[position]
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Latency summary in milliseconds"""
+    return {
+        "count": len(samples),
+        "mean_ms": statistics.mean(samples) * 1000 if samples else 0.0,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000
+    }
+
+@contextmanager
+def count_aws_calls(client):
+    """Count API calls made through a boto3 client, by operation name"""
+    calls: Dict[str, int] = {}
+
+    def on_call(model, **kwargs):
+        calls[model.name] = calls.get(model.name, 0) + 1
+
+    client.meta.events.register("before-call.*.*", on_call)
+    try:
+        yield calls
+    finally:
+        client.meta.events.unregister("before-call.*.*", on_call)
+
+@contextmanager
+def serialized_moto():
+    """
+    Handle one moto request at a time. moto's backends are not thread safe
+    (transactions deepcopy tables other threads are writing), which real
+    DynamoDB does not need; latency injected before sending still overlaps.
+    """
+    import threading
+    from unittest.mock import patch
+    from moto.core.botocore_stubber import BotocoreStubber
+
+    lock = threading.Lock()
+    dispatch = BotocoreStubber.__call__
+
+    def locked(self, *args, **kwargs):
+        with lock:
+            return dispatch(self, *args, **kwargs)
+
+    with patch.object(BotocoreStubber, "__call__", locked):
+        yield
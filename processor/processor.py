@@ -7,25 +7,62 @@ TABLE_NAME = os.getenv("TABLE_NAME")
 dynamodb = boto3.resource("dynamodb")
 table = dynamodb.Table(TABLE_NAME)
 
+# BatchWriteItem accepts at most 25 items per call
+WRITE_CHUNK_SIZE = 25
+
+def parse_record(record) -> dict:
+    """Valida o corpo da mensagem e monta o item da matrícula"""
+    body = json.loads(record["body"])
+    name = body["name"]
+    age = body["age"]
+    cpf = body["cpf"]
+
+    if not isinstance(name, str) or not name.strip():
+        raise ValueError("name inválido")
+    if not isinstance(age, int) or isinstance(age, bool) or not 0 <= age <= 120:
+        raise ValueError("age inválida")
+    if not isinstance(cpf, str) or len(cpf) != 11 or not cpf.isdigit():
+        raise ValueError("cpf inválido")
+
+    return {
+        "cpf": cpf,
+        "name": name.strip(),
+        "age": age,
+        "created_at": datetime.utcnow().isoformat()
+    }
+
 def handler(event, context):
+    failures = []
+    # Deduplica por CPF: a última mensagem do lote vence
+    items = {}
+    message_ids = {}
+
     for record in event["Records"]:
-        body = json.loads(record["body"])
-        name = body["name"]
-        age = body["age"]
-        cpf = body["cpf"]
-
-        # Grava no DynamoDB
-        res = table.put_item(
-            Item={
-                "cpf": cpf,
-                "name": name,
-                "age": age,
-                "created_at": datetime.utcnow().isoformat()
-            }
-        )
-        
-        print(f"Pós gravação no dynamno: {res}")
-
-        print(f"[OK] Matrícula salva no DynamoDB: {cpf} - {name}")
-
-    return {"statusCode": 200}
+        try:
+            item = parse_record(record)
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"[ERRO] Mensagem inválida {record.get('messageId')}: {e}")
+            failures.append(record["messageId"])
+            continue
+        items[item["cpf"]] = item
+        message_ids.setdefault(item["cpf"], []).append(record["messageId"])
+
+    cpfs = list(items)
+    for start in range(0, len(cpfs), WRITE_CHUNK_SIZE):
+        chunk = cpfs[start:start + WRITE_CHUNK_SIZE]
+        try:
+            # Grava no DynamoDB; o batch_writer reenvia os UnprocessedItems
+            with table.batch_writer() as writer:
+                for cpf in chunk:
+                    writer.put_item(Item=items[cpf])
+        except Exception as e:
+            print(f"[ERRO] Falha ao gravar lote no DynamoDB: {e}")
+            for cpf in chunk:
+                failures.extend(message_ids[cpf])
+            continue
+
+        for cpf in chunk:
+            print(f"[OK] Matrícula salva no DynamoDB: {cpf} - {items[cpf]['name']}")
+
+    # Só as mensagens com falha voltam para a fila (ReportBatchItemFailures)
+    return {"batchItemFailures": [{"itemIdentifier": message_id} for message_id in failures]}
@@ -1,36 +1,150 @@
 import base64
+import functools
+import hashlib
+import hmac
 import os
+import secrets
+import threading
+from collections import OrderedDict
 from typing import Optional, Tuple
 from fastapi import HTTPException, Depends, status
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
+from .timing import span
 
 security = HTTPBasic()
 
-def load_auth_users() -> dict:
-    """Load authentication users from static file"""
-    auth_file_path = os.path.join(os.path.dirname(__file__), "auth_users.txt")
-    users = {}
-    
-    try:
-        with open(auth_file_path, 'r') as f:
+AUTH_FILE_PATH = os.path.join(os.path.dirname(__file__), "auth_users.txt")
+
+def hash_password(password: str, scheme: str = "scrypt") -> str:
+    """Build a hashed auth file entry (scrypt or pbkdf2_sha256) for a password"""
+    salt = secrets.token_hex(16)
+    if scheme == "scrypt":
+        n, r, p = 2 ** 14, 8, 1
+        digest = hashlib.scrypt(password.encode(), salt=salt.encode(), n=n, r=r, p=p)
+        return f"scrypt${n}${r}${p}${salt}${base64.b64encode(digest).decode()}"
+    if scheme == "pbkdf2_sha256":
+        iterations = 260000
+        digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt.encode(), iterations)
+        return f"pbkdf2_sha256${iterations}${salt}${base64.b64encode(digest).decode()}"
+    raise ValueError(f"Unsupported password hash scheme: {scheme}")
+
+def check_password(password: str, stored: str) -> bool:
+    """Compare a password with a plaintext or hashed auth file entry in constant time"""
+    if stored.startswith("scrypt$"):
+        _, n, r, p, salt, expected = stored.split("$")
+        digest = hashlib.scrypt(password.encode(), salt=salt.encode(), n=int(n), r=int(r), p=int(p))
+        return hmac.compare_digest(base64.b64encode(digest).decode(), expected)
+    if stored.startswith("pbkdf2_sha256$"):
+        _, iterations, salt, expected = stored.split("$")
+        digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt.encode(), int(iterations))
+        return hmac.compare_digest(base64.b64encode(digest).decode(), expected)
+    if stored.startswith(("$2a$", "$2b$", "$2y$")):
+        try:
+            import bcrypt
+        except ImportError:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="bcrypt password hashes require the bcrypt package"
+            )
+        return bcrypt.checkpw(password.encode(), stored.encode())
+    if stored.startswith("$argon2"):
+        try:
+            from argon2 import PasswordHasher
+            from argon2.exceptions import VerificationError, InvalidHashError
+        except ImportError:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="argon2 password hashes require the argon2-cffi package"
+            )
+        try:
+            return PasswordHasher().verify(stored, password)
+        except (VerificationError, InvalidHashError):
+            return False
+    return hmac.compare_digest(password.encode(), stored.encode())
+
+@functools.lru_cache(maxsize=None)
+def dummy_password_hash() -> str:
+    """Hash checked for unknown users so they take as long as known ones; built on first use"""
+    return hash_password(secrets.token_hex(16))
+
+class CredentialStore:
+    """
+    Authentication users parsed once and reloaded only when the auth file
+    changes. Recent successful verifications are memoized so slow password
+    hashes are not recomputed on every request.
+    """
+
+    def __init__(self, path: str = AUTH_FILE_PATH, memo_size: int = 256):
+        self.path = path
+        self.memo_size = memo_size
+        self._users: dict = {}
+        self._signature: Optional[Tuple[str, int]] = None
+        self._verified: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def users(self) -> dict:
+        """Return the parsed users, reloading them if the file changed"""
+        try:
+            signature = (self.path, os.stat(self.path).st_mtime_ns)
+        except FileNotFoundError:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Authentication file not found"
+            )
+        
+        if signature != self._signature:
+            with self._lock:
+                if signature != self._signature:
+                    self._users = self._parse()
+                    self._verified.clear()
+                    self._signature = signature
+        return self._users
+
+    def _parse(self) -> dict:
+        users = {}
+        with open(self.path, 'r') as f:
             for line in f:
                 line = line.strip()
                 if line and not line.startswith('#'):
                     username, password = line.split(':', 1)
                     users[username] = password
-    except FileNotFoundError:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Authentication file not found"
-        )
-    
-    return users
+        return users
+
+    def verify(self, username: str, password: str) -> bool:
+        """Check a username/password pair"""
+        users = self.users()
+        memo_key = (username, hashlib.sha256(password.encode()).digest())
+        with self._lock:
+            if memo_key in self._verified:
+                self._verified.move_to_end(memo_key)
+                return True
+        
+        stored = users.get(username)
+        if stored is None:
+            # Spend the same time on unknown users as on a wrong password
+            check_password(password, dummy_password_hash())
+            return False
+        
+        if not check_password(password, stored):
+            return False
+        
+        with self._lock:
+            self._verified[memo_key] = True
+            if len(self._verified) > self.memo_size:
+                self._verified.popitem(last=False)
+        return True
+
+credential_store = CredentialStore()
+
+def load_auth_users() -> dict:
+    """Load authentication users from static file"""
+    return credential_store.users()
 
 def verify_credentials(credentials: HTTPBasicCredentials = Depends(security)) -> str:
     """Verify basic auth credentials and return username"""
-    users = load_auth_users()
-    
-    if credentials.username not in users or users[credentials.username] != credentials.password:
+    with span("auth"):
+        verified = credential_store.verify(credentials.username, credentials.password)
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials",
@@ -0,0 +1,119 @@
+"""
+Lazily built AWS clients sharing one botocore session and one Config.
+
+Nothing here is created at import time: the session and each low-level
+client are built on first use, so cold starts only pay for the services a
+request actually calls. boto3 (and its resource layer) is never imported.
+Pool and retry settings come from src/config.Settings.
+"""
+import threading
+from typing import Dict
+
+_lock = threading.Lock()
+_session = None
+_config = None
+_clients: Dict[str, object] = {}
+_metrics: Dict[str, "ClientMetrics"] = {}
+
+class ClientMetrics:
+    """
+    Request, retry and connection counters of one client, fed by botocore
+    events. In-flight requests are attempts between sending and the retry
+    decision, each holding a pooled connection.
+    """
+
+    def __init__(self, max_pool_connections: int):
+        self.max_pool_connections = max_pool_connections
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._lock = threading.Lock()
+
+    def register(self, events):
+        events.register("before-send", self._on_send)
+        events.register("needs-retry", self._on_attempt_done)
+        events.register("after-call", self._on_call)
+        events.register("after-call-error", self._on_call_error)
+
+    def _on_send(self, **kwargs):
+        with self._lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def _on_attempt_done(self, **kwargs):
+        with self._lock:
+            self.in_flight = max(self.in_flight - 1, 0)
+
+    def _on_call(self, parsed=None, **kwargs):
+        metadata = (parsed or {}).get("ResponseMetadata", {})
+        with self._lock:
+            self.requests += 1
+            self.retries += metadata.get("RetryAttempts", 0)
+            if "Error" in (parsed or {}):
+                self.errors += 1
+
+    def _on_call_error(self, **kwargs):
+        with self._lock:
+            self.requests += 1
+            self.errors += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "retries": self.retries,
+                "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight,
+                "max_pool_connections": self.max_pool_connections,
+                "pool_utilization": round(self.in_flight / self.max_pool_connections, 3),
+                "peak_pool_utilization": round(self.peak_in_flight / self.max_pool_connections, 3)
+            }
+
+def get_session():
+    """The process-wide botocore session"""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                import botocore.session
+                _session = botocore.session.get_session()
+    return _session
+
+def get_config():
+    """The botocore Config shared by every client"""
+    global _config
+    if _config is None:
+        from .config import get_settings
+        _config = get_settings().botocore_config()
+    return _config
+
+def client(service_name: str):
+    """Low-level client for `service_name`, created once and shared across threads"""
+    if service_name not in _clients:
+        session = get_session()
+        config = get_config()
+        # Creating clients on a session is not thread safe
+        with _lock:
+            if service_name not in _clients:
+                service_client = session.create_client(service_name, config=config)
+                metrics = ClientMetrics(config.max_pool_connections)
+                metrics.register(service_client.meta.events)
+                _metrics[service_name] = metrics
+                _clients[service_name] = service_client
+    return _clients[service_name]
+
+def client_metrics() -> Dict[str, dict]:
+    """Pool utilization and retry counters per client built so far"""
+    return {service_name: metrics.stats() for service_name, metrics in sorted(_metrics.items())}
+
+def reset():
+    """Forget the session, config and clients, e.g. after changing credentials or settings"""
+    global _session, _config
+    with _lock:
+        _session = None
+        _config = None
+        _clients.clear()
+        _metrics.clear()
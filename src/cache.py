@@ -0,0 +1,98 @@
+import threading
+import time
+from typing import Callable, Iterable, Optional, Tuple
+from .domain import AgeGroup, AgeGroupIndex
+
+class AgeGroupCache:
+    """
+    Process-level age group cache shared across warm invocations.
+    Entries are served for `ttl_seconds`; after that the cached config
+    version is compared with the table and the groups are re-read only
+    when the version changed.
+    
+    Shared by the AsyncDatabaseService worker threads: every invalidate()
+    bumps a generation, and a refill loaded before it is not stored, so a
+    lookup racing a write never puts the pre-write groups back.
+    """
+
+    def __init__(self, ttl_seconds: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._index: Optional[AgeGroupIndex] = None
+        self._version: Optional[int] = None
+        self._expires_at = 0.0
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+
+    def get(
+        self,
+        load_version: Callable[[], int],
+        load_age_groups: Callable[[], Iterable[AgeGroup]]
+    ) -> AgeGroupIndex:
+        """Return the cached index, reloading it when expired and stale"""
+        return self.get_versioned(load_version, load_age_groups)[0]
+
+    def get_versioned(
+        self,
+        load_version: Callable[[], int],
+        load_age_groups: Callable[[], Iterable[AgeGroup]]
+    ) -> Tuple[AgeGroupIndex, int]:
+        """Like get(), also returning the config version the index was loaded at"""
+        now = self._clock()
+        with self._lock:
+            index, version, generation = self._index, self._version, self._generation
+            if index is not None and now < self._expires_at:
+                self.hits += 1
+                return index, version
+
+        # Loads run outside the lock; the generation tells whether they are still current
+        latest = load_version()
+        if index is not None and latest == version:
+            with self._lock:
+                self.hits += 1
+                self.revalidations += 1
+                if generation == self._generation:
+                    self._expires_at = now + self.ttl_seconds
+            return index, version
+
+        # The version is read first, so the groups are never older than it
+        index = AgeGroupIndex(load_age_groups())
+        with self._lock:
+            self.misses += 1
+            if generation == self._generation:
+                self._index, self._version = index, latest
+                self._expires_at = now + self.ttl_seconds
+        return index, latest
+
+    def peek(self) -> Optional[Tuple[AgeGroupIndex, int]]:
+        """The cached index and version while still fresh, without loading anything"""
+        with self._lock:
+            index, version = self._index, self._version
+            if index is None or self._clock() >= self._expires_at:
+                return None
+            self.hits += 1
+            return index, version
+
+    @property
+    def version(self) -> Optional[int]:
+        return self._version
+
+    def invalidate(self):
+        """Forget the cached groups so the next lookup reloads them"""
+        with self._lock:
+            self._generation += 1
+            self._index = None
+            self._version = None
+            self._expires_at = 0.0
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidations": self.revalidations,
+            "version": self._version,
+            "ttl_seconds": self.ttl_seconds
+        }
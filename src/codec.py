@@ -0,0 +1,104 @@
+"""
+Conversion between Python values and the DynamoDB AttributeValue format
+used by the low-level client. Numbers decode to int when integral and to
+Decimal otherwise.
+
+Age groups and enrollments, read by the page, have dedicated codecs that go
+straight between the wire format and the domain objects.
+"""
+from decimal import Decimal
+from typing import Any, Dict, Optional
+from .domain import AgeGroup, Enrollment
+
+def serialize(value: Any) -> dict:
+    if value is None:
+        return {"NULL": True}
+    if isinstance(value, bool):
+        return {"BOOL": value}
+    if isinstance(value, str):
+        return {"S": value}
+    if isinstance(value, (int, Decimal)):
+        return {"N": str(value)}
+    if isinstance(value, float):
+        return {"N": str(Decimal(str(value)))}
+    if isinstance(value, dict):
+        return {"M": {key: serialize(item) for key, item in value.items()}}
+    if isinstance(value, (list, tuple)):
+        return {"L": [serialize(item) for item in value]}
+    if isinstance(value, (bytes, bytearray)):
+        return {"B": bytes(value)}
+    raise TypeError(f"Unsupported DynamoDB type: {type(value).__name__}")
+
+def deserialize(attribute: dict) -> Any:
+    (kind, value), = attribute.items()
+    if kind == "S":
+        return value
+    if kind == "N":
+        number = Decimal(value)
+        return int(number) if number == number.to_integral_value() else number
+    if kind == "BOOL":
+        return value
+    if kind == "NULL":
+        return None
+    if kind == "M":
+        return {key: deserialize(item) for key, item in value.items()}
+    if kind == "L":
+        return [deserialize(item) for item in value]
+    if kind == "B":
+        return value
+    if kind == "SS":
+        return set(value)
+    if kind == "NS":
+        return {deserialize({"N": item}) for item in value}
+    raise TypeError(f"Unsupported DynamoDB type: {kind}")
+
+def to_item(data: Dict[str, Any]) -> Dict[str, dict]:
+    """Python dict to a DynamoDB item (also used for keys and expression values)"""
+    return {key: serialize(value) for key, value in data.items()}
+
+def from_item(item: Dict[str, dict]) -> Dict[str, Any]:
+    """DynamoDB item to a Python dict"""
+    return {key: deserialize(value) for key, value in item.items()}
+
+def _optional_str(attribute: Optional[dict]) -> Optional[str]:
+    return attribute.get("S") if attribute else None
+
+def encode_age_group(age_group: AgeGroup) -> Dict[str, dict]:
+    return {
+        "id": {"S": age_group.id},
+        "name": {"S": age_group.name},
+        "min_age": {"N": str(age_group.min_age)},
+        "max_age": {"N": str(age_group.max_age)},
+        "created_at": {"S": age_group.created_at},
+        "updated_at": {"S": age_group.updated_at} if age_group.updated_at is not None else {"NULL": True}
+    }
+
+def decode_age_group(item: Dict[str, dict]) -> AgeGroup:
+    return AgeGroup(
+        id=item["id"]["S"],
+        name=item["name"]["S"],
+        min_age=int(item["min_age"]["N"]),
+        max_age=int(item["max_age"]["N"]),
+        created_at=item["created_at"]["S"],
+        updated_at=_optional_str(item.get("updated_at"))
+    )
+
+def encode_enrollment(enrollment: Enrollment) -> Dict[str, dict]:
+    return {
+        "cpf": {"S": enrollment.cpf},
+        "name": {"S": enrollment.name},
+        "age": {"N": str(enrollment.age)},
+        "age_group_id": {"S": enrollment.age_group_id},
+        "age_group_name": {"S": enrollment.age_group_name},
+        "created_at": {"S": enrollment.created_at}
+    }
+
+def decode_enrollment(item: Dict[str, dict]) -> Enrollment:
+    return Enrollment(
+        cpf=item["cpf"]["S"],
+        name=item["name"]["S"],
+        age=int(item["age"]["N"]),
+        age_group_id=item["age_group_id"]["S"],
+        age_group_name=item["age_group_name"]["S"],
+        created_at=item["created_at"]["S"]
+    )
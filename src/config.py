@@ -1,3 +1,4 @@
+from functools import lru_cache
 from pydantic import BaseSettings
 from os import getenv, path
 
@@ -5,5 +6,29 @@ base_dir_path = f"{path.dirname(path.realpath(__file__))}"
 class Settings(BaseSettings):
     env: str
     
+    # Shared by every AWS client (see src/aws.py); read from env vars of the same name
+    aws_max_pool_connections: int = 50
+    aws_retry_mode: str = "adaptive"
+    aws_max_attempts: int = 5
+    aws_connect_timeout: float = 2.0
+    aws_read_timeout: float = 5.0
+    aws_tcp_keepalive: bool = True
+    
     class Config:
         env_file = f"{base_dir_path}/{getenv('ENV','dev')}.env"
+    
+    def botocore_config(self):
+        """The botocore Config every AWS client is built with"""
+        from botocore.config import Config
+        return Config(
+            max_pool_connections=self.aws_max_pool_connections,
+            retries={"mode": self.aws_retry_mode, "max_attempts": self.aws_max_attempts},
+            connect_timeout=self.aws_connect_timeout,
+            read_timeout=self.aws_read_timeout,
+            tcp_keepalive=self.aws_tcp_keepalive
+        )
+
+@lru_cache()
+def get_settings() -> Settings:
+    """Settings are read from the env file on first use, not at import"""
+    return Settings(env="env.dev")
@@ -1,106 +1,356 @@
-import boto3
+import asyncio
+import base64
+import json
 import os
-from typing import List, Optional
-from boto3.dynamodb.conditions import Key
+import random
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
 from botocore.exceptions import ClientError
-from .domain import AgeGroup, Enrollment
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from . import aws
+from .cache import AgeGroupCache
+from .codec import decode_age_group, decode_enrollment, encode_age_group, encode_enrollment, from_item, to_item
+from .domain import AgeGroup, AgeGroupIndex, Enrollment
+from .timing import span
+
+# Reserved item in the age groups table holding the configuration version
+CONFIG_VERSION_ID = "__config_version__"
+
+# Reserved items in the age groups table holding enrollment counters. Each
+# write adds to one random shard and reads sum them all, so concurrent
+# enrollments don't contend on a single item. Shards may be added, not removed.
+ENROLLMENT_STATS_ID = "__enrollment_stats__"
+ENROLLMENT_STATS_SHARDS = int(os.getenv("ENROLLMENT_STATS_SHARDS", "10"))
+STATS_GROUP_PREFIX = "age_group:"
+RESERVED_AGE_GROUP_IDS = {CONFIG_VERSION_ID, ENROLLMENT_STATS_ID}
+
+# Reserved items in the age groups table tracking regrouping jobs
+REGROUP_JOB_PREFIX = "__regroup__:"
+
+# Attributes of an ExclusiveStartKey on the enrollments table and its indexes
+ENROLLMENT_KEY_SCHEMA = {"cpf": "S"}
+AGE_GROUP_INDEX_KEY_SCHEMA = {"cpf": "S", "age_group_id": "S", "created_at": "S"}
+AGE_INDEX_KEY_SCHEMA = {"cpf": "S", "age": "N", "created_at": "S"}
+ENROLLMENTS_CURSOR_SCOPE = "enrollments"
+
+# Age group of enrollments whose age is no longer covered by any group
+UNASSIGNED_AGE_GROUP_ID = "__unassigned__"
+
+# Items DynamoDB accepts in one TransactWriteItems call
+MAX_TRANSACTION_ITEMS = 100
+# Enrollments written per transaction, each one followed by a single counters
+# update; kept well under the limit so a conflict or rejected item redoes little
+TRANSACTION_CHUNK_SIZE = 25
+RETRYABLE_ERROR_CODES = {
+    "None",
+    "TransactionConflict",
+    "ThrottlingError",
+    "ProvisionedThroughputExceeded",
+    "ProvisionedThroughputExceededException",
+    "ThrottlingException",
+    "InternalServerError"
+}
+
+class ConcurrentChangeError(Exception):
+    """A write kept losing the race against concurrent changes and gave up"""
 
 class DatabaseService:
     """Service for database operations"""
     
     def __init__(self):
-        self.dynamodb = boto3.resource("dynamodb")
-        self.age_groups_table = self.dynamodb.Table(os.getenv("AGE_GROUPS_TABLE", "age-groups"))
-        self.enrollments_table = self.dynamodb.Table(os.getenv("ENROLLMENTS_TABLE", "enrollments"))
+        self.age_groups_table_name = os.getenv("AGE_GROUPS_TABLE", "age-groups")
+        self.enrollments_table_name = os.getenv("ENROLLMENTS_TABLE", "enrollments")
+        self.age_group_index_name = os.getenv("ENROLLMENTS_AGE_GROUP_INDEX", "age-group-index")
+        self.age_index_name = os.getenv("ENROLLMENTS_AGE_INDEX", "age-index")
+        # Optional; without it idempotency keys are only remembered in-process
+        self.idempotency_table_name = os.getenv("IDEMPOTENCY_TABLE")
+        # Optional; without it rate limit buckets are per container
+        self.rate_limit_table_name = os.getenv("RATE_LIMIT_TABLE")
+        self.age_group_cache = AgeGroupCache(
+            ttl_seconds=float(os.getenv("AGE_GROUP_CACHE_TTL", "30"))
+        )
+    
+    @property
+    def client(self):
+        """Shared low-level DynamoDB client, only built on first use to keep cold starts short"""
+        return aws.client("dynamodb")
     
     # Age Groups operations
     
-    def create_age_group(self, age_group: AgeGroup) -> AgeGroup:
-        """Create a new age group"""
-        try:
-            self.age_groups_table.put_item(
-                Item=age_group.to_dict(),
-                ConditionExpression='attribute_not_exists(id)'
-            )
-            return age_group
-        except ClientError as e:
-            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
-                raise ValueError("Age group with this ID already exists")
-            raise e
+    def create_age_group(self, age_group: AgeGroup, max_attempts: int = 5) -> AgeGroup:
+        """Create a new age group, rejecting ranges that overlap an existing group"""
+        return self._write_age_group(
+            age_group,
+            "attribute_not_exists(id)",
+            "Age group with this ID already exists",
+            max_attempts
+        )
     
     def get_age_group(self, age_group_id: str) -> Optional[AgeGroup]:
         """Get age group by ID"""
+        if _is_reserved_id(age_group_id):
+            return None
         try:
-            response = self.age_groups_table.get_item(Key={"id": age_group_id})
+            response = self.client.get_item(
+                TableName=self.age_groups_table_name,
+                Key=to_item({"id": age_group_id})
+            )
             if "Item" in response:
-                return AgeGroup.from_dict(response["Item"])
+                return decode_age_group(response["Item"])
             return None
         except ClientError:
             return None
     
-    def list_age_groups(self) -> List[AgeGroup]:
+    def list_age_groups(self, use_cache: bool = True) -> List[AgeGroup]:
         """List all age groups"""
+        if use_cache:
+            return self.get_age_group_index().age_groups
+        return self._scan_age_groups()
+    
+    def _scan_age_groups(self) -> List[AgeGroup]:
         try:
-            response = self.age_groups_table.scan()
-            return [AgeGroup.from_dict(item) for item in response.get("Items", [])]
+            response = self.client.scan(TableName=self.age_groups_table_name, ConsistentRead=True)
+            return [
+                decode_age_group(item)
+                for item in response.get("Items", [])
+                if not _is_reserved_id(item["id"]["S"])
+            ]
         except ClientError:
             return []
     
-    def update_age_group(self, age_group: AgeGroup) -> AgeGroup:
-        """Update an existing age group"""
-        try:
-            self.age_groups_table.put_item(
-                Item=age_group.to_dict(),
-                ConditionExpression='attribute_exists(id)'
-            )
-            return age_group
-        except ClientError as e:
-            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
-                raise ValueError("Age group not found")
-            raise e
+    def update_age_group(self, age_group: AgeGroup, max_attempts: int = 5) -> AgeGroup:
+        """Update an existing age group, rejecting ranges that overlap another group"""
+        return self._write_age_group(
+            age_group,
+            "attribute_exists(id)",
+            "Age group not found",
+            max_attempts
+        )
+    
+    def _write_age_group(
+        self,
+        age_group: AgeGroup,
+        condition: str,
+        condition_error: str,
+        max_attempts: int
+    ) -> AgeGroup:
+        """
+        Check the range against the cached index in O(log n) and write the group
+        in the same transaction as a conditional bump of the config version, so a
+        concurrent config change fails the write and the check runs again on
+        fresh groups
+        """
+        for attempt in range(1, max_attempts + 1):
+            index, version = self.age_group_cache.get_versioned(self.get_config_version, self._scan_age_groups)
+            overlapping = index.find_overlap(age_group.min_age, age_group.max_age, exclude_id=age_group.id)
+            if overlapping:
+                raise ValueError(f"Age range overlaps with existing group: {overlapping.name}")
+            try:
+                self.client.transact_write_items(
+                    TransactItems=[
+                        {
+                            "Put": {
+                                "TableName": self.age_groups_table_name,
+                                "Item": encode_age_group(age_group),
+                                "ConditionExpression": condition
+                            }
+                        },
+                        self._config_version_update(version)
+                    ]
+                )
+                self.age_group_cache.invalidate()
+                return age_group
+            except ClientError as e:
+                reasons = e.response.get("CancellationReasons") or [{}, {}]
+                if reasons[0].get("Code") == "ConditionalCheckFailed":
+                    raise ValueError(condition_error)
+                if reasons[1].get("Code") not in ("ConditionalCheckFailed", "TransactionConflict"):
+                    raise e
+                # Another writer changed the groups since the index was loaded
+                self.age_group_cache.invalidate()
+            if attempt < max_attempts:
+                time.sleep(_backoff_delay(attempt))
+        raise ConcurrentChangeError("Age groups changed concurrently, please retry")
     
     def delete_age_group(self, age_group_id: str) -> bool:
         """Delete an age group"""
+        if _is_reserved_id(age_group_id):
+            return False
         try:
-            self.age_groups_table.delete_item(
-                Key={"id": age_group_id},
+            self.client.delete_item(
+                TableName=self.age_groups_table_name,
+                Key=to_item({"id": age_group_id}),
                 ConditionExpression='attribute_exists(id)'
             )
+            self._bump_config_version()
             return True
         except ClientError as e:
             if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
                 return False
             raise e
     
+    def get_config_version(self) -> int:
+        """Get the current age group configuration version"""
+        try:
+            response = self.client.get_item(
+                TableName=self.age_groups_table_name,
+                Key=to_item({"id": CONFIG_VERSION_ID}),
+                ConsistentRead=True
+            )
+            return int(from_item(response.get("Item", {})).get("version", 0))
+        except ClientError:
+            return 0
+    
+    def _bump_config_version(self) -> int:
+        response = self.client.update_item(
+            TableName=self.age_groups_table_name,
+            Key=to_item({"id": CONFIG_VERSION_ID}),
+            UpdateExpression="ADD version :one",
+            ExpressionAttributeValues=to_item({":one": 1}),
+            ReturnValues="UPDATED_NEW"
+        )
+        self.age_group_cache.invalidate()
+        return int(from_item(response["Attributes"])["version"])
+    
+    def _config_version_update(self, version: int) -> dict:
+        """Transaction item bumping the config version only if it is still `version`"""
+        if version:
+            condition = "version = :current"
+            values = {":current": version, ":next": version + 1}
+        else:
+            condition = "attribute_not_exists(version)"
+            values = {":next": 1}
+        return {
+            "Update": {
+                "TableName": self.age_groups_table_name,
+                "Key": to_item({"id": CONFIG_VERSION_ID}),
+                "UpdateExpression": "SET version = :next",
+                "ConditionExpression": condition,
+                "ExpressionAttributeValues": to_item(values)
+            }
+        }
+    
+    def refresh_age_group_index(self) -> AgeGroupIndex:
+        """Reload the age group index from the table"""
+        self.age_group_cache.invalidate()
+        return self.get_age_group_index()
+    
+    def invalidate_age_group_index(self):
+        """Drop the cached age groups so the next lookup reloads them"""
+        self.age_group_cache.invalidate()
+    
+    def get_age_group_index(self) -> AgeGroupIndex:
+        """Return the cached age group index, reloading it when the config changed"""
+        return self.age_group_cache.get(self.get_config_version, self._scan_age_groups)
+    
+    def get_versioned_age_group_index(self) -> Tuple[AgeGroupIndex, int]:
+        """Like get_age_group_index(), also returning the config version it reflects"""
+        return self.age_group_cache.get_versioned(self.get_config_version, self._scan_age_groups)
+    
     def find_age_group_for_age(self, age: int) -> Optional[AgeGroup]:
         """Find the appropriate age group for a given age"""
-        age_groups = self.list_age_groups()
-        for age_group in age_groups:
-            if age_group.contains_age(age):
-                return age_group
-        return None
+        return self.get_age_group_index().find(age)
     
     # Enrollment operations
     
-    def create_enrollment(self, enrollment: Enrollment) -> Enrollment:
-        """Create a new enrollment"""
+    def create_enrollment(self, enrollment: Enrollment, max_attempts: int = 5) -> Enrollment:
+        """Create a new enrollment, counting it in the same transaction"""
         try:
-            self.enrollments_table.put_item(
-                Item=enrollment.to_dict(),
-                ConditionExpression='attribute_not_exists(cpf)'
+            self._transact_write(
+                lambda: [
+                    {
+                        "Put": {
+                            "TableName": self.enrollments_table_name,
+                            "Item": encode_enrollment(enrollment),
+                            "ConditionExpression": "attribute_not_exists(cpf)"
+                        }
+                    },
+                    self._stats_update({enrollment.age_group_id: 1})
+                ],
+                max_attempts
             )
             return enrollment
         except ClientError as e:
-            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
-                raise ValueError("Enrollment with this CPF already exists")
+            reasons = e.response.get("CancellationReasons") or [{}]
+            if reasons[0].get("Code") == "ConditionalCheckFailed":
+                raise ValueError("CPF already enrolled")
             raise e
     
+    def create_enrollments(self, enrollments: List[Enrollment], max_attempts: int = 5) -> Dict[str, str]:
+        """
+        Create enrollments with conditional transactions of up to
+        TRANSACTION_CHUNK_SIZE enrollments plus their counters update.
+        Returns an error message per CPF that could not be written.
+        CPFs must be unique within `enrollments`.
+        """
+        errors = {}
+        for start in range(0, len(enrollments), TRANSACTION_CHUNK_SIZE):
+            chunk = enrollments[start:start + TRANSACTION_CHUNK_SIZE]
+            errors.update(self._write_enrollment_chunk(chunk, max_attempts))
+        return errors
+    
+    def _write_enrollment_chunk(self, pending: List[Enrollment], max_attempts: int) -> Dict[str, str]:
+        errors = {}
+        attempt = 0
+        while pending:
+            counts: Dict[str, int] = {}
+            for enrollment in pending:
+                counts[enrollment.age_group_id] = counts.get(enrollment.age_group_id, 0) + 1
+            try:
+                self.client.transact_write_items(
+                    TransactItems=[
+                        {
+                            "Put": {
+                                "TableName": self.enrollments_table_name,
+                                "Item": encode_enrollment(enrollment),
+                                "ConditionExpression": "attribute_not_exists(cpf)"
+                            }
+                        }
+                        for enrollment in pending
+                    ] + [self._stats_update(counts)]
+                )
+                return errors
+            except ClientError as e:
+                code = e.response["Error"]["Code"]
+                reasons = e.response.get("CancellationReasons")
+                if code == "TransactionCanceledException" and reasons:
+                    retry = []
+                    for enrollment, reason in zip(pending, reasons):
+                        reason_code = reason.get("Code", "None")
+                        if reason_code == "ConditionalCheckFailed":
+                            errors[enrollment.cpf] = "CPF already enrolled"
+                        elif reason_code in RETRYABLE_ERROR_CODES:
+                            retry.append(enrollment)
+                        else:
+                            errors[enrollment.cpf] = reason.get("Message", reason_code)
+                    if len(retry) < len(pending):
+                        # Dropping the rejected items lets the rest commit right away
+                        pending = retry
+                        continue
+                elif code not in RETRYABLE_ERROR_CODES:
+                    raise e
+            
+            attempt += 1
+            if attempt >= max_attempts:
+                for enrollment in pending:
+                    errors[enrollment.cpf] = "Enrollment could not be written, please retry"
+                return errors
+            time.sleep(_backoff_delay(attempt))
+        return errors
+    
     def get_enrollment(self, cpf: str) -> Optional[Enrollment]:
         """Get enrollment by CPF"""
         try:
-            response = self.enrollments_table.get_item(Key={"cpf": cpf})
+            response = self.client.get_item(
+                TableName=self.enrollments_table_name,
+                Key=to_item({"cpf": cpf})
+            )
             if "Item" in response:
-                return Enrollment.from_dict(response["Item"])
+                return decode_enrollment(response["Item"])
             return None
         except ClientError:
             return None
@@ -108,20 +358,651 @@ class DatabaseService:
     def list_enrollments(self) -> List[Enrollment]:
         """List all enrollments"""
         try:
-            response = self.enrollments_table.scan()
-            return [Enrollment.from_dict(item) for item in response.get("Items", [])]
+            return [
+                enrollment
+                for page in self.iter_enrollment_pages()
+                for enrollment in page
+            ]
         except ClientError:
             return []
     
-    def delete_enrollment(self, cpf: str) -> bool:
-        """Delete an enrollment"""
+    def list_enrollments_page(
+        self,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Enrollment], Optional[str]]:
+        """List one page of enrollments, returning the cursor of the next page"""
+        scan_kwargs = {"TableName": self.enrollments_table_name}
+        if limit:
+            scan_kwargs["Limit"] = limit
+        if cursor:
+            scan_kwargs["ExclusiveStartKey"] = decode_cursor(cursor, ENROLLMENTS_CURSOR_SCOPE, ENROLLMENT_KEY_SCHEMA)
+        
+        response = self.client.scan(**scan_kwargs)
+        enrollments = [decode_enrollment(item) for item in response.get("Items", [])]
+        next_key = response.get("LastEvaluatedKey")
+        return enrollments, encode_cursor(next_key, ENROLLMENTS_CURSOR_SCOPE) if next_key else None
+    
+    def list_enrollments_by_group(
+        self,
+        age_group_id: str,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Enrollment], Optional[str]]:
+        """List one page of an age group's enrollments through the age group index"""
+        return self._query_enrollments(
+            limit,
+            cursor,
+            f"age-group:{age_group_id}",
+            AGE_GROUP_INDEX_KEY_SCHEMA,
+            IndexName=self.age_group_index_name,
+            KeyConditionExpression="age_group_id = :age_group_id",
+            ExpressionAttributeValues=to_item({":age_group_id": age_group_id})
+        )
+    
+    def list_enrollments_by_age(
+        self,
+        age: int,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Enrollment], Optional[str]]:
+        """List one page of the enrollments of a given age through the age index"""
+        return self._query_enrollments(
+            limit,
+            cursor,
+            f"age:{age}",
+            AGE_INDEX_KEY_SCHEMA,
+            IndexName=self.age_index_name,
+            KeyConditionExpression="#age = :age",
+            # Rows written by the queue processor carry no age group
+            FilterExpression="attribute_exists(age_group_id)",
+            ExpressionAttributeNames={"#age": "age"},
+            ExpressionAttributeValues=to_item({":age": age})
+        )
+    
+    def _query_enrollments(
+        self,
+        limit: Optional[int],
+        cursor: Optional[str],
+        scope: str,
+        key_schema: Dict[str, str],
+        **query_kwargs
+    ) -> Tuple[List[Enrollment], Optional[str]]:
+        if limit:
+            query_kwargs["Limit"] = limit
+        if cursor:
+            query_kwargs["ExclusiveStartKey"] = decode_cursor(cursor, scope, key_schema)
+        
+        response = self.client.query(TableName=self.enrollments_table_name, **query_kwargs)
+        enrollments = [decode_enrollment(item) for item in response.get("Items", [])]
+        next_key = response.get("LastEvaluatedKey")
+        return enrollments, encode_cursor(next_key, scope) if next_key else None
+    
+    def iter_enrollment_pages(
+        self,
+        page_size: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> Iterator[List[Enrollment]]:
+        """Yield enrollment pages following LastEvaluatedKey until the scan ends"""
+        while True:
+            enrollments, cursor = self.list_enrollments_page(limit=page_size, cursor=cursor)
+            yield enrollments
+            if not cursor:
+                return
+    
+    def delete_enrollment(self, cpf: str, max_attempts: int = 5) -> bool:
+        """Delete an enrollment, uncounting it in the same transaction"""
+        try:
+            response = self.client.get_item(
+                TableName=self.enrollments_table_name,
+                Key=to_item({"cpf": cpf}),
+                ProjectionExpression="cpf, age_group_id"
+            )
+        except ClientError:
+            return False
+        if "Item" not in response:
+            return False
+        age_group_id = from_item(response["Item"]).get("age_group_id")
+        if age_group_id is None:
+            return self._delete_uncounted_enrollment(cpf, max_attempts)
         try:
-            self.enrollments_table.delete_item(
-                Key={"cpf": cpf},
-                ConditionExpression='attribute_exists(cpf)'
+            # The group condition keeps the counters right if the enrollment was regrouped meanwhile
+            self._transact_write(
+                lambda: [
+                    {
+                        "Delete": {
+                            "TableName": self.enrollments_table_name,
+                            "Key": to_item({"cpf": cpf}),
+                            "ConditionExpression": "age_group_id = :age_group_id",
+                            "ExpressionAttributeValues": to_item({":age_group_id": age_group_id})
+                        }
+                    },
+                    self._stats_update({age_group_id: -1})
+                ],
+                max_attempts
             )
             return True
         except ClientError as e:
-            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            reasons = e.response.get("CancellationReasons") or [{}]
+            if reasons[0].get("Code") == "ConditionalCheckFailed":
+                return self.delete_enrollment(cpf, max_attempts)
+            raise e
+    
+    def _delete_uncounted_enrollment(self, cpf: str, max_attempts: int) -> bool:
+        """Delete a row written by the SQS processor, which has no age group and is not counted"""
+        try:
+            self.client.delete_item(
+                TableName=self.enrollments_table_name,
+                Key=to_item({"cpf": cpf}),
+                ConditionExpression="attribute_exists(cpf) AND attribute_not_exists(age_group_id)"
+            )
+            return True
+        except ClientError as e:
+            if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+                # Deleted, or rewritten through the API, since it was read
+                return self.delete_enrollment(cpf, max_attempts)
+            raise e
+    
+    def _transact_write(self, build_items: Callable[[], List[dict]], max_attempts: int) -> None:
+        """
+        Write a transaction, retrying conflicts and throttling with backoff.
+        The items are rebuilt for each attempt so a retry lands on another
+        counter shard. Failed conditions and other errors are raised.
+        """
+        attempt = 0
+        while True:
+            try:
+                self.client.transact_write_items(TransactItems=build_items())
+                return
+            except ClientError as e:
+                attempt += 1
+                if attempt >= max_attempts or not _is_retryable(e):
+                    raise e
+            time.sleep(_backoff_delay(attempt))
+    
+    # Enrollment statistics
+    
+    def _stats_shard_ids(self) -> List[str]:
+        # The first shard keeps the id of the former single counters item
+        return [ENROLLMENT_STATS_ID] + [f"{ENROLLMENT_STATS_ID}#{shard}" for shard in range(1, ENROLLMENT_STATS_SHARDS)]
+    
+    def _stats_update(self, counts: Dict[str, int]) -> dict:
+        """Transaction item adding enrollment counts per age group to a random counters shard"""
+        names = {"#total": "total"}
+        values = {":total": sum(counts.values())}
+        additions = ["#total :total"]
+        for position, (age_group_id, count) in enumerate(counts.items()):
+            names[f"#g{position}"] = STATS_GROUP_PREFIX + age_group_id
+            values[f":g{position}"] = count
+            additions.append(f"#g{position} :g{position}")
+        return {
+            "Update": {
+                "TableName": self.age_groups_table_name,
+                "Key": to_item({"id": random.choice(self._stats_shard_ids())}),
+                "UpdateExpression": "ADD " + ", ".join(additions),
+                "ExpressionAttributeNames": names,
+                "ExpressionAttributeValues": to_item(values)
+            }
+        }
+    
+    def get_enrollment_stats(self) -> Dict[str, object]:
+        """Get the enrollment counters, summing the shards read with a single batch_get_item"""
+        keys = [to_item({"id": shard_id}) for shard_id in self._stats_shard_ids()]
+        items = []
+        while keys:
+            response = self.client.batch_get_item(
+                RequestItems={self.age_groups_table_name: {"Keys": keys}}
+            )
+            items.extend(response["Responses"].get(self.age_groups_table_name, []))
+            keys = response.get("UnprocessedKeys", {}).get(self.age_groups_table_name, {}).get("Keys", [])
+        
+        total = 0
+        by_group: Dict[str, int] = {}
+        for item in map(from_item, items):
+            total += int(item.get("total", 0))
+            for name, count in item.items():
+                if name.startswith(STATS_GROUP_PREFIX):
+                    age_group_id = name[len(STATS_GROUP_PREFIX):]
+                    by_group[age_group_id] = by_group.get(age_group_id, 0) + int(count)
+        return {"total": total, "by_group": by_group}
+    
+    def rebuild_enrollment_stats(self) -> Dict[str, object]:
+        """
+        Recount every enrollment with a full scan, e.g. to backfill the counters
+        or fix them after the SQS processor overwrote enrollments made through
+        the API. Rows without an age group, written by the processor, are not counted.
+        """
+        counts: Dict[str, int] = {}
+        pages = self.client.get_paginator("scan").paginate(
+            TableName=self.enrollments_table_name,
+            ProjectionExpression="age_group_id"
+        )
+        for page in pages:
+            for item in page["Items"]:
+                if "age_group_id" in item:
+                    age_group_id = item["age_group_id"]["S"]
+                    counts[age_group_id] = counts.get(age_group_id, 0) + 1
+        item = {"id": ENROLLMENT_STATS_ID, "total": sum(counts.values())}
+        item.update({STATS_GROUP_PREFIX + age_group_id: count for age_group_id, count in counts.items()})
+        self.client.put_item(TableName=self.age_groups_table_name, Item=to_item(item))
+        for shard_id in self._stats_shard_ids()[1:]:
+            self.client.put_item(TableName=self.age_groups_table_name, Item=to_item({"id": shard_id}))
+        return self.get_enrollment_stats()
+    
+    # Regrouping
+    
+    def regroup_enrollments(
+        self,
+        moves: List[Tuple[Enrollment, Optional[AgeGroup]]],
+        max_attempts: int = 5
+    ) -> int:
+        """
+        Move enrollments to a new age group (None for unassigned), keeping the
+        counters in the same transactions. Enrollments deleted or regrouped
+        since they were read are skipped. Returns how many were moved.
+        """
+        moved = 0
+        for start in range(0, len(moves), TRANSACTION_CHUNK_SIZE):
+            moved += self._regroup_chunk(moves[start:start + TRANSACTION_CHUNK_SIZE], max_attempts)
+        return moved
+    
+    def _regroup_chunk(self, pending: List[Tuple[Enrollment, Optional[AgeGroup]]], max_attempts: int) -> int:
+        attempt = 0
+        while pending:
+            counts: Dict[str, int] = {}
+            transact_items = []
+            for enrollment, age_group in pending:
+                target_id = age_group.id if age_group else UNASSIGNED_AGE_GROUP_ID
+                counts[enrollment.age_group_id] = counts.get(enrollment.age_group_id, 0) - 1
+                counts[target_id] = counts.get(target_id, 0) + 1
+                transact_items.append({
+                    "Update": {
+                        "TableName": self.enrollments_table_name,
+                        "Key": to_item({"cpf": enrollment.cpf}),
+                        "UpdateExpression": "SET age_group_id = :target_id, age_group_name = :target_name",
+                        "ConditionExpression": "age_group_id = :age_group_id",
+                        "ExpressionAttributeValues": to_item({
+                            ":target_id": target_id,
+                            ":target_name": age_group.name if age_group else "",
+                            ":age_group_id": enrollment.age_group_id
+                        })
+                    }
+                })
+            # Renames leave the counters untouched
+            counts = {age_group_id: count for age_group_id, count in counts.items() if count}
+            if counts:
+                transact_items.append(self._stats_update(counts))
+            try:
+                self.client.transact_write_items(TransactItems=transact_items)
+                return len(pending)
+            except ClientError as e:
+                code = e.response["Error"]["Code"]
+                reasons = e.response.get("CancellationReasons")
+                if code == "TransactionCanceledException" and reasons:
+                    retry = [
+                        move
+                        for move, reason in zip(pending, reasons)
+                        if reason.get("Code", "None") in RETRYABLE_ERROR_CODES
+                    ]
+                    if len(retry) < len(pending):
+                        pending = retry
+                        continue
+                elif code not in RETRYABLE_ERROR_CODES:
+                    raise e
+            
+            attempt += 1
+            if attempt >= max_attempts:
+                raise RuntimeError("Enrollments could not be regrouped, please retry")
+            time.sleep(_backoff_delay(attempt))
+        return 0
+    
+    def create_regroup_job(self, age_group_id: str, steps: List[str]) -> str:
+        """Record a regrouping job; `steps` are the index lookups still to process"""
+        job_id = REGROUP_JOB_PREFIX + uuid.uuid4().hex
+        self.client.put_item(TableName=self.age_groups_table_name, Item=to_item({
+            "id": job_id,
+            "age_group_id": age_group_id,
+            "steps": steps,
+            "moved": 0,
+            "created_at": datetime.utcnow().isoformat()
+        }))
+        return job_id
+    
+    def get_regroup_job(self, job_id: str) -> Optional[dict]:
+        response = self.client.get_item(
+            TableName=self.age_groups_table_name,
+            Key=to_item({"id": job_id}),
+            ConsistentRead=True
+        )
+        return from_item(response["Item"]) if "Item" in response else None
+    
+    def list_regroup_jobs(self) -> List[dict]:
+        """List unfinished regrouping jobs, oldest first"""
+        response = self.client.scan(
+            TableName=self.age_groups_table_name,
+            FilterExpression="begins_with(#id, :prefix)",
+            ExpressionAttributeNames={"#id": "id"},
+            ExpressionAttributeValues=to_item({":prefix": REGROUP_JOB_PREFIX})
+        )
+        jobs = [from_item(item) for item in response.get("Items", [])]
+        return sorted(jobs, key=lambda job: job["created_at"])
+    
+    def checkpoint_regroup_job(self, job_id: str, steps: List[str], cursor: Optional[str], moved: int) -> bool:
+        """Save a job's progress. Returns False if the job was finished meanwhile."""
+        update_expression = "SET steps = :steps ADD moved :moved"
+        values = {":steps": steps, ":moved": moved}
+        if cursor:
+            update_expression = "SET steps = :steps, #cursor = :cursor ADD moved :moved"
+            values[":cursor"] = cursor
+        else:
+            update_expression += " REMOVE #cursor"
+        try:
+            self.client.update_item(
+                TableName=self.age_groups_table_name,
+                Key=to_item({"id": job_id}),
+                UpdateExpression=update_expression,
+                ConditionExpression="attribute_exists(id)",
+                ExpressionAttributeNames={"#cursor": "cursor"},
+                ExpressionAttributeValues=to_item(values)
+            )
+            return True
+        except ClientError as e:
+            if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
                 return False
-            raise e
\ No newline at end of file
+            raise e
+    
+    def delete_regroup_job(self, job_id: str):
+        self.client.delete_item(TableName=self.age_groups_table_name, Key=to_item({"id": job_id}))
+    
+    # Idempotency keys
+    
+    def claim_idempotency_key(self, key: str, fingerprint: str, lease_seconds: int) -> Optional[dict]:
+        """
+        Mark `key` as in progress unless an unexpired record exists. Returns
+        that record, or None once the caller owns the key. The pending mark
+        expires after `lease_seconds` so a crashed request does not block it.
+        """
+        now = int(time.time())
+        try:
+            self.client.put_item(
+                TableName=self.idempotency_table_name,
+                Item=to_item({
+                    "key": key,
+                    "fingerprint": fingerprint,
+                    "state": "pending",
+                    "expires_at": now + lease_seconds
+                }),
+                # TTL deletion lags behind expires_at, so expired records count as absent
+                ConditionExpression="attribute_not_exists(#key) OR expires_at < :now",
+                ExpressionAttributeNames={"#key": "key"},
+                ExpressionAttributeValues=to_item({":now": now})
+            )
+            return None
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise e
+        response = self.client.get_item(
+            TableName=self.idempotency_table_name,
+            Key=to_item({"key": key}),
+            ConsistentRead=True
+        )
+        return from_item(response["Item"]) if "Item" in response else None
+    
+    def save_idempotent_response(self, key: str, record: dict):
+        """Store the response of a finished request under `key`, replacing its pending mark"""
+        self.client.put_item(TableName=self.idempotency_table_name, Item=to_item({**record, "key": key}))
+    
+    def release_idempotency_key(self, key: str):
+        """Forget a key whose request failed, so a retry runs again"""
+        self.client.delete_item(TableName=self.idempotency_table_name, Key=to_item({"key": key}))
+    
+    # Rate limits
+    
+    def take_rate_limit_tokens(self, key: str, cost: float, capacity: float, rate: float, max_attempts: int = 3) -> float:
+        """
+        Take `cost` tokens from the shared bucket `key`, which holds up to
+        `capacity` tokens refilled at `rate` per second. Returns 0 once they
+        are taken, or the seconds until they would be available.
+        
+        The bucket is stored as the time (ms) at which it would be full again,
+        so taking tokens is a conditional update with no read before it. The
+        update for a bucket in use runs first, so a busy user costs one write;
+        an idle user costs a failed update plus the one that refills the
+        bucket, and a limited user two failed updates and a read.
+        """
+        step = int(cost * 1000 / rate)
+        window = int(capacity * 1000 / rate)
+        for _ in range(max_attempts):
+            now = int(time.time() * 1000)
+            values = {":now": now, ":expires": (now + window) // 1000 + 1}
+            updates = (
+                ("SET full_at = full_at + :step, expires_at = :expires",
+                 "full_at BETWEEN :now AND :latest",
+                 {**values, ":step": step, ":latest": now + window - step}),
+                # Full bucket: the refill starts now
+                ("SET full_at = :full_at, expires_at = :expires",
+                 "attribute_not_exists(full_at) OR full_at < :now",
+                 {**values, ":full_at": now + step})
+            )
+            for update_expression, condition, expression_values in updates:
+                try:
+                    self.client.update_item(
+                        TableName=self.rate_limit_table_name,
+                        Key=to_item({"key": key}),
+                        UpdateExpression=update_expression,
+                        ConditionExpression=condition,
+                        ExpressionAttributeValues=to_item(expression_values)
+                    )
+                    return 0.0
+                except ClientError as e:
+                    if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                        raise e
+            
+            response = self.client.get_item(
+                TableName=self.rate_limit_table_name,
+                Key=to_item({"key": key}),
+                ConsistentRead=True
+            )
+            full_at = int(from_item(response.get("Item", {})).get("full_at", 0))
+            wait = full_at + step - window - int(time.time() * 1000)
+            if wait > 0:
+                return wait / 1000
+            # The bucket refilled between the updates and the read
+        return step / 1000
+
+
+class AsyncDatabaseService:
+    """
+    Async variant of DatabaseService with the same method surface.
+    The blocking DynamoDB calls run on a bounded thread pool so handlers can
+    await them without stalling the event loop.
+    """
+    
+    def __init__(self, db_service: Optional[DatabaseService] = None, max_workers: Optional[int] = None):
+        self.db_service = db_service or DatabaseService()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or int(os.getenv("DB_MAX_WORKERS", "10")),
+            thread_name_prefix="dynamodb"
+        )
+    
+    async def _run(self, func, *args, **kwargs):
+        loop = asyncio.get_event_loop()
+        # Timed on the event loop: executor threads don't see the request's spans
+        with span(f"db.{func.__name__}"):
+            return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+    
+    @property
+    def age_group_cache(self):
+        return self.db_service.age_group_cache
+    
+    # Age Groups operations
+    
+    async def create_age_group(self, age_group: AgeGroup, max_attempts: int = 5) -> AgeGroup:
+        return await self._run(self.db_service.create_age_group, age_group, max_attempts)
+    
+    async def get_age_group(self, age_group_id: str) -> Optional[AgeGroup]:
+        return await self._run(self.db_service.get_age_group, age_group_id)
+    
+    async def list_age_groups(self, use_cache: bool = True) -> List[AgeGroup]:
+        return await self._run(self.db_service.list_age_groups, use_cache=use_cache)
+    
+    async def update_age_group(self, age_group: AgeGroup, max_attempts: int = 5) -> AgeGroup:
+        return await self._run(self.db_service.update_age_group, age_group, max_attempts)
+    
+    async def delete_age_group(self, age_group_id: str) -> bool:
+        return await self._run(self.db_service.delete_age_group, age_group_id)
+    
+    async def get_config_version(self) -> int:
+        return await self._run(self.db_service.get_config_version)
+    
+    async def refresh_age_group_index(self) -> AgeGroupIndex:
+        return await self._run(self.db_service.refresh_age_group_index)
+    
+    async def get_age_group_index(self) -> AgeGroupIndex:
+        return await self._run(self.db_service.get_age_group_index)
+    
+    async def get_versioned_age_group_index(self) -> Tuple[AgeGroupIndex, int]:
+        # A fresh cache entry is returned without a trip through the thread pool
+        cached = self.age_group_cache.peek()
+        if cached is not None:
+            return cached
+        return await self._run(self.db_service.get_versioned_age_group_index)
+    
+    async def find_age_group_for_age(self, age: int) -> Optional[AgeGroup]:
+        return await self._run(self.db_service.find_age_group_for_age, age)
+    
+    # Enrollment operations
+    
+    async def create_enrollment(self, enrollment: Enrollment) -> Enrollment:
+        return await self._run(self.db_service.create_enrollment, enrollment)
+    
+    async def create_enrollments(self, enrollments: List[Enrollment], max_attempts: int = 5) -> Dict[str, str]:
+        return await self._run(self.db_service.create_enrollments, enrollments, max_attempts)
+    
+    async def get_enrollment(self, cpf: str) -> Optional[Enrollment]:
+        return await self._run(self.db_service.get_enrollment, cpf)
+    
+    async def list_enrollments(self) -> List[Enrollment]:
+        return await self._run(self.db_service.list_enrollments)
+    
+    async def list_enrollments_page(
+        self,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Enrollment], Optional[str]]:
+        return await self._run(self.db_service.list_enrollments_page, limit=limit, cursor=cursor)
+    
+    async def list_enrollments_by_group(
+        self,
+        age_group_id: str,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Enrollment], Optional[str]]:
+        return await self._run(self.db_service.list_enrollments_by_group, age_group_id, limit=limit, cursor=cursor)
+    
+    async def list_enrollments_by_age(
+        self,
+        age: int,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Enrollment], Optional[str]]:
+        return await self._run(self.db_service.list_enrollments_by_age, age, limit=limit, cursor=cursor)
+    
+    async def iter_enrollment_pages(
+        self,
+        page_size: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> AsyncIterator[List[Enrollment]]:
+        while True:
+            enrollments, cursor = await self.list_enrollments_page(limit=page_size, cursor=cursor)
+            yield enrollments
+            if not cursor:
+                return
+    
+    async def delete_enrollment(self, cpf: str) -> bool:
+        return await self._run(self.db_service.delete_enrollment, cpf)
+    
+    async def get_enrollment_stats(self) -> Dict[str, object]:
+        return await self._run(self.db_service.get_enrollment_stats)
+    
+    # Regrouping
+    
+    async def create_regroup_job(self, age_group_id: str, steps: List[str]) -> str:
+        return await self._run(self.db_service.create_regroup_job, age_group_id, steps)
+    
+    # Idempotency keys
+    
+    async def claim_idempotency_key(self, key: str, fingerprint: str, lease_seconds: int) -> Optional[dict]:
+        return await self._run(self.db_service.claim_idempotency_key, key, fingerprint, lease_seconds)
+    
+    async def save_idempotent_response(self, key: str, record: dict):
+        return await self._run(self.db_service.save_idempotent_response, key, record)
+    
+    async def release_idempotency_key(self, key: str):
+        return await self._run(self.db_service.release_idempotency_key, key)
+    
+    # Rate limits
+    
+    async def take_rate_limit_tokens(self, key: str, cost: float, capacity: float, rate: float) -> float:
+        return await self._run(self.db_service.take_rate_limit_tokens, key, cost, capacity, rate)
+
+def _is_reserved_id(item_id: str) -> bool:
+    return (
+        item_id in RESERVED_AGE_GROUP_IDS
+        or item_id.startswith(ENROLLMENT_STATS_ID)
+        or item_id.startswith(REGROUP_JOB_PREFIX)
+    )
+
+def _backoff_delay(attempt: int) -> float:
+    """Jittered exponential delay in seconds before retry number `attempt`"""
+    return min(0.05 * 2 ** attempt, 1.0) * random.uniform(0.5, 1.0)
+
+def _is_retryable(error: ClientError) -> bool:
+    """Whether a failed write may succeed when retried unchanged"""
+    code = error.response["Error"]["Code"]
+    if code == "TransactionCanceledException":
+        reasons = error.response.get("CancellationReasons") or []
+        return bool(reasons) and all(reason.get("Code", "None") in RETRYABLE_ERROR_CODES for reason in reasons)
+    return code in RETRYABLE_ERROR_CODES
+
+def encode_cursor(last_evaluated_key: dict, scope: str) -> str:
+    """Wrap a DynamoDB LastEvaluatedKey into an opaque pagination cursor for the query `scope`"""
+    raw = json.dumps({"scope": scope, "key": last_evaluated_key}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+def decode_cursor(cursor: str, scope: str, key_schema: Dict[str, str]) -> dict:
+    """
+    Unwrap a pagination cursor back into an ExclusiveStartKey. The cursor must
+    come from the same query (`scope`) and hold exactly the `key_schema`
+    attributes, so DynamoDB never sees a start key it would reject.
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(payload, dict) or payload.get("scope") != scope:
+        raise ValueError("Invalid cursor")
+    key = payload.get("key")
+    if not isinstance(key, dict) or set(key) != set(key_schema):
+        raise ValueError("Invalid cursor")
+    for name, attribute_type in key_schema.items():
+        if not _is_key_attribute(key[name], attribute_type):
+            raise ValueError("Invalid cursor")
+    return key
+
+def check_enrollments_cursor(cursor: str):
+    """Raise ValueError unless `cursor` came from a page of list_enrollments_page"""
+    decode_cursor(cursor, ENROLLMENTS_CURSOR_SCOPE, ENROLLMENT_KEY_SCHEMA)
+
+def _is_key_attribute(value, attribute_type: str) -> bool:
+    if not isinstance(value, dict) or set(value) != {attribute_type}:
+        return False
+    raw = value[attribute_type]
+    if not isinstance(raw, str) or not raw:
+        return False
+    if attribute_type == "N":
+        try:
+            return Decimal(raw).is_finite()
+        except InvalidOperation:
+            return False
+    return True
@@ -1,8 +1,23 @@
-from dataclasses import dataclass, field
+from bisect import bisect_right
+from dataclasses import dataclass, field, fields
 from datetime import datetime
-from typing import Optional, List
+from typing import Iterable, Optional, List
 import uuid
 
+def slotted(cls):
+    """
+    Rebuild a dataclass with __slots__, like dataclass(slots=True) on Python
+    3.10+. Instances drop their __dict__, which matters when a page holds
+    tens of thousands of them.
+    """
+    field_names = tuple(f.name for f in fields(cls))
+    namespace = dict(cls.__dict__)
+    namespace["__slots__"] = field_names
+    for name in field_names + ("__dict__", "__weakref__"):
+        namespace.pop(name, None)
+    return type(cls)(cls.__name__, cls.__bases__, namespace)
+
+@slotted
 @dataclass
 class AgeGroup:
 
@@ -47,6 +62,39 @@ class AgeGroup:
             updated_at=data.get("updated_at")
         )
 
+class AgeGroupIndex:
+    """Sorted, non-overlapping interval index answering age lookups in O(log n)"""
+
+    def __init__(self, age_groups: Iterable[AgeGroup] = ()):
+        self._groups = sorted(age_groups, key=lambda g: g.min_age)
+        self._starts = [g.min_age for g in self._groups]
+
+    def __len__(self) -> int:
+        return len(self._groups)
+
+    @property
+    def age_groups(self) -> List[AgeGroup]:
+        return list(self._groups)
+
+    def find(self, age: int) -> Optional[AgeGroup]:
+        position = bisect_right(self._starts, age) - 1
+        if position < 0:
+            return None
+        age_group = self._groups[position]
+        return age_group if age_group.contains_age(age) else None
+
+    def find_overlap(self, min_age: int, max_age: int, exclude_id: Optional[str] = None) -> Optional[AgeGroup]:
+        """Return a group overlapping [min_age, max_age], ignoring `exclude_id`"""
+        # Groups never overlap, so the last group starting at or before max_age is the only candidate
+        position = bisect_right(self._starts, max_age) - 1
+        while position >= 0:
+            age_group = self._groups[position]
+            if age_group.id != exclude_id:
+                return age_group if age_group.max_age >= min_age else None
+            position -= 1
+        return None
+
+@slotted
 @dataclass
 class Enrollment:
     """Internal dataclass for enrollment management"""
@@ -0,0 +1,199 @@
+import atexit
+import json
+import os
+import random
+import signal
+import threading
+import time
+import uuid
+from typing import Callable, List, Optional
+from . import aws
+from .timing import span
+
+# SendMessageBatch accepts at most 10 entries per call
+MAX_BATCH_SIZE = 10
+
+# Seconds an event may wait in the buffer for its batch to fill
+DEFAULT_MAX_WAIT = 0.5
+
+class EnrollmentEventPublisher:
+    """
+    Buffers enrollment events and publishes them with SQS SendMessageBatch.
+    publish() only buffers, so handlers on the event loop never block on SQS.
+    After start() a flusher thread sends once `max_batch_size` events are
+    buffered or the oldest one has waited `max_wait` seconds; flush() sends
+    everything right away, e.g. from a background task or at shutdown.
+    Entries that keep failing are spilled to a local NDJSON file and re-sent
+    on the next flush.
+    Without an explicit `sqs` client the shared one is created on first send.
+    """
+
+    def __init__(
+        self,
+        sqs=None,
+        queue_url: Optional[str] = None,
+        max_batch_size: int = MAX_BATCH_SIZE,
+        max_attempts: int = 3,
+        spill_path: Optional[str] = None,
+        max_wait: Optional[float] = None
+    ):
+        self.sqs = sqs
+        self.queue_url = queue_url
+        self.max_batch_size = min(max_batch_size, MAX_BATCH_SIZE)
+        self.max_attempts = max_attempts
+        self.spill_path = spill_path or os.getenv("EVENT_SPILL_PATH", "/tmp/enrollment-events.ndjson")
+        self.max_wait = max_wait if max_wait is not None else float(os.getenv("EVENT_MAX_WAIT", str(DEFAULT_MAX_WAIT)))
+        self._buffer: List[dict] = []
+        # Publish time of each buffered entry, for max_wait
+        self._published_at: List[float] = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._flush_lock = threading.Lock()
+        self._flusher: Optional[threading.Thread] = None
+        self._stopping = False
+        self._hook_installed = False
+
+    def publish(self, body: str) -> str:
+        """Buffer an event until its batch is due or the next flush(). Returns the event id."""
+        with span("sqs.publish"):
+            event_id = uuid.uuid4().hex
+            with self._lock:
+                self._buffer.append({"Id": event_id, "MessageBody": body})
+                self._published_at.append(time.monotonic())
+                # The flusher sleeps until a batch starts or fills up
+                if len(self._buffer) == 1 or len(self._buffer) >= self.max_batch_size:
+                    self._wakeup.notify()
+            return event_id
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._buffer)
+
+    def start(self):
+        """Start the flusher thread, unless it is running"""
+        with self._lock:
+            if self._flusher is not None:
+                return
+            self._stopping = False
+            self._flusher = threading.Thread(target=self._run_flusher, name="enrollment-event-flusher", daemon=True)
+            self._flusher.start()
+
+    def stop(self):
+        """Stop the flusher thread, then send what is left"""
+        with self._lock:
+            flusher, self._flusher = self._flusher, None
+            self._stopping = True
+            self._wakeup.notify()
+        if flusher is not None:
+            flusher.join()
+        self.flush()
+
+    def _run_flusher(self):
+        while True:
+            with self._lock:
+                while not self._stopping and self._due() == 0:
+                    timeout = self._published_at[0] + self.max_wait - time.monotonic() if self._buffer else None
+                    self._wakeup.wait(timeout)
+                if self._stopping:
+                    return
+            try:
+                self._flush(self._due)
+            except Exception as e:
+                # Unsent events stay buffered or spilled for the next flush
+                print(f"Warning: Failed to flush enrollment events: {e}")
+
+    def _due(self) -> int:
+        """How many buffered entries the flusher sends now: every full batch, or all once the oldest waited max_wait"""
+        if self._buffer and time.monotonic() - self._published_at[0] >= self.max_wait:
+            return len(self._buffer)
+        return len(self._buffer) - len(self._buffer) % self.max_batch_size
+
+    def flush(self) -> int:
+        """Send every buffered and spilled event. Returns how many were delivered."""
+        return self._flush(lambda: len(self._buffer))
+
+    def _flush(self, count: Callable[[], int]) -> int:
+        """Send the first `count()` buffered entries, decided under the lock, with the spilled ones"""
+        with self._flush_lock:
+            with self._lock:
+                taken = count()
+                buffered = self._buffer[:taken]
+                self._buffer = self._buffer[taken:]
+                self._published_at = self._published_at[taken:]
+            spilled = self._read_spill()
+            entries = spilled + buffered
+            if not entries:
+                return 0
+
+            failed = []
+            for start in range(0, len(entries), self.max_batch_size):
+                failed.extend(self._send_batch(entries[start:start + self.max_batch_size]))
+
+            # The spill file is only replaced once the send is over, so a crash
+            # or timeout meanwhile re-sends its events instead of losing them
+            if failed or spilled:
+                self._write_spill(failed)
+            return len(entries) - len(failed)
+
+    def _send_batch(self, entries: List[dict]) -> List[dict]:
+        """Send one batch, retrying failed entries. Returns the entries that still failed."""
+        for attempt in range(self.max_attempts):
+            if attempt:
+                time.sleep(min(0.1 * 2 ** attempt, 2.0) * random.uniform(0.5, 1.0))
+            try:
+                with span("sqs.send"):
+                    response = (self.sqs or aws.client("sqs")).send_message_batch(QueueUrl=self.queue_url, Entries=entries)
+            except Exception as e:
+                print(f"Warning: Failed to send enrollment events to SQS: {e}")
+                continue
+
+            failed_ids = {
+                failure["Id"]
+                for failure in response.get("Failed", [])
+                if not failure.get("SenderFault")
+            }
+            sender_faults = [f for f in response.get("Failed", []) if f.get("SenderFault")]
+            for failure in sender_faults:
+                print(f"Warning: SQS rejected enrollment event {failure['Id']}: {failure.get('Message')}")
+
+            entries = [entry for entry in entries if entry["Id"] in failed_ids]
+            if not entries:
+                return []
+        return entries
+
+    def _read_spill(self) -> List[dict]:
+        if not os.path.exists(self.spill_path):
+            return []
+        with open(self.spill_path, "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def _write_spill(self, entries: List[dict]):
+        """Atomically replace the spill file with `entries`, removing it when there are none"""
+        if not entries:
+            if os.path.exists(self.spill_path):
+                os.remove(self.spill_path)
+            return
+        temp_path = f"{self.spill_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.spill_path)
+        print(f"Warning: Spilled {len(entries)} enrollment events to {self.spill_path}")
+
+    def install_shutdown_hook(self):
+        """Flush buffered events at interpreter exit and on SIGTERM (Lambda shutdown)"""
+        if self._hook_installed:
+            return
+        self._hook_installed = True
+        atexit.register(self.flush)
+
+        previous = signal.getsignal(signal.SIGTERM)
+
+        def on_sigterm(signum, frame):
+            self.flush()
+            if callable(previous):
+                previous(signum, frame)
+
+        signal.signal(signal.SIGTERM, on_sigterm)
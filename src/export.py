@@ -0,0 +1,202 @@
+import argparse
+import csv
+import json
+import os
+import queue
+import tempfile
+import threading
+import boto3
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from typing import IO, Iterable, Iterator, Optional
+from . import aws
+from .database import DatabaseService
+
+ENROLLMENT_FIELDS = ["cpf", "name", "age", "age_group_id", "age_group_name", "created_at"]
+EXPORT_FORMATS = ("csv", "ndjson", "parquet")
+
+_SEGMENT_DONE = object()
+
+def parallel_scan(
+    table,
+    total_segments: int = 4,
+    max_workers: Optional[int] = None,
+    page_size: Optional[int] = None
+) -> Iterator[dict]:
+    """
+    Scan a DynamoDB table with Segment/TotalSegments over a thread pool
+    and merge the segments into a single stream of items
+    """
+    if total_segments < 1:
+        raise ValueError("total_segments must be at least 1")
+
+    # The low-level client is thread safe, unlike the Table resource
+    client = table.meta.client
+    pages: queue.Queue = queue.Queue(maxsize=total_segments * 2)
+    stopped = threading.Event()
+
+    def put(page) -> bool:
+        # Bounded queue keeps memory flat; give up if the consumer went away
+        while not stopped.is_set():
+            try:
+                pages.put(page, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def scan_segment(segment: int):
+        scan_kwargs = {
+            "TableName": table.name,
+            "Segment": segment,
+            "TotalSegments": total_segments
+        }
+        if page_size:
+            scan_kwargs["Limit"] = page_size
+        try:
+            while True:
+                response = client.scan(**scan_kwargs)
+                if not put(response.get("Items", [])):
+                    return
+                if "LastEvaluatedKey" not in response:
+                    break
+                scan_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+        except Exception as e:
+            put(e)
+        finally:
+            put(_SEGMENT_DONE)
+
+    with ThreadPoolExecutor(max_workers=max_workers or total_segments) as executor:
+        for segment in range(total_segments):
+            executor.submit(scan_segment, segment)
+
+        try:
+            remaining = total_segments
+            while remaining:
+                page = pages.get()
+                if page is _SEGMENT_DONE:
+                    remaining -= 1
+                elif isinstance(page, Exception):
+                    raise page
+                else:
+                    yield from page
+        finally:
+            stopped.set()
+
+def _plain(value):
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    return value
+
+def _rows(items: Iterable[dict]) -> Iterator[dict]:
+    for item in items:
+        yield {field: _plain(item.get(field)) for field in ENROLLMENT_FIELDS}
+
+def write_ndjson(items: Iterable[dict], output: IO[str]) -> int:
+    count = 0
+    for row in _rows(items):
+        output.write(json.dumps(row, ensure_ascii=False) + "\n")
+        count += 1
+    return count
+
+def write_csv(items: Iterable[dict], output: IO[str]) -> int:
+    writer = csv.DictWriter(output, fieldnames=ENROLLMENT_FIELDS)
+    writer.writeheader()
+    count = 0
+    for row in _rows(items):
+        writer.writerow(row)
+        count += 1
+    return count
+
+def write_parquet(items: Iterable[dict], path: str, batch_size: int = 10000) -> int:
+    """Write rows as Parquet. Requires the optional pyarrow dependency."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export requires pyarrow to be installed")
+
+    schema = pa.schema([
+        ("cpf", pa.string()),
+        ("name", pa.string()),
+        ("age", pa.int64()),
+        ("age_group_id", pa.string()),
+        ("age_group_name", pa.string()),
+        ("created_at", pa.string())
+    ])
+    count = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        batch = []
+        for row in _rows(items):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                count += len(batch)
+                batch = []
+        if batch:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            count += len(batch)
+    return count
+
+def _write_file(items: Iterable[dict], path: str, export_format: str) -> int:
+    if export_format == "parquet":
+        return write_parquet(items, path)
+    with open(path, "w", newline="", encoding="utf-8") as output:
+        if export_format == "csv":
+            return write_csv(items, output)
+        return write_ndjson(items, output)
+
+def export_table(
+    table,
+    destination: str,
+    export_format: str = "ndjson",
+    total_segments: int = 4,
+    s3_client=None
+) -> int:
+    """
+    Export every item of `table` to a local path or an s3://bucket/key URL.
+    Returns the number of exported rows.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {export_format}")
+
+    items = parallel_scan(table, total_segments=total_segments)
+    if not destination.startswith("s3://"):
+        return _write_file(items, destination, export_format)
+
+    bucket, _, key = destination[len("s3://"):].partition("/")
+    if not bucket or not key:
+        raise ValueError(f"Invalid S3 destination: {destination}")
+
+    fd, temp_path = tempfile.mkstemp(suffix=f".{export_format}")
+    os.close(fd)
+    try:
+        count = _write_file(items, temp_path, export_format)
+        (s3_client or boto3.client("s3", config=aws.get_config())).upload_file(temp_path, bucket, key)
+        return count
+    finally:
+        os.unlink(temp_path)
+
+def export_enrollments(
+    destination: str,
+    export_format: str = "ndjson",
+    total_segments: Optional[int] = None
+) -> int:
+    """Export the enrollments table for reconciliation"""
+    # The shared Config sizes the connection pool for the scan threads
+    table = boto3.resource("dynamodb", config=aws.get_config()).Table(DatabaseService().enrollments_table_name)
+    segments = total_segments or int(os.getenv("EXPORT_SEGMENTS", "4"))
+    return export_table(table, destination, export_format, segments)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the enrollments table")
+    parser.add_argument("destination", help="Local file path or s3://bucket/key")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="ndjson")
+    parser.add_argument("--segments", type=int, default=None, help="Parallel scan segments")
+    args = parser.parse_args(argv)
+
+    count = export_enrollments(args.destination, args.format, args.segments)
+    print(f"Exported {count} enrollments to {args.destination}")
+
+if __name__ == "__main__":
+    main()
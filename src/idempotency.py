@@ -0,0 +1,145 @@
+"""
+Idempotency-Key support for POST endpoints.
+
+The first response for a key is stored with a TTL in the idempotency table
+(IDEMPOTENCY_TABLE) and in a small in-process LRU; a retry with the same key
+gets that response back, marked with Idempotent-Replayed, without running
+the handler again. 4xx responses are stored too, since retrying them would
+give the same answer; 5xx responses and exceptions release the key.
+"""
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional
+from fastapi import HTTPException, status
+from starlette.responses import JSONResponse, Response
+from .database import AsyncDatabaseService
+
+IDEMPOTENT_REPLAY_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+def request_fingerprint(body: str) -> str:
+    """Digest of a request body, to tell a retry from a different request reusing the key"""
+    return hashlib.sha256(body.encode()).hexdigest()
+
+class IdempotencyStore:
+    """
+    Responses by idempotency key. Used from the event loop only, so the LRU
+    and the set of in-flight keys need no lock.
+    """
+
+    def __init__(
+        self,
+        db_service: AsyncDatabaseService,
+        ttl_seconds: int = 24 * 60 * 60,
+        lease_seconds: int = 60,
+        lru_size: int = 1024,
+        clock: Callable[[], float] = time.time
+    ):
+        self.db_service = db_service
+        self.ttl_seconds = ttl_seconds
+        self.lease_seconds = lease_seconds
+        self.lru_size = lru_size
+        self._clock = clock
+        self._recent: OrderedDict = OrderedDict()
+        self._in_flight: set = set()
+
+    @property
+    def persistent(self) -> bool:
+        return bool(self.db_service.db_service.idempotency_table_name)
+
+    def clear(self):
+        self._recent.clear()
+        self._in_flight.clear()
+
+    async def run(
+        self,
+        scope: str,
+        key: str,
+        fingerprint: str,
+        handler: Callable[[], Awaitable[Response]]
+    ) -> Response:
+        """Return the stored response for `key` within `scope`, or run `handler` and store its response"""
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Idempotency-Key must have 1 to {MAX_KEY_LENGTH} characters"
+            )
+        key = f"{scope}:{key}"
+
+        record = self._recent_record(key)
+        if record is None and key in self._in_flight:
+            record = {"fingerprint": fingerprint, "state": "pending"}
+        if record is None and self.persistent:
+            record = await self.db_service.claim_idempotency_key(key, fingerprint, self.lease_seconds)
+        if record is not None:
+            return self._replay(key, record, fingerprint)
+
+        self._in_flight.add(key)
+        try:
+            try:
+                response = await handler()
+            except HTTPException as e:
+                response = JSONResponse({"detail": e.detail}, status_code=e.status_code, headers=e.headers)
+
+            if response.status_code >= 500:
+                await self._release(key)
+                return response
+
+            record = {
+                "fingerprint": fingerprint,
+                "state": "done",
+                "status_code": response.status_code,
+                "body": response.body.decode(),
+                "media_type": response.media_type,
+                "expires_at": int(self._clock()) + self.ttl_seconds
+            }
+            if self.persistent:
+                await self.db_service.save_idempotent_response(key, record)
+            self._remember(key, record)
+            return response
+        except Exception:
+            await self._release(key)
+            raise
+        finally:
+            self._in_flight.discard(key)
+
+    def _replay(self, key: str, record: dict, fingerprint: str) -> Response:
+        if record["fingerprint"] != fingerprint:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was already used with a different request"
+            )
+        if record["state"] != "done":
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key is still in progress"
+            )
+        self._remember(key, record)
+        return Response(
+            content=record["body"],
+            status_code=int(record["status_code"]),
+            media_type=record["media_type"],
+            headers={IDEMPOTENT_REPLAY_HEADER: "true"}
+        )
+
+    def _recent_record(self, key: str) -> Optional[dict]:
+        entry = self._recent.get(key)
+        if entry is None:
+            return None
+        expires_at, record = entry
+        if expires_at < self._clock():
+            del self._recent[key]
+            return None
+        self._recent.move_to_end(key)
+        return record
+
+    def _remember(self, key: str, record: dict):
+        self._recent[key] = (record["expires_at"], record)
+        self._recent.move_to_end(key)
+        if len(self._recent) > self.lru_size:
+            self._recent.popitem(last=False)
+
+    async def _release(self, key: str):
+        if self.persistent:
+            await self.db_service.release_idempotency_key(key)
@@ -1,57 +1,112 @@
 import os
-import boto3
-from fastapi import FastAPI, HTTPException, Depends, status
-from typing import List
+from dataclasses import replace
+from fastapi import BackgroundTasks, FastAPI, HTTPException, Depends, Header, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from typing import AsyncIterator, List, Optional
 from mangum import Mangum
 
-from .config import Settings
+from . import aws
+from .config import get_settings
 from .auth import verify_config_user, verify_final_user
 from .models import (
     AgeGroupCreateRequest, 
     AgeGroupUpdateRequest, 
     AgeGroupResponse,
+    AgeGroupStatsResponse,
+    EnrollmentStatsResponse,
     EnrollmentRequest,
-    EnrollmentResponse
+    EnrollmentResponse,
+    BatchEnrollmentRequest,
+    BatchEnrollmentItemResult,
+    BatchEnrollmentResponse
 )
 from .domain import AgeGroup, Enrollment
-from .database import DatabaseService
+from .database import UNASSIGNED_AGE_GROUP_ID, AsyncDatabaseService, ConcurrentChangeError, DatabaseService, check_enrollments_cursor
+from .events import EnrollmentEventPublisher
+from .idempotency import IdempotencyStore, request_fingerprint
+from .ratelimit import COST_BATCH, COST_READ, COST_SCAN, COST_WRITE, DEFAULT_POLICIES, RateLimiter, RatePolicy
+from .regroup import hand_off_regroup_job, plan_regroup, run_regroup_job, stop_before_timeout
+from .responses import (
+    FastJSONResponse,
+    age_group_body,
+    cache_headers,
+    enrollment_body,
+    enrollments_ndjson,
+    etag,
+    etag_matches,
+    not_modified
+)
+from .timing import ServerTimingMiddleware
 
 app = FastAPI(title="Age Groups and Enrollment API", version="1.0.0")
-setting = Settings(env="env.dev")
-sqs = boto3.client("sqs")
 QUEUE_URL = os.getenv("QUEUE_URL")
+# Function that runs regrouping jobs; without it jobs run in the request's background tasks
+REGROUP_FUNCTION_NAME = os.getenv("REGROUP_FUNCTION_NAME")
+# AWS clients are created on first use (src/aws.py), not at import
 db_service = DatabaseService()
+async_db_service = AsyncDatabaseService(db_service)
+event_publisher = EnrollmentEventPublisher(queue_url=QUEUE_URL)
+idempotency_store = IdempotencyStore(
+    async_db_service,
+    ttl_seconds=int(os.getenv("IDEMPOTENCY_TTL", str(24 * 60 * 60))),
+    lru_size=int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "1024"))
+)
+# Per-user token buckets; endpoints take tokens by DynamoDB cost (src/ratelimit.py)
+rate_limiter = RateLimiter(
+    async_db_service,
+    policies={role: RatePolicy.from_env(role, policy) for role, policy in DEFAULT_POLICIES.items()},
+    enabled=os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+)
+
+# Server-Timing header and EMF latency logs; without it span() is a no-op
+if os.getenv("TIMING_ENABLED", "").lower() in ("1", "true", "yes"):
+    app.add_middleware(ServerTimingMiddleware, namespace=os.getenv("TIMING_NAMESPACE", "EnrollmentApi"))
+
+# Lambda freezes background threads between invocations, so there events are
+# sent by a background task that still runs before Mangum returns the response;
+# elsewhere the publisher's flusher thread sends them in batches
+ON_LAMBDA = bool(os.getenv("AWS_LAMBDA_FUNCTION_NAME"))
+if ON_LAMBDA:
+    event_publisher.install_shutdown_hook()
+
+@app.on_event("startup")
+def start_enrollment_events():
+    if not ON_LAMBDA:
+        event_publisher.start()
+
+@app.on_event("shutdown")
+def flush_enrollment_events():
+    event_publisher.stop()
+
+def _schedule_event_flush(background_tasks: BackgroundTasks):
+    if ON_LAMBDA:
+        background_tasks.add_task(event_publisher.flush)
 
 @app.get("/hello")
 async def root():
-    return {"message": f"Hello World {setting.env}"}
+    return {"message": f"Hello World {get_settings().env}"}
 
 # Configuration User Endpoints (Age Groups Management)
 
 @app.post("/config/age-groups", response_model=AgeGroupResponse, status_code=status.HTTP_201_CREATED)
 async def create_age_group(
     age_group_data: AgeGroupCreateRequest,
-    current_user: str = Depends(verify_config_user)
+    background_tasks: BackgroundTasks,
+    request: Request,
+    current_user: str = Depends(rate_limiter.limit(verify_config_user, COST_WRITE))
 ):
     """Create a new age group (Configuration User only)"""
     try:
-        # Check for overlapping age ranges
-        existing_groups = db_service.list_age_groups()
-        for existing in existing_groups:
-            if (age_group_data.min_age <= existing.max_age and 
-                age_group_data.max_age >= existing.min_age):
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Age range overlaps with existing group: {existing.name}"
-                )
-        
         age_group = AgeGroup(
             name=age_group_data.name,
             min_age=age_group_data.min_age,
             max_age=age_group_data.max_age
         )
         
-        created_group = db_service.create_age_group(age_group)
+        # Overlaps are rejected by the conditional write
+        created_group = await async_db_service.create_age_group(age_group)
+        await _schedule_regroup(request, background_tasks, None, created_group)
         
         return AgeGroupResponse(
             id=created_group.id,
@@ -61,62 +116,141 @@ async def create_age_group(
             created_at=created_group.created_at,
             updated_at=created_group.updated_at
         )
+    except ConcurrentChangeError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 @app.get("/config/age-groups", response_model=List[AgeGroupResponse])
-async def list_age_groups(current_user: str = Depends(verify_config_user)):
+async def list_age_groups(
+    if_none_match: Optional[str] = Header(None),
+    current_user: str = Depends(rate_limiter.limit(verify_config_user, COST_READ))
+):
     """List all age groups (Configuration User only)"""
-    age_groups = db_service.list_age_groups()
-    return [
-        AgeGroupResponse(
-            id=ag.id,
-            name=ag.name,
-            min_age=ag.min_age,
-            max_age=ag.max_age,
-            created_at=ag.created_at,
-            updated_at=ag.updated_at
+    # The config version identifies the whole list; a fresh cache answers without DynamoDB
+    index, version = await async_db_service.get_versioned_age_group_index()
+    tag = etag("age-groups", version)
+    if etag_matches(if_none_match, tag):
+        return not_modified(tag)
+    return FastJSONResponse([age_group_body(ag) for ag in index.age_groups], headers=cache_headers(tag))
+
+@app.get("/config/cache-stats")
+async def age_group_cache_stats(
+    current_user: str = Depends(rate_limiter.limit(verify_config_user, COST_READ))
+):
+    """Age group cache hit/miss counters (Configuration User only)"""
+    return db_service.age_group_cache.stats()
+
+@app.get("/config/aws-stats")
+async def aws_client_stats(
+    current_user: str = Depends(rate_limiter.limit(verify_config_user, COST_READ))
+):
+    """Connection pool utilization and retry counters per AWS client (Configuration User only)"""
+    return aws.client_metrics()
+
+@app.get("/config/enrollment-stats", response_model=EnrollmentStatsResponse)
+async def enrollment_stats(
+    current_user: str = Depends(rate_limiter.limit(verify_config_user, COST_READ))
+):
+    """Enrollment counts per age group (Configuration User only)"""
+    stats = await async_db_service.get_enrollment_stats()
+    age_groups = await async_db_service.list_age_groups()
+    return EnrollmentStatsResponse(
+        total=stats["total"],
+        age_groups=[
+            AgeGroupStatsResponse(
+                age_group_id=ag.id,
+                name=ag.name,
+                enrollments=stats["by_group"].get(ag.id, 0)
+            )
+            for ag in sorted(age_groups, key=lambda ag: ag.min_age)
+        ]
+    )
+
+@app.get("/config/age-groups/{age_group_id}/stats", response_model=AgeGroupStatsResponse)
+async def age_group_stats(
+    age_group_id: str,
+    current_user: str = Depends(rate_limiter.limit(verify_config_user, COST_READ))
+):
+    """Enrollment count of an age group (Configuration User only)"""
+    age_group = next((ag for ag in await async_db_service.list_age_groups() if ag.id == age_group_id), None)
+    if not age_group:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Age group not found"
         )
-        for ag in age_groups
-    ]
+    
+    stats = await async_db_service.get_enrollment_stats()
+    return AgeGroupStatsResponse(
+        age_group_id=age_group.id,
+        name=age_group.name,
+        enrollments=stats["by_group"].get(age_group.id, 0)
+    )
+
+@app.get("/config/age-groups/{age_group_id}/enrollments", response_model=List[EnrollmentResponse])
+async def list_age_group_enrollments(
+    age_group_id: str,
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Page size"),
+    cursor: Optional[str] = Query(None, description="Cursor returned in X-Next-Cursor"),
+    current_user: str = Depends(rate_limiter.limit(verify_config_user, COST_SCAN))
+):
+    """List the enrollments of an age group, oldest first (Configuration User only)"""
+    # Unassigned enrollments are listed under the reserved group id
+    if age_group_id != UNASSIGNED_AGE_GROUP_ID and not any(
+        ag.id == age_group_id for ag in await async_db_service.list_age_groups()
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Age group not found"
+        )
+    
+    try:
+        enrollments, next_cursor = await async_db_service.list_enrollments_by_group(
+            age_group_id, limit=limit, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    return _enrollments_response(enrollments, next_cursor)
 
 @app.get("/config/age-groups/{age_group_id}", response_model=AgeGroupResponse)
 async def get_age_group(
     age_group_id: str,
-    current_user: str = Depends(verify_config_user)
+    if_none_match: Optional[str] = Header(None),
+    current_user: str = Depends(rate_limiter.limit(verify_config_user, COST_READ))
 ):
     """Get specific age group by ID (Configuration User only)"""
-    age_group = db_service.get_age_group(age_group_id)
+    age_group = await async_db_service.get_age_group(age_group_id)
     if not age_group:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Age group not found"
         )
     
-    return AgeGroupResponse(
-        id=age_group.id,
-        name=age_group.name,
-        min_age=age_group.min_age,
-        max_age=age_group.max_age,
-        created_at=age_group.created_at,
-        updated_at=age_group.updated_at
-    )
+    tag = etag(age_group.id, age_group.updated_at or age_group.created_at)
+    if etag_matches(if_none_match, tag):
+        return not_modified(tag)
+    return FastJSONResponse(age_group_body(age_group), headers=cache_headers(tag))
 
 @app.put("/config/age-groups/{age_group_id}", response_model=AgeGroupResponse)
 async def update_age_group(
     age_group_id: str,
     age_group_data: AgeGroupUpdateRequest,
-    current_user: str = Depends(verify_config_user)
+    background_tasks: BackgroundTasks,
+    request: Request,
+    current_user: str = Depends(rate_limiter.limit(verify_config_user, COST_WRITE))
 ):
     """Update age group (Configuration User only)"""
     try:
-        age_group = db_service.get_age_group(age_group_id)
+        age_group = await async_db_service.get_age_group(age_group_id)
         if not age_group:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Age group not found"
             )
         
+        previous_group = replace(age_group)
+        
         # Update fields if provided
         age_group.update(
             name=age_group_data.name,
@@ -124,18 +258,8 @@ async def update_age_group(
             max_age=age_group_data.max_age
         )
         
-        # Check for overlapping age ranges with other groups
-        existing_groups = db_service.list_age_groups()
-        for existing in existing_groups:
-            if existing.id != age_group.id:
-                if (age_group.min_age <= existing.max_age and 
-                    age_group.max_age >= existing.min_age):
-                    raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        detail=f"Age range overlaps with existing group: {existing.name}"
-                    )
-        
-        updated_group = db_service.update_age_group(age_group)
+        updated_group = await async_db_service.update_age_group(age_group)
+        await _schedule_regroup(request, background_tasks, previous_group, updated_group)
         
         return AgeGroupResponse(
             id=updated_group.id,
@@ -145,41 +269,74 @@ async def update_age_group(
             created_at=updated_group.created_at,
             updated_at=updated_group.updated_at
         )
+    except ConcurrentChangeError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 @app.delete("/config/age-groups/{age_group_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_age_group(
     age_group_id: str,
-    current_user: str = Depends(verify_config_user)
+    background_tasks: BackgroundTasks,
+    request: Request,
+    current_user: str = Depends(rate_limiter.limit(verify_config_user, COST_WRITE))
 ):
     """Delete age group (Configuration User only)"""
-    success = db_service.delete_age_group(age_group_id)
+    age_group = await async_db_service.get_age_group(age_group_id)
+    success = age_group is not None and await async_db_service.delete_age_group(age_group_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Age group not found"
         )
+    await _schedule_regroup(request, background_tasks, age_group, None)
+
+async def _schedule_regroup(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    old: Optional[AgeGroup],
+    new: Optional[AgeGroup]
+):
+    """
+    Record a regrouping job for the enrollments touched by a change and hand
+    it to REGROUP_FUNCTION_NAME, or run it after the response without one
+    """
+    steps = plan_regroup(old, new)
+    if not steps:
+        return
+    job_id = await async_db_service.create_regroup_job((new or old).id, steps)
+    if REGROUP_FUNCTION_NAME:
+        # Under Mangum background tasks still delay the response, so only the invoke runs here
+        background_tasks.add_task(hand_off_regroup_job, REGROUP_FUNCTION_NAME, job_id)
+        return
+    # Checkpoint and stop before the invocation times out; RegroupResumeFunction finishes the job
+    should_stop = stop_before_timeout(request.scope.get("aws.context"))
+    background_tasks.add_task(run_regroup_job, db_service, job_id, should_stop=should_stop)
 
 # Final User Endpoints (Enrollment)
 
 @app.post("/enroll", response_model=EnrollmentResponse, status_code=status.HTTP_201_CREATED)
 async def create_enrollment(
     enrollment_data: EnrollmentRequest,
-    current_user: str = Depends(verify_final_user)
+    background_tasks: BackgroundTasks,
+    idempotency_key: Optional[str] = Header(None),
+    current_user: str = Depends(rate_limiter.limit(verify_final_user, COST_WRITE))
 ):
     """Create new enrollment (Final User and Config User)"""
+    if idempotency_key is None:
+        return await _create_enrollment(enrollment_data, background_tasks)
+    # A retry gets the first response back instead of "CPF already enrolled"
+    return await idempotency_store.run(
+        f"{current_user}:/enroll",
+        idempotency_key,
+        request_fingerprint(enrollment_data.json()),
+        lambda: _create_enrollment(enrollment_data, background_tasks)
+    )
+
+async def _create_enrollment(enrollment_data: EnrollmentRequest, background_tasks: BackgroundTasks) -> Response:
     try:
-        # Check if CPF already exists
-        existing_enrollment = db_service.get_enrollment(enrollment_data.cpf)
-        if existing_enrollment:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="CPF already enrolled"
-            )
-        
         # Find appropriate age group
-        age_group = db_service.find_age_group_for_age(enrollment_data.age)
+        age_group = await async_db_service.find_age_group_for_age(enrollment_data.age)
         if not age_group:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -194,72 +351,162 @@ async def create_enrollment(
             age_group_name=age_group.name
         )
         
-        created_enrollment = db_service.create_enrollment(enrollment)
+        # The conditional write rejects an already enrolled CPF
+        created_enrollment = await async_db_service.create_enrollment(enrollment)
         
         # Also send to SQS queue if configured (backward compatibility)
         if QUEUE_URL:
-            try:
-                sqs.send_message(
-                    QueueUrl=QUEUE_URL,
-                    MessageBody=enrollment_data.json()
-                )
-            except Exception as e:
-                # Log error but don't fail the enrollment
-                print(f"Warning: Failed to send to SQS queue: {e}")
+            event_publisher.publish(enrollment_data.json())
+            _schedule_event_flush(background_tasks)
         
-        return EnrollmentResponse(
-            cpf=created_enrollment.cpf,
-            name=created_enrollment.name,
-            age=created_enrollment.age,
-            age_group=created_enrollment.age_group_name,
-            created_at=created_enrollment.created_at
-        )
+        return FastJSONResponse(enrollment_body(created_enrollment), status_code=status.HTTP_201_CREATED)
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
+@app.post("/enroll/batch", response_model=BatchEnrollmentResponse)
+async def create_enrollments_batch(
+    batch: BatchEnrollmentRequest,
+    background_tasks: BackgroundTasks,
+    current_user: str = Depends(rate_limiter.limit(verify_final_user, COST_BATCH))
+):
+    """Create many enrollments at once, reporting the result of each item (Final User and Config User)"""
+    # Resolve every item against a single snapshot of the age groups
+    age_group_index = await async_db_service.get_age_group_index()
+    results = []
+    to_create = {}
+    
+    for index, item in enumerate(batch.enrollments):
+        try:
+            enrollment_data = EnrollmentRequest.parse_obj(item)
+        except ValidationError as e:
+            results.append(BatchEnrollmentItemResult(
+                index=index,
+                cpf=item.get("cpf") if isinstance(item.get("cpf"), str) else None,
+                status="failed",
+                detail="; ".join(error["msg"] for error in e.errors())
+            ))
+            continue
+        
+        result = BatchEnrollmentItemResult(index=index, cpf=enrollment_data.cpf, status="failed")
+        results.append(result)
+        
+        if enrollment_data.cpf in to_create:
+            result.detail = "CPF repeated in batch"
+            continue
+        
+        age_group = age_group_index.find(enrollment_data.age)
+        if not age_group:
+            result.detail = f"No age group found for age {enrollment_data.age}. Please contact administrator."
+            continue
+        
+        to_create[enrollment_data.cpf] = (result, Enrollment(
+            name=enrollment_data.name,
+            age=enrollment_data.age,
+            cpf=enrollment_data.cpf,
+            age_group_id=age_group.id,
+            age_group_name=age_group.name
+        ))
+    
+    errors = await async_db_service.create_enrollments([enrollment for _, enrollment in to_create.values()])
+    
+    for cpf, (result, enrollment) in to_create.items():
+        if cpf in errors:
+            result.detail = errors[cpf]
+        else:
+            result.status = "created"
+            result.enrollment = _enrollment_response(enrollment)
+            if QUEUE_URL:
+                event_publisher.publish(EnrollmentRequest(
+                    name=enrollment.name,
+                    age=enrollment.age,
+                    cpf=enrollment.cpf
+                ).json())
+    
+    if QUEUE_URL:
+        _schedule_event_flush(background_tasks)
+    
+    created = sum(1 for result in results if result.status == "created")
+    return BatchEnrollmentResponse(
+        created=created,
+        failed=len(results) - created,
+        results=results
+    )
+
 @app.get("/enrollments", response_model=List[EnrollmentResponse])
-async def list_enrollments(current_user: str = Depends(verify_final_user)):
-    """List all enrollments (Final User and Config User)"""
-    enrollments = db_service.list_enrollments()
-    return [
-        EnrollmentResponse(
-            cpf=e.cpf,
-            name=e.name,
-            age=e.age,
-            age_group=e.age_group_name,
-            created_at=e.created_at
-        )
-        for e in enrollments
-    ]
+async def list_enrollments(
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Page size"),
+    cursor: Optional[str] = Query(None, description="Cursor returned in X-Next-Cursor"),
+    format: Optional[str] = Query(None, regex="^ndjson$", description="Stream as NDJSON"),
+    current_user: str = Depends(rate_limiter.limit(verify_final_user, COST_SCAN))
+):
+    """List enrollments, optionally paginated or streamed (Final User and Config User)"""
+    try:
+        if format == "ndjson":
+            # Rejected before the 200 headers go out, not halfway through the stream
+            if cursor:
+                check_enrollments_cursor(cursor)
+            pages = async_db_service.iter_enrollment_pages(page_size=limit, cursor=cursor)
+            return StreamingResponse(
+                _enrollments_ndjson(pages),
+                media_type="application/x-ndjson"
+            )
+        
+        next_cursor = None
+        if limit is None and cursor is None:
+            enrollments = await async_db_service.list_enrollments()
+        else:
+            enrollments, next_cursor = await async_db_service.list_enrollments_page(limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    return _enrollments_response(enrollments, next_cursor)
+
+def _enrollment_response(enrollment: Enrollment) -> EnrollmentResponse:
+    return EnrollmentResponse(
+        cpf=enrollment.cpf,
+        name=enrollment.name,
+        age=enrollment.age,
+        age_group=enrollment.age_group_name,
+        created_at=enrollment.created_at
+    )
+
+def _enrollments_response(enrollments: List[Enrollment], next_cursor: Optional[str]) -> FastJSONResponse:
+    # Returning a response directly skips response_model validation; the bodies already match it
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return FastJSONResponse([enrollment_body(e) for e in enrollments], headers=headers)
+
+async def _enrollments_ndjson(pages: AsyncIterator[List[Enrollment]]) -> AsyncIterator[bytes]:
+    async for page in pages:
+        if page:
+            yield enrollments_ndjson(page)
 
 @app.get("/enrollments/{cpf}", response_model=EnrollmentResponse)
 async def get_enrollment(
     cpf: str,
-    current_user: str = Depends(verify_final_user)
+    if_none_match: Optional[str] = Header(None),
+    current_user: str = Depends(rate_limiter.limit(verify_final_user, COST_READ))
 ):
     """Get enrollment by CPF (Final User and Config User)"""
-    enrollment = db_service.get_enrollment(cpf)
+    enrollment = await async_db_service.get_enrollment(cpf)
     if not enrollment:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Enrollment not found"
         )
     
-    return EnrollmentResponse(
-        cpf=enrollment.cpf,
-        name=enrollment.name,
-        age=enrollment.age,
-        age_group=enrollment.age_group_name,
-        created_at=enrollment.created_at
-    )
+    # Regrouping changes the age group without touching created_at
+    tag = etag(enrollment.cpf, enrollment.created_at, enrollment.age_group_id, enrollment.age_group_name)
+    if etag_matches(if_none_match, tag):
+        return not_modified(tag)
+    return FastJSONResponse(enrollment_body(enrollment), headers=cache_headers(tag))
 
 @app.delete("/enrollments/{cpf}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_enrollment(
     cpf: str,
-    current_user: str = Depends(verify_final_user)
+    current_user: str = Depends(rate_limiter.limit(verify_final_user, COST_WRITE))
 ):
     """Delete enrollment by CPF (Final User and Config User)"""
-    success = db_service.delete_enrollment(cpf)
+    success = await async_db_service.delete_enrollment(cpf)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -268,19 +515,33 @@ async def delete_enrollment(
 
 # Legacy endpoint for backward compatibility
 @app.post("/enroll-legacy")
-async def enqueue_enrollment_legacy(enrollment: EnrollmentRequest):
+async def enqueue_enrollment_legacy(
+    enrollment: EnrollmentRequest,
+    background_tasks: BackgroundTasks,
+    idempotency_key: Optional[str] = Header(None)
+):
     """Legacy enrollment endpoint for backward compatibility"""
+    if idempotency_key is None:
+        return await _enqueue_enrollment_legacy(enrollment, background_tasks)
+    # Without auth the key is shared by every caller; a replay returns the first MessageId
+    return await idempotency_store.run(
+        "/enroll-legacy",
+        idempotency_key,
+        request_fingerprint(enrollment.json()),
+        lambda: _enqueue_enrollment_legacy(enrollment, background_tasks)
+    )
+
+async def _enqueue_enrollment_legacy(enrollment: EnrollmentRequest, background_tasks: BackgroundTasks) -> Response:
     if not QUEUE_URL:
-        return {"error": "QUEUE_URL não configurada"}
+        return FastJSONResponse({"error": "QUEUE_URL não configurada"})
 
-    response = sqs.send_message(
-        QueueUrl=QUEUE_URL,
-        MessageBody=enrollment.json()
-    )
+    # MessageId is the batch entry id; the event is delivered after the response
+    event_id = event_publisher.publish(enrollment.json())
+    _schedule_event_flush(background_tasks)
 
-    return {
+    return FastJSONResponse({
         "message": f"Enrollment enviado para fila {QUEUE_URL}",
-        "MessageId": response["MessageId"]
-    }
+        "MessageId": event_id
+    })
 
 handler = Mangum(app)
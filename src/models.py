@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field, validator
-from typing import Optional
-from .validators import validate_cpf, validate_name, clean_cpf
+from typing import Any, Dict, List, Optional
+from .validators import check_cpf, validate_name
 
 class AgeGroupCreateRequest(BaseModel):
     """Pydantic model for creating age groups"""
@@ -36,9 +36,9 @@ class EnrollmentRequest(BaseModel):
     
     @validator('cpf')
     def validate_cpf_field(cls, cpf):
-        cpf_clean = clean_cpf(cpf)
+        cpf_clean, is_valid = check_cpf(cpf)
         
-        if not validate_cpf(cpf_clean):
+        if not is_valid:
             raise ValueError('Invalid CPF number')
         
         return cpf_clean
@@ -67,4 +67,33 @@ class EnrollmentResponse(BaseModel):
     name: str
     age: int
     age_group: str
-    created_at: str
\ No newline at end of file
+    created_at: str
+
+class AgeGroupStatsResponse(BaseModel):
+    """Response model for the enrollment count of an age group"""
+    age_group_id: str
+    name: str
+    enrollments: int
+
+class EnrollmentStatsResponse(BaseModel):
+    """Response model for enrollment counts per age group"""
+    total: int
+    age_groups: List[AgeGroupStatsResponse]
+
+class BatchEnrollmentRequest(BaseModel):
+    """Pydantic model for batch enrollment requests, validated item by item"""
+    enrollments: List[Dict[str, Any]] = Field(..., min_items=1, max_items=1000, description="Enrollment requests")
+
+class BatchEnrollmentItemResult(BaseModel):
+    """Result of a single item of a batch enrollment"""
+    index: int
+    cpf: Optional[str] = None
+    status: str
+    detail: Optional[str] = None
+    enrollment: Optional[EnrollmentResponse] = None
+
+class BatchEnrollmentResponse(BaseModel):
+    """Response model for batch enrollments"""
+    created: int
+    failed: int
+    results: List[BatchEnrollmentItemResult]
@@ -0,0 +1,145 @@
+"""
+Per-user token-bucket rate limiting.
+
+Each authenticated user has a bucket sized by their role (the username
+prefix, `config_` or `final_`), and every endpoint takes a number of tokens
+weighted by what it costs in DynamoDB: a scan takes more than a get. With
+RATE_LIMIT_TABLE set the buckets live in DynamoDB and are shared by every
+container; otherwise each container keeps its own.
+"""
+import math
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional
+from botocore.exceptions import BotoCoreError, ClientError
+from fastapi import Depends, HTTPException, status
+from .database import AsyncDatabaseService
+
+# Tokens taken per request
+COST_READ = 1
+COST_WRITE = 2
+COST_SCAN = 10
+COST_BATCH = 25
+
+@dataclass(frozen=True)
+class RatePolicy:
+    capacity: float
+    rate: float
+
+    @classmethod
+    def from_env(cls, role: str, default: "RatePolicy") -> "RatePolicy":
+        """Read RATE_LIMIT_<ROLE>_BURST and RATE_LIMIT_<ROLE>_RATE"""
+        prefix = f"RATE_LIMIT_{role.upper()}"
+        return cls(
+            capacity=float(os.getenv(f"{prefix}_BURST", default.capacity)),
+            rate=float(os.getenv(f"{prefix}_RATE", default.rate))
+        )
+
+DEFAULT_POLICIES = {
+    "config": RatePolicy(capacity=300, rate=30),
+    "final": RatePolicy(capacity=100, rate=10)
+}
+
+class TokenBucket:
+    """Up to `capacity` tokens, refilled continuously at `rate` per second"""
+    __slots__ = ("capacity", "rate", "tokens", "updated_at")
+
+    def __init__(self, capacity: float, rate: float, now: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.updated_at = now
+
+    def take(self, cost: float, now: float) -> float:
+        """Take `cost` tokens; returns 0, or the seconds until they would be available"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+class RateLimiter:
+    """
+    Buckets by username. Used from the event loop only, so the buckets need
+    no lock. A user limited by the shared bucket is also remembered locally
+    until the wait is over, so retries in a loop don't reach DynamoDB.
+    """
+
+    def __init__(
+        self,
+        db_service: AsyncDatabaseService,
+        policies: Optional[Dict[str, RatePolicy]] = None,
+        enabled: bool = True,
+        max_users: int = 10000,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.db_service = db_service
+        self.policies = policies or DEFAULT_POLICIES
+        self.enabled = enabled
+        self.max_users = max_users
+        self._clock = clock
+        self._buckets: OrderedDict = OrderedDict()
+        self._blocked_until: Dict[str, float] = {}
+
+    @property
+    def shared(self) -> bool:
+        return bool(self.db_service.db_service.rate_limit_table_name)
+
+    def clear(self):
+        self._buckets.clear()
+        self._blocked_until.clear()
+
+    def policy_for(self, username: str) -> RatePolicy:
+        role = username.split("_", 1)[0]
+        return self.policies.get(role, self.policies["final"])
+
+    async def acquire(self, username: str, cost: float):
+        """Take `cost` tokens from the user's bucket or raise 429 with Retry-After"""
+        if not self.enabled:
+            return
+        policy = self.policy_for(username)
+        # A request costing more than the burst would never pass
+        cost = min(cost, policy.capacity)
+        now = self._clock()
+
+        wait = self._blocked_until.get(username, now) - now
+        if wait <= 0:
+            wait = await self._take(username, cost, policy, now)
+        if wait > 0:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Rate limit exceeded",
+                headers={"Retry-After": str(math.ceil(wait))}
+            )
+
+    async def _take(self, username: str, cost: float, policy: RatePolicy, now: float) -> float:
+        self._blocked_until.pop(username, None)
+        if self.shared:
+            try:
+                wait = await self.db_service.take_rate_limit_tokens(username, cost, policy.capacity, policy.rate)
+            except (BotoCoreError, ClientError):
+                # Limiting is best effort: fall back to this container's bucket
+                return self._local_bucket(username, policy, now).take(cost, now)
+            if wait > 0:
+                self._blocked_until[username] = now + wait
+            return wait
+        return self._local_bucket(username, policy, now).take(cost, now)
+
+    def _local_bucket(self, username: str, policy: RatePolicy, now: float) -> TokenBucket:
+        bucket = self._buckets.get(username)
+        if bucket is None:
+            bucket = self._buckets[username] = TokenBucket(policy.capacity, policy.rate, now)
+            if len(self._buckets) > self.max_users:
+                self._buckets.popitem(last=False)
+        self._buckets.move_to_end(username)
+        return bucket
+
+    def limit(self, verify: Callable[..., str], cost: float) -> Callable[..., Awaitable[str]]:
+        """Dependency that authenticates with `verify`, then takes `cost` tokens for the user"""
+        async def dependency(current_user: str = Depends(verify)) -> str:
+            await self.acquire(current_user, cost)
+            return current_user
+        return dependency
@@ -0,0 +1,144 @@
+import argparse
+import json
+from typing import Callable, List, Optional
+from botocore.exceptions import BotoCoreError, ClientError
+from . import aws
+from .database import UNASSIGNED_AGE_GROUP_ID, DatabaseService
+from .domain import AgeGroup
+
+REGROUP_PAGE_SIZE = 100
+
+# Stop a run this long before the Lambda timeout
+STOP_MARGIN_MS = 5000
+
+def _ages(age_group: Optional[AgeGroup]) -> set:
+    if not age_group:
+        return set()
+    return set(range(age_group.min_age, age_group.max_age + 1))
+
+def plan_regroup(old: Optional[AgeGroup], new: Optional[AgeGroup]) -> List[str]:
+    """
+    Index lookups covering the enrollments touched when `old` becomes `new`
+    (None for a created or deleted group). Only the age delta is fetched:
+    "age:<n>" reads the age index, "group:<id>" a whole age group partition.
+    """
+    if new is None:
+        return [f"group:{old.id}"] if old else []
+    if old is None:
+        # Ages no group covered can only hold unassigned enrollments
+        return [f"group:{UNASSIGNED_AGE_GROUP_ID}"]
+
+    steps = []
+    if old.name != new.name:
+        # Every enrollment of the group carries the old name, including the ages it loses
+        steps.append(f"group:{old.id}")
+        ages = _ages(new) - _ages(old)
+    else:
+        ages = _ages(old) ^ _ages(new)
+    steps.extend(f"age:{age}" for age in sorted(ages))
+    return steps
+
+def _read_step(db_service: DatabaseService, step: str, page_size: int, cursor: Optional[str]):
+    kind, _, key = step.partition(":")
+    if kind == "age":
+        return db_service.list_enrollments_by_age(int(key), limit=page_size, cursor=cursor)
+    return db_service.list_enrollments_by_group(key, limit=page_size, cursor=cursor)
+
+def run_regroup_job(
+    db_service: DatabaseService,
+    job_id: str,
+    page_size: int = REGROUP_PAGE_SIZE,
+    should_stop: Callable[[], bool] = lambda: False
+) -> bool:
+    """
+    Regroup the enrollments of a job page by page, saving a checkpoint after
+    every page so an interrupted run resumes where it stopped.
+    Returns True once the job is finished.
+    """
+    job = db_service.get_regroup_job(job_id)
+    if not job:
+        return True
+
+    steps = list(job["steps"])
+    cursor = job.get("cursor")
+    while steps:
+        if should_stop():
+            return False
+
+        try:
+            page, cursor = _read_step(db_service, steps[0], page_size, cursor)
+        except ValueError:
+            # A checkpoint cursor no longer accepted; moves are idempotent, so redo the step
+            page, cursor = _read_step(db_service, steps[0], page_size, None)
+
+        # Resolve against the current groups so a newer change is never undone
+        age_group_index = db_service.refresh_age_group_index()
+        moves = []
+        for enrollment in page:
+            age_group = age_group_index.find(enrollment.age)
+            target = (age_group.id, age_group.name) if age_group else (UNASSIGNED_AGE_GROUP_ID, "")
+            if target != (enrollment.age_group_id, enrollment.age_group_name):
+                moves.append((enrollment, age_group))
+        moved = db_service.regroup_enrollments(moves) if moves else 0
+
+        if not cursor:
+            steps.pop(0)
+        if not db_service.checkpoint_regroup_job(job_id, steps, cursor, moved):
+            return True
+
+    db_service.delete_regroup_job(job_id)
+    return True
+
+def resume_regroup_jobs(
+    db_service: DatabaseService,
+    should_stop: Callable[[], bool] = lambda: False
+) -> int:
+    """Run every unfinished job in creation order. Returns how many finished."""
+    finished = 0
+    for job in db_service.list_regroup_jobs():
+        if not run_regroup_job(db_service, job["id"], should_stop=should_stop):
+            break
+        finished += 1
+    return finished
+
+def stop_before_timeout(context) -> Callable[[], bool]:
+    """should_stop for a run inside a Lambda invocation (`context` is None outside Lambda)"""
+    if context is None:
+        return lambda: False
+    return lambda: context.get_remaining_time_in_millis() < STOP_MARGIN_MS
+
+def hand_off_regroup_job(function_name: str, job_id: str) -> bool:
+    """
+    Invoke RegroupResumeFunction asynchronously for a job just recorded, so
+    the request that changed the groups does not wait for the regrouping.
+    If the invoke fails the job waits for the scheduled resume instead.
+    """
+    try:
+        aws.client("lambda").invoke(
+            FunctionName=function_name,
+            InvocationType="Event",
+            Payload=json.dumps({"job_id": job_id}).encode()
+        )
+        return True
+    except (BotoCoreError, ClientError) as e:
+        print(f"Warning: Failed to start regrouping job {job_id}, leaving it to the scheduled resume: {e}")
+        return False
+
+def handler(event, context):
+    """
+    Entry point of RegroupResumeFunction, invoked for each new job and on a
+    schedule. Runs every unfinished job, oldest first, so jobs cut short by a
+    timeout or a failed invoke are picked up too.
+    """
+    finished = resume_regroup_jobs(DatabaseService(), should_stop=stop_before_timeout(context))
+    return {"finished": finished}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Resume unfinished enrollment regrouping jobs")
+    parser.parse_args(argv)
+
+    finished = resume_regroup_jobs(DatabaseService())
+    print(f"Finished {finished} regrouping jobs")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Fast path for JSON responses built straight from domain objects.
+
+Handlers that return a FastJSONResponse skip FastAPI's response_model
+validation and jsonable_encoder pass, so the bodies built here must match
+the pydantic response models field for field (see tests/test_responses.py).
+The route keeps its response_model for the OpenAPI schema.
+
+orjson is used when installed and is otherwise optional; the fallback renders
+the same compact JSON as Starlette's JSONResponse.
+
+Cacheable reads carry a strong ETag and Cache-Control; a matching
+If-None-Match is answered with 304 Not Modified.
+"""
+import hashlib
+import json
+import os
+from typing import Any, Iterable, Optional
+from starlette.responses import JSONResponse, Response
+from .domain import AgeGroup, Enrollment
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse for content that is already plain dicts and lists"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+def age_group_body(age_group: AgeGroup) -> dict:
+    """AgeGroupResponse as a dict"""
+    return {
+        "id": age_group.id,
+        "name": age_group.name,
+        "min_age": age_group.min_age,
+        "max_age": age_group.max_age,
+        "created_at": age_group.created_at,
+        "updated_at": age_group.updated_at
+    }
+
+def enrollment_body(enrollment: Enrollment) -> dict:
+    """EnrollmentResponse as a dict"""
+    return {
+        "cpf": enrollment.cpf,
+        "name": enrollment.name,
+        "age": enrollment.age,
+        "age_group": enrollment.age_group_name,
+        "created_at": enrollment.created_at
+    }
+
+def enrollments_ndjson(enrollments: Iterable[Enrollment]) -> bytes:
+    """One EnrollmentResponse JSON document per line"""
+    return b"".join(dumps(enrollment_body(e)) + b"\n" for e in enrollments)
+
+def etag(*parts: Any) -> str:
+    """Strong entity tag derived from the values that determine a representation"""
+    digest = hashlib.blake2b("|".join(map(str, parts)).encode(), digest_size=8).hexdigest()
+    return f'"{digest}"'
+
+def etag_matches(if_none_match: Optional[str], tag: str) -> bool:
+    """Whether an If-None-Match header matches `tag` (weak comparison, as RFC 7232 requires)"""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    if "*" in candidates:
+        return True
+    return any((candidate[2:] if candidate.startswith("W/") else candidate) == tag for candidate in candidates)
+
+def cache_headers(tag: str) -> dict:
+    """
+    Validators and freshness for an authenticated read. must-revalidate lets
+    shared caches (API Gateway, CDN) store it despite the Authorization header;
+    Vary keeps one user's cached copy from answering another's request.
+    """
+    max_age = int(os.getenv("CACHE_MAX_AGE", "30"))
+    return {
+        "ETag": tag,
+        "Cache-Control": f"max-age={max_age}, must-revalidate" if max_age > 0 else "no-cache",
+        "Vary": "Authorization"
+    }
+
+def not_modified(tag: str) -> Response:
+    return Response(status_code=304, headers=cache_headers(tag))
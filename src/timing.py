@@ -0,0 +1,138 @@
+"""
+Per-request latency spans, reported in a Server-Timing header and as a
+structured log line in CloudWatch Embedded Metric Format (EMF).
+
+Code marks stages with `with span("name"):`. Outside a request handled by
+ServerTimingMiddleware, or when the middleware is not installed, span()
+returns a shared no-op context manager, so disabled timing costs a single
+context variable lookup.
+"""
+import json
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+_spans: ContextVar[Optional[list]] = ContextVar("timing_spans", default=None)
+
+class _Span:
+    __slots__ = ("name", "spans", "start")
+
+    def __init__(self, name: str, spans: list):
+        self.name = name
+        self.spans = spans
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.spans.append((self.name, (time.perf_counter() - self.start) * 1000))
+        return False
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+def span(name: str):
+    """Time a block as a stage of the current request"""
+    spans = _spans.get()
+    if spans is None:
+        return _NULL_SPAN
+    return _Span(name, spans)
+
+def aggregate(spans: List[Tuple[str, float]]) -> Dict[str, Tuple[float, int]]:
+    """Total duration in milliseconds and count per span name, in first-seen order"""
+    totals: Dict[str, Tuple[float, int]] = {}
+    for name, duration in spans:
+        total, count = totals.get(name, (0.0, 0))
+        totals[name] = (total + duration, count + 1)
+    return totals
+
+def server_timing_header(spans: List[Tuple[str, float]], total_ms: float) -> str:
+    metrics = [
+        f'{name};dur={duration:.2f}' + (f';desc="x{count}"' if count > 1 else "")
+        for name, (duration, count) in aggregate(spans).items()
+    ]
+    metrics.append(f"total;dur={total_ms:.2f}")
+    return ", ".join(metrics)
+
+def emf_record(
+    namespace: str,
+    endpoint: str,
+    method: str,
+    status_code: int,
+    spans: List[Tuple[str, float]],
+    total_ms: float
+) -> dict:
+    """EMF log record with one millisecond metric per span name, by endpoint"""
+    durations = {name: round(duration, 3) for name, (duration, _) in aggregate(spans).items()}
+    durations["total"] = round(total_ms, 3)
+    return {
+        "_aws": {
+            "Timestamp": int(time.time() * 1000),
+            "CloudWatchMetrics": [{
+                "Namespace": namespace,
+                "Dimensions": [["Endpoint"]],
+                "Metrics": [{"Name": name, "Unit": "Milliseconds"} for name in durations]
+            }]
+        },
+        "Endpoint": endpoint,
+        "Method": method,
+        "StatusCode": status_code,
+        **durations
+    }
+
+class ServerTimingMiddleware:
+    """
+    ASGI middleware collecting the spans of each HTTP request. The response
+    carries them in Server-Timing; once the request finished, including its
+    background tasks, they are printed as one EMF line.
+    """
+
+    def __init__(self, app, namespace: str = "EnrollmentApi", emit_logs: bool = True):
+        self.app = app
+        self.namespace = namespace
+        self.emit_logs = emit_logs
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        spans: list = []
+        token = _spans.set(spans)
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                header = server_timing_header(spans, (time.perf_counter() - start) * 1000)
+                message = dict(message)
+                message["headers"] = list(message.get("headers", [])) + [(b"server-timing", header.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _spans.reset(token)
+            if self.emit_logs:
+                # The router stores the matched endpoint in the scope; paths would explode the dimension
+                endpoint = getattr(scope.get("endpoint"), "__name__", "unmatched")
+                record = emf_record(
+                    self.namespace,
+                    endpoint,
+                    scope["method"],
+                    status_code,
+                    spans,
+                    (time.perf_counter() - start) * 1000
+                )
+                print(json.dumps(record))
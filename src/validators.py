@@ -1,58 +1,126 @@
 import re
-from typing import List
+from typing import Iterable, List, Sequence, Tuple
 
-def validate_cpf(cpf: str) -> bool:
+# numpy is optional and slow to import, so it is only loaded by the first
+# validate_cpfs call; without it validate_cpfs falls back to pure Python
+_NOT_LOADED = object()
+np = _NOT_LOADED
+
+_NON_DIGIT = re.compile(r'\D')
+_NAME_PATTERN = re.compile(r'^[a-zA-ZÀ-ÿ\s]+$')
+
+# Weights of the first and second CPF verification digits
+CPF_FIRST_WEIGHTS = tuple(range(10, 1, -1))
+CPF_SECOND_WEIGHTS = tuple(range(11, 1, -1))
+
+def check_cpf(cpf: str) -> Tuple[str, bool]:
     """
-    Validate Brazilian CPF number
-    Returns True if CPF is valid, False otherwise
+    Clean and validate a Brazilian CPF number in a single pass
+    Returns tuple (cleaned_cpf, is_valid)
     """
-    # Remove non-numeric characters
-    cpf = re.sub(r'\D', '', cpf)
+    # Remove non-numeric characters (skipped for the common unformatted input)
+    if not (cpf.isascii() and cpf.isdigit()):
+        cpf = _NON_DIGIT.sub('', cpf)
     
-    # Check if has 11 digits
-    if len(cpf) != 11:
-        return False
+    # Check if has 11 digits and they are not all the same
+    if len(cpf) != 11 or cpf.count(cpf[0]) == 11:
+        return cpf, False
     
-    # Check if all digits are the same
-    if cpf == cpf[0] * 11:
-        return False
+    digits = cpf.encode() if cpf.isascii() else bytes(48 + int(c) for c in cpf)
     
-    # Calculate first verification digit
+    # Both verification digits in one loop: the second weighted sum equals
+    # the first plus the plain sum of the first nine digits plus 2 * digit 10
     sum1 = 0
+    plain_sum = 0
     for i in range(9):
-        sum1 += int(cpf[i]) * (10 - i)
+        value = digits[i] - 48
+        sum1 += value * (10 - i)
+        plain_sum += value
+    check1 = digits[9] - 48
+    sum2 = sum1 + plain_sum + 2 * check1
     
     remainder1 = sum1 % 11
-    digit1 = 0 if remainder1 < 2 else 11 - remainder1
-    
-    # Check first verification digit
-    if int(cpf[9]) != digit1:
-        return False
-    
-    # Calculate second verification digit
-    sum2 = 0
-    for i in range(10):
-        sum2 += int(cpf[i]) * (11 - i)
-    
     remainder2 = sum2 % 11
+    digit1 = 0 if remainder1 < 2 else 11 - remainder1
     digit2 = 0 if remainder2 < 2 else 11 - remainder2
     
-    # Check second verification digit
-    if int(cpf[10]) != digit2:
-        return False
-    
-    return True
+    return cpf, check1 == digit1 and digits[10] - 48 == digit2
+
+def validate_cpf(cpf: str) -> bool:
+    """
+    Validate Brazilian CPF number
+    Returns True if CPF is valid, False otherwise
+    """
+    return check_cpf(cpf)[1]
+
+def validate_cpfs(cpfs: Iterable[str], chunk_size: int = 1000000) -> Sequence[bool]:
+    """
+    Validate many CPF numbers at once
+    Returns a boolean mask (a numpy array when numpy is available)
+    """
+    if _load_numpy() is None:
+        return [validate_cpf(cpf) for cpf in cpfs]
+    
+    masks = []
+    chunk = []
+    for cpf in cpfs:
+        chunk.append(cpf)
+        if len(chunk) >= chunk_size:
+            masks.append(_validate_cpf_chunk(chunk))
+            chunk = []
+    if chunk or not masks:
+        masks.append(_validate_cpf_chunk(chunk))
+    return np.concatenate(masks)
+
+def _load_numpy():
+    global np
+    if np is _NOT_LOADED:
+        try:
+            import numpy
+            np = numpy
+        except ImportError:
+            np = None
+    return np
+
+def _validate_cpf_chunk(cpfs: List[str]):
+    mask = np.zeros(len(cpfs), dtype=bool)
+    cleaned = [clean_cpf(cpf) for cpf in cpfs]
+    positions = []
+    for position, cpf in enumerate(cleaned):
+        if len(cpf) != 11:
+            continue
+        if not cpf.isascii():
+            # Non-ASCII digits cannot be laid out as bytes, validate them one by one
+            mask[position] = validate_cpf(cpf)
+            continue
+        positions.append(position)
+    if not positions:
+        return mask
+    
+    raw = "".join(cleaned[position] for position in positions).encode("ascii")
+    digits = (np.frombuffer(raw, dtype=np.uint8).reshape(-1, 11) - ord("0")).astype(np.int32)
+    
+    remainder1 = digits[:, :9] @ np.array(CPF_FIRST_WEIGHTS, dtype=np.int32) % 11
+    digit1 = np.where(remainder1 < 2, 0, 11 - remainder1)
+    remainder2 = digits[:, :10] @ np.array(CPF_SECOND_WEIGHTS, dtype=np.int32) % 11
+    digit2 = np.where(remainder2 < 2, 0, 11 - remainder2)
+    
+    all_same = (digits == digits[:, :1]).all(axis=1)
+    mask[positions] = (digits[:, 9] == digit1) & (digits[:, 10] == digit2) & ~all_same
+    return mask
 
 def format_cpf(cpf: str) -> str:
     """Format CPF with dots and dash"""
-    cpf = re.sub(r'\D', '', cpf)
+    cpf = clean_cpf(cpf)
     if len(cpf) == 11:
         return f"{cpf[:3]}.{cpf[3:6]}.{cpf[6:9]}-{cpf[9:]}"
     return cpf
 
 def clean_cpf(cpf: str) -> str:
     """Remove formatting from CPF, keeping only numbers"""
-    return re.sub(r'\D', '', cpf)
+    if cpf.isascii() and cpf.isdigit():
+        return cpf
+    return _NON_DIGIT.sub('', cpf)
 
 def validate_name(name: str) -> bool:
     """
@@ -74,7 +142,7 @@ def validate_name(name: str) -> bool:
             return False
     
     # Check if contains only letters and spaces
-    if not re.match(r'^[a-zA-ZÀ-ÿ\s]+$', name):
+    if not _NAME_PATTERN.match(name):
         return False
     
     return True
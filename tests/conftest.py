@@ -1,3 +1,4 @@
+import asyncio
 import pytest
 import os
 import boto3
@@ -9,9 +10,16 @@ import tempfile
 # Set test environment variables
 os.environ["AGE_GROUPS_TABLE"] = "test-age-groups"
 os.environ["ENROLLMENTS_TABLE"] = "test-enrollments"
+os.environ["IDEMPOTENCY_TABLE"] = "test-idempotency"
 os.environ["ENV"] = "test"
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
 
-@pytest.fixture(scope="session")
+from src.main import app, db_service, event_publisher, idempotency_store, rate_limiter
+from src.cache import AgeGroupCache
+
+@pytest.fixture
 def mock_aws():
     """Mock AWS services for testing"""
     with mock_dynamodb():
@@ -41,7 +49,40 @@ def dynamodb_tables(mock_aws):
             {"AttributeName": "cpf", "KeyType": "HASH"}
         ],
         AttributeDefinitions=[
-            {"AttributeName": "cpf", "AttributeType": "S"}
+            {"AttributeName": "cpf", "AttributeType": "S"},
+            {"AttributeName": "age_group_id", "AttributeType": "S"},
+            {"AttributeName": "age", "AttributeType": "N"},
+            {"AttributeName": "created_at", "AttributeType": "S"}
+        ],
+        GlobalSecondaryIndexes=[
+            {
+                "IndexName": "age-group-index",
+                "KeySchema": [
+                    {"AttributeName": "age_group_id", "KeyType": "HASH"},
+                    {"AttributeName": "created_at", "KeyType": "RANGE"}
+                ],
+                "Projection": {"ProjectionType": "ALL"}
+            },
+            {
+                "IndexName": "age-index",
+                "KeySchema": [
+                    {"AttributeName": "age", "KeyType": "HASH"},
+                    {"AttributeName": "created_at", "KeyType": "RANGE"}
+                ],
+                "Projection": {"ProjectionType": "ALL"}
+            }
+        ],
+        BillingMode="PAY_PER_REQUEST"
+    )
+    
+    # Create idempotency keys table
+    dynamodb.create_table(
+        TableName="test-idempotency",
+        KeySchema=[
+            {"AttributeName": "key", "KeyType": "HASH"}
+        ],
+        AttributeDefinitions=[
+            {"AttributeName": "key", "AttributeType": "S"}
         ],
         BillingMode="PAY_PER_REQUEST"
     )
@@ -62,7 +103,7 @@ final_user2:password2"""
         temp_file_path = f.name
     
     # Patch the auth file path
-    with patch('src.auth.os.path.join', return_value=temp_file_path):
+    with patch('src.auth.credential_store.path', temp_file_path):
         yield temp_file_path
     
     # Cleanup
@@ -71,11 +112,17 @@ final_user2:password2"""
 @pytest.fixture
 def client(dynamodb_tables, test_auth_file):
     """Create test client with mocked dependencies"""
-    from src.main import app
+    # Async tests leave no current event loop behind, and TestClient needs one
+    asyncio.set_event_loop(asyncio.new_event_loop())
+    
+    # Tables are recreated per test, so start from an empty age group cache
+    db_service.age_group_cache = AgeGroupCache()
+    idempotency_store.clear()
+    rate_limiter.clear()
     
     # Mock SQS client
-    with patch('src.main.sqs') as mock_sqs:
-        mock_sqs.send_message.return_value = {"MessageId": "test-message-id"}
+    with patch.object(event_publisher, "sqs") as mock_sqs:
+        mock_sqs.send_message_batch.return_value = {"Successful": [], "Failed": []}
         
         with TestClient(app) as test_client:
             yield test_client
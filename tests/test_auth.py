@@ -1,5 +1,8 @@
+import os
 import pytest
+from unittest.mock import patch
 from fastapi import status
+from src.auth import CredentialStore, check_password, dummy_password_hash, hash_password
 
 
 class TestAuthentication:
@@ -60,4 +63,69 @@ class TestAuthentication:
         """Test that final user cannot access config endpoints"""
         response = client.post("/config/age-groups", json={"name": "Test", "min_age": 0, "max_age": 10}, auth=final_auth)
         assert response.status_code == status.HTTP_403_FORBIDDEN
-        assert "Configuration privileges required" in response.json()["detail"]
\ No newline at end of file
+        assert "Configuration privileges required" in response.json()["detail"]
+
+
+class TestCredentialStore:
+    """Test cached credential store and password hashing"""
+
+    def test_hashed_passwords(self):
+        """Test scrypt and pbkdf2 entries verify the original password only"""
+        for scheme in ("scrypt", "pbkdf2_sha256"):
+            stored = hash_password("secret", scheme=scheme)
+            assert stored.startswith(scheme + "$")
+            assert check_password("secret", stored)
+            assert not check_password("wrong", stored)
+
+    def test_plaintext_passwords(self):
+        """Test plaintext entries still work"""
+        assert check_password("admin123", "admin123")
+        assert not check_password("admin1234", "admin123")
+
+    def test_reload_on_file_change(self, test_auth_file):
+        """Test the file is parsed once and reloaded when its mtime changes"""
+        store = CredentialStore(path=test_auth_file)
+        assert store.verify("config_admin", "admin123")
+        users = store.users()
+        assert store.users() is users
+        
+        with open(test_auth_file, "a") as f:
+            f.write("\nfinal_new:" + hash_password("newpass", scheme="pbkdf2_sha256"))
+        stat = os.stat(test_auth_file)
+        os.utime(test_auth_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000))
+        
+        assert store.users() is not users
+        assert store.verify("final_new", "newpass")
+
+    def test_memoizes_successful_verifications(self, test_auth_file):
+        """Test repeated logins skip the password check"""
+        store = CredentialStore(path=test_auth_file)
+        
+        assert store.verify("final_user1", "password1")
+        store._users["final_user1"] = "changed-in-memory"
+        assert store.verify("final_user1", "password1")
+        assert not store.verify("final_user1", "wrong")
+        assert not store.verify("unknown", "password1")
+
+    def test_unknown_user_checks_a_hash(self, test_auth_file):
+        """Test unknown users go through a scrypt check like known ones"""
+        store = CredentialStore(path=test_auth_file)
+
+        with patch("src.auth.check_password", wraps=check_password) as checked:
+            assert not store.verify("unknown", "password1")
+
+        checked.assert_called_once_with("password1", dummy_password_hash())
+        assert dummy_password_hash().startswith("scrypt$")
+
+    def test_hashed_user_login(self, client, test_auth_file):
+        """Test API login with a hashed auth file entry"""
+        with open(test_auth_file, "a") as f:
+            f.write("\nconfig_hashed:" + hash_password("s3cret"))
+        stat = os.stat(test_auth_file)
+        os.utime(test_auth_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000))
+        
+        response = client.get("/config/age-groups", auth=("config_hashed", "s3cret"))
+        assert response.status_code == status.HTTP_200_OK
+        
+        response = client.get("/config/age-groups", auth=("config_hashed", "wrong"))
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
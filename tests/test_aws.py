@@ -0,0 +1,143 @@
+import os
+import subprocess
+import sys
+from decimal import Decimal
+from src import aws
+from src.codec import decode_age_group, decode_enrollment, encode_age_group, encode_enrollment, from_item, to_item
+from src.domain import AgeGroup, Enrollment
+
+
+class TestCodec:
+    """Test DynamoDB AttributeValue conversion"""
+
+    def test_round_trip(self):
+        """Test supported values survive serialization"""
+        item = {
+            "cpf": "11144477735",
+            "age": 30,
+            "ratio": Decimal("0.5"),
+            "active": True,
+            "updated_at": None,
+            "steps": ["age:1", "age:2"],
+            "meta": {"count": 2}
+        }
+        
+        assert from_item(to_item(item)) == item
+
+    def test_wire_format(self):
+        """Test numbers are sent as strings and integral numbers decode to int"""
+        assert to_item({"age": 30, "name": "Ana"}) == {"age": {"N": "30"}, "name": {"S": "Ana"}}
+        assert from_item({"age": {"N": "30"}})["age"] == 30
+        assert isinstance(from_item({"age": {"N": "30"}})["age"], int)
+
+    def test_domain_codecs_match_generic(self):
+        """Test the domain codecs write the same items as to_item and read them back"""
+        age_group = AgeGroup(name="Adults", min_age=18, max_age=65)
+        enrollment = Enrollment(
+            name="João Silva Santos", age=30, cpf="11144477735", age_group_id=age_group.id, age_group_name="Adults"
+        )
+        
+        assert encode_age_group(age_group) == to_item(age_group.to_dict())
+        assert encode_enrollment(enrollment) == to_item(enrollment.to_dict())
+        assert decode_age_group(encode_age_group(age_group)) == age_group
+        assert decode_enrollment(encode_enrollment(enrollment)) == enrollment
+
+    def test_decode_age_group_without_updated_at(self):
+        """Test items missing updated_at decode to None"""
+        item = to_item({"id": "g", "name": "Adults", "min_age": 18, "max_age": 65, "created_at": "2024-01-01"})
+        
+        assert decode_age_group(item).updated_at is None
+
+    def test_domain_objects_are_slotted(self):
+        """Test decoded objects carry no per-instance __dict__"""
+        age_group = AgeGroup(name="Adults", min_age=18, max_age=65)
+        
+        assert not hasattr(age_group, "__dict__")
+        assert not hasattr(decode_age_group(encode_age_group(age_group)), "__dict__")
+
+
+class TestLazyClients:
+    """Test AWS clients are shared and built on first use"""
+
+    def test_client_is_shared(self):
+        """Test the same client is returned for a service"""
+        aws.reset()
+        
+        assert aws.client("dynamodb") is aws.client("dynamodb")
+        assert aws.client("sqs") is not aws.client("dynamodb")
+
+    def test_import_does_not_load_boto3(self):
+        """Test importing the app builds no clients and skips boto3 and numpy"""
+        code = "import sys, src.main; print(sorted(m for m in ('boto3', 'numpy') if m in sys.modules))"
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        result = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True, check=True)
+        
+        assert result.stdout.strip() == "[]"
+
+
+class FakeRaw:
+    def __init__(self, body: bytes):
+        self.body = body
+
+    def stream(self, **kwargs):
+        yield self.body
+
+
+class TestClientConfig:
+    """Test every client shares the Config built from Settings"""
+
+    def test_settings_build_config(self, monkeypatch):
+        """Test pool, retry, timeout and keepalive settings are read from env vars"""
+        from src.config import Settings
+        monkeypatch.setenv("AWS_MAX_POOL_CONNECTIONS", "64")
+        monkeypatch.setenv("AWS_READ_TIMEOUT", "3")
+        
+        config = Settings(env="test").botocore_config()
+        
+        assert config.max_pool_connections == 64
+        assert config.read_timeout == 3
+        assert config.connect_timeout == 2
+        assert config.retries == {"mode": "adaptive", "max_attempts": 5}
+        assert config.tcp_keepalive is True
+
+    def test_clients_share_config(self):
+        """Test clients are built with the shared Config"""
+        aws.reset()
+        
+        for service_name in ("dynamodb", "sqs"):
+            config = aws.client(service_name).meta.config
+            assert config.max_pool_connections == 50
+            assert config.retries["mode"] == "adaptive"
+
+    def test_metrics_count_requests_and_retries(self, dynamodb_tables):
+        """Test request and retry counters follow the client's calls"""
+        from botocore.awsrequest import AWSResponse
+        from src.main import db_service
+        aws.reset()
+        failures = [1]
+
+        def fail_once(request, **kwargs):
+            if failures:
+                failures.pop()
+                body = b'{"__type": "com.amazonaws.dynamodb.v20120810#InternalServerError", "message": "boom"}'
+                return AWSResponse(request.url, 500, {}, FakeRaw(body))
+
+        aws.client("dynamodb").meta.events.register_first("before-send.dynamodb.GetItem", fail_once)
+        db_service.get_config_version()
+        db_service.get_config_version()
+        
+        stats = aws.client_metrics()["dynamodb"]
+        assert stats["requests"] == 2
+        assert stats["retries"] == 1
+        assert stats["in_flight"] == 0
+        assert stats["peak_pool_utilization"] == 0.02
+
+    def test_aws_stats_endpoint(self, client, config_auth, final_auth):
+        """Test client metrics are exposed to config users"""
+        client.get("/config/age-groups", auth=config_auth)
+        
+        response = client.get("/config/aws-stats", auth=config_auth)
+        assert response.status_code == 200
+        assert response.json()["dynamodb"]["requests"] >= 1
+        
+        assert client.get("/config/aws-stats", auth=final_auth).status_code == 403
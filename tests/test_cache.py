@@ -0,0 +1,110 @@
+from fastapi import status
+from src.cache import AgeGroupCache
+from src.domain import AgeGroup
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestAgeGroupCache:
+    """Test TTL and version validated age group cache"""
+
+    def setup_method(self):
+        self.clock = FakeClock()
+        self.version = 1
+        self.loads = 0
+        self.cache = AgeGroupCache(ttl_seconds=10, clock=self.clock)
+
+    def load_version(self):
+        return self.version
+
+    def load_age_groups(self):
+        self.loads += 1
+        return [AgeGroup(name="Adults", min_age=18, max_age=65)]
+
+    def get(self):
+        return self.cache.get(self.load_version, self.load_age_groups)
+
+    def test_hit_within_ttl(self):
+        """Test repeated lookups within the TTL do not reload"""
+        self.get()
+        self.get()
+        
+        assert self.loads == 1
+        assert self.cache.stats()["misses"] == 1
+        assert self.cache.stats()["hits"] == 1
+
+    def test_revalidate_unchanged_version(self):
+        """Test expired entries are kept when the version did not change"""
+        self.get()
+        self.clock.now = 11
+        self.get()
+        
+        assert self.loads == 1
+        assert self.cache.stats()["revalidations"] == 1
+
+    def test_reload_on_version_change(self):
+        """Test expired entries are reloaded when the version changed"""
+        self.get()
+        self.version = 2
+        self.clock.now = 11
+        self.get()
+        
+        assert self.loads == 2
+        assert self.cache.version == 2
+
+    def test_invalidate(self):
+        """Test invalidate forces a reload"""
+        self.get()
+        self.cache.invalidate()
+        self.get()
+        
+        assert self.loads == 2
+
+
+    def test_refill_racing_invalidate_is_not_stored(self):
+        """Test groups loaded before a concurrent write are not cached after its invalidate()"""
+        def load_during_write():
+            groups = self.load_age_groups()
+            self.version = 2
+            self.cache.invalidate()
+            return groups
+        
+        self.cache.get(self.load_version, load_during_write)
+        
+        assert self.cache.peek() is None
+        assert self.get() is not None
+        assert self.cache.version == 2
+        assert self.loads == 2
+
+class TestAgeGroupCacheEndpoints:
+    """Test age group cache through the API"""
+
+    def test_cache_stats_endpoint(self, client, config_auth, final_auth):
+        """Test cache counters are exposed to config users"""
+        client.get("/config/age-groups", auth=config_auth)
+        client.get("/config/age-groups", auth=config_auth)
+        
+        response = client.get("/config/cache-stats", auth=config_auth)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["misses"] == 1
+        assert response.json()["hits"] == 1
+        
+        response = client.get("/config/cache-stats", auth=final_auth)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_config_write_bumps_version(self, client, config_auth, sample_age_group):
+        """Test age group writes bump the config version"""
+        from src.main import db_service
+        
+        assert db_service.get_config_version() == 0
+        client.post("/config/age-groups", json=sample_age_group, auth=config_auth)
+        assert db_service.get_config_version() == 1
+        
+        response = client.get("/config/age-groups", auth=config_auth)
+        assert len(response.json()) == 1
@@ -1,5 +1,6 @@
 import pytest
 from fastapi import status
+from unittest.mock import patch
 
 
 class TestAgeGroupsEndpoints:
@@ -157,4 +158,172 @@ class TestAgeGroupsEndpoints:
         # Age over 120
         invalid_group2 = {"name": "Invalid", "min_age": 0, "max_age": 130}
         response2 = client.post("/config/age-groups", json=invalid_group2, auth=config_auth)
-        assert response2.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
\ No newline at end of file
+        assert response2.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+class TestEnrollmentStatsEndpoints:
+    """Test enrollment counters per age group"""
+
+    def test_stats_follow_enrollments(self, client, config_auth, final_auth):
+        """Test counters are updated by enroll, batch enroll and delete"""
+        from src.main import db_service
+        
+        adults = client.post("/config/age-groups", json={"name": "Adults", "min_age": 18, "max_age": 65}, auth=config_auth).json()
+        children = client.post("/config/age-groups", json={"name": "Children", "min_age": 0, "max_age": 12}, auth=config_auth).json()
+        
+        client.post("/enroll", json={"name": "João Silva Santos", "age": 25, "cpf": "11144477735"}, auth=final_auth)
+        client.post("/enroll/batch", json={"enrollments": [
+            {"name": "Maria Silva Santos", "age": 30, "cpf": "12345678909"},
+            {"name": "Ana Silva Santos", "age": 8, "cpf": "98765432100"}
+        ]}, auth=final_auth)
+        
+        response = client.get(f"/config/age-groups/{adults['id']}/stats", auth=config_auth)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {"age_group_id": adults["id"], "name": "Adults", "enrollments": 2}
+        
+        # Duplicates are not counted
+        client.post("/enroll", json={"name": "João Silva Santos", "age": 25, "cpf": "11144477735"}, auth=final_auth)
+        assert db_service.delete_enrollment("12345678909")
+        
+        summary = client.get("/config/enrollment-stats", auth=config_auth).json()
+        assert summary["total"] == 2
+        assert summary["age_groups"] == [
+            {"age_group_id": children["id"], "name": "Children", "enrollments": 1},
+            {"age_group_id": adults["id"], "name": "Adults", "enrollments": 1}
+        ]
+
+    def test_stats_nonexistent_age_group(self, client, config_auth):
+        """Test stats of an unknown age group return 404"""
+        response = client.get("/config/age-groups/nonexistent-id/stats", auth=config_auth)
+        
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_rebuild_stats(self, client, config_auth, final_auth, dynamodb_tables):
+        """Test counters can be rebuilt from the enrollments table"""
+        from src.main import db_service
+        age_groups_table, _ = dynamodb_tables
+        
+        adults = client.post("/config/age-groups", json={"name": "Adults", "min_age": 18, "max_age": 65}, auth=config_auth).json()
+        client.post("/enroll", json={"name": "João Silva Santos", "age": 25, "cpf": "11144477735"}, auth=final_auth)
+        age_groups_table.delete_item(Key={"id": "__enrollment_stats__"})
+        
+        assert db_service.rebuild_enrollment_stats() == {"total": 1, "by_group": {adults["id"]: 1}}
+
+class TestAgeGroupEnrollmentsEndpoint:
+    """Test listing enrollments through the age group index"""
+
+    def test_list_age_group_enrollments(self, client, config_auth, final_auth):
+        """Test only the group's enrollments are returned, page by page"""
+        adults = client.post("/config/age-groups", json={"name": "Adults", "min_age": 18, "max_age": 65}, auth=config_auth).json()
+        client.post("/config/age-groups", json={"name": "Children", "min_age": 0, "max_age": 12}, auth=config_auth)
+        
+        client.post("/enroll/batch", json={"enrollments": [
+            {"name": "João Silva Santos", "age": 25, "cpf": "11144477735"},
+            {"name": "Maria Silva Santos", "age": 30, "cpf": "12345678909"},
+            {"name": "Ana Silva Santos", "age": 8, "cpf": "98765432100"}
+        ]}, auth=final_auth)
+        
+        response1 = client.get(f"/config/age-groups/{adults['id']}/enrollments?limit=1", auth=config_auth)
+        assert response1.status_code == status.HTTP_200_OK
+        assert len(response1.json()) == 1
+        cursor = response1.headers["X-Next-Cursor"]
+        
+        response2 = client.get(f"/config/age-groups/{adults['id']}/enrollments?limit=1&cursor={cursor}", auth=config_auth)
+        assert response2.status_code == status.HTTP_200_OK
+        
+        cpfs = {e["cpf"] for e in response1.json() + response2.json()}
+        assert cpfs == {"11144477735", "12345678909"}
+        
+        response3 = client.get(f"/config/age-groups/{adults['id']}/enrollments", auth=config_auth)
+        assert {e["cpf"] for e in response3.json()} == cpfs
+        assert "X-Next-Cursor" not in response3.headers
+
+    def test_list_age_group_enrollments_invalid_cursor(self, client, config_auth):
+        """Test a malformed cursor returns 400"""
+        adults = client.post("/config/age-groups", json={"name": "Adults", "min_age": 18, "max_age": 65}, auth=config_auth).json()
+        response = client.get(f"/config/age-groups/{adults['id']}/enrollments?cursor=not-a-cursor", auth=config_auth)
+        
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_list_enrollments_of_unknown_age_group(self, client, config_auth):
+        """Test an unknown age group returns 404, like its stats"""
+        response = client.get("/config/age-groups/nonexistent-id/enrollments", auth=config_auth)
+        
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert response.json()["detail"] == "Age group not found"
+
+    def test_list_unassigned_enrollments(self, client, config_auth):
+        """Test the reserved unassigned group can be listed"""
+        response = client.get("/config/age-groups/__unassigned__/enrollments", auth=config_auth)
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == []
+
+    def test_cursor_scoped_to_age_group(self, client, config_auth, final_auth):
+        """Test a cursor from one age group's listing is rejected by another's"""
+        adults = client.post("/config/age-groups", json={"name": "Adults", "min_age": 18, "max_age": 65}, auth=config_auth).json()
+        children = client.post("/config/age-groups", json={"name": "Children", "min_age": 0, "max_age": 12}, auth=config_auth).json()
+        client.post("/enroll/batch", json={"enrollments": [
+            {"name": "João Silva Santos", "age": 25, "cpf": "11144477735"},
+            {"name": "Maria Silva Santos", "age": 30, "cpf": "12345678909"}
+        ]}, auth=final_auth)
+        cursor = client.get(f"/config/age-groups/{adults['id']}/enrollments?limit=1", auth=config_auth).headers["X-Next-Cursor"]
+        
+        response = client.get(f"/config/age-groups/{children['id']}/enrollments?cursor={cursor}", auth=config_auth)
+        
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_list_age_group_enrollments_requires_config_user(self, client, final_auth):
+        """Test final users cannot list enrollments by age group"""
+        response = client.get("/config/age-groups/any-id/enrollments", auth=final_auth)
+        
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+class TestAgeGroupConditionalGet:
+    """Test ETag revalidation of age group reads"""
+
+    def test_list_not_modified_until_config_changes(self, client, config_auth, sample_age_group):
+        """Test the list ETag follows the config version"""
+        client.post("/config/age-groups", json=sample_age_group, auth=config_auth)
+        
+        response = client.get("/config/age-groups", auth=config_auth)
+        tag = response.headers["ETag"]
+        assert "must-revalidate" in response.headers["Cache-Control"]
+        assert response.headers["Vary"] == "Authorization"
+        
+        response = client.get("/config/age-groups", headers={"If-None-Match": tag}, auth=config_auth)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response.content == b""
+        assert response.headers["ETag"] == tag
+        
+        client.post("/config/age-groups", json={"name": "Children", "min_age": 0, "max_age": 12}, auth=config_auth)
+        response = client.get("/config/age-groups", headers={"If-None-Match": tag}, auth=config_auth)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["ETag"] != tag
+        assert len(response.json()) == 2
+
+    def test_cached_list_revalidates_without_dynamodb(self, client, config_auth, sample_age_group):
+        """Test a fresh cache answers If-None-Match without calling DynamoDB"""
+        from src.main import db_service
+        
+        client.post("/config/age-groups", json=sample_age_group, auth=config_auth)
+        tag = client.get("/config/age-groups", auth=config_auth).headers["ETag"]
+        
+        with patch.object(db_service, "get_config_version") as get_config_version:
+            response = client.get("/config/age-groups", headers={"If-None-Match": tag}, auth=config_auth)
+        
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        get_config_version.assert_not_called()
+
+    def test_get_not_modified_until_updated(self, client, config_auth, sample_age_group):
+        """Test a single group's ETag changes when it is updated"""
+        age_group_id = client.post("/config/age-groups", json=sample_age_group, auth=config_auth).json()["id"]
+        tag = client.get(f"/config/age-groups/{age_group_id}", auth=config_auth).headers["ETag"]
+        
+        response = client.get(f"/config/age-groups/{age_group_id}", headers={"If-None-Match": tag}, auth=config_auth)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        
+        client.put(f"/config/age-groups/{age_group_id}", json={"name": "Grown-ups"}, auth=config_auth)
+        response = client.get(f"/config/age-groups/{age_group_id}", headers={"If-None-Match": tag}, auth=config_auth)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["name"] == "Grown-ups"
@@ -0,0 +1,198 @@
+import asyncio
+import time
+import pytest
+from unittest.mock import PropertyMock, patch
+from botocore.exceptions import ClientError
+from src.database import TRANSACTION_CHUNK_SIZE, AsyncDatabaseService, ConcurrentChangeError, DatabaseService
+from src.domain import AgeGroup, Enrollment
+
+
+class SlowDatabaseService:
+    """Stand-in for DatabaseService whose calls block like a network round trip"""
+
+    def get_enrollment(self, cpf):
+        time.sleep(0.05)
+        return cpf
+
+
+class TestAsyncDatabaseService:
+    """Test async database facade"""
+
+    async def test_calls_do_not_block_event_loop(self):
+        """Test concurrent awaits overlap instead of running one at a time"""
+        async_db = AsyncDatabaseService(SlowDatabaseService(), max_workers=10)
+        
+        start = time.perf_counter()
+        results = await asyncio.gather(*(async_db.get_enrollment(str(i)) for i in range(10)))
+        elapsed = time.perf_counter() - start
+        
+        assert results == [str(i) for i in range(10)]
+        assert elapsed < 0.3
+
+    async def test_iter_enrollment_pages(self, dynamodb_tables):
+        """Test async page iteration follows the cursor"""
+        _, enrollments_table = dynamodb_tables
+        for i in range(5):
+            enrollments_table.put_item(Item={
+                "cpf": f"{i:011d}",
+                "name": "Test Person Name",
+                "age": 30,
+                "age_group_id": "group",
+                "age_group_name": "Adults",
+                "created_at": "2024-01-01T00:00:00"
+            })
+        async_db = AsyncDatabaseService()
+        
+        pages = [page async for page in async_db.iter_enrollment_pages(page_size=2)]
+        
+        assert sum(len(page) for page in pages) == 5
+        assert len(pages) >= 3
+
+
+class TestAgeGroupWrites:
+    """Test age group writes are validated against a consistent config version"""
+
+    def test_stale_writer_cannot_create_overlap(self, dynamodb_tables):
+        """Test a writer whose cached groups are stale rechecks before writing"""
+        first = DatabaseService()
+        second = DatabaseService()
+        second.get_age_group_index()
+        
+        first.create_age_group(AgeGroup(name="Adults", min_age=18, max_age=65))
+        
+        with pytest.raises(ValueError, match="overlaps with existing group: Adults"):
+            second.create_age_group(AgeGroup(name="Young Adults", min_age=18, max_age=30))
+        assert len(first.list_age_groups(use_cache=False)) == 1
+        assert second.get_config_version() == 1
+
+    def test_update_ignores_own_range(self, dynamodb_tables):
+        """Test a group may be updated within its own range but not into a neighbour"""
+        db = DatabaseService()
+        adults = db.create_age_group(AgeGroup(name="Adults", min_age=18, max_age=65))
+        db.create_age_group(AgeGroup(name="Seniors", min_age=66, max_age=120))
+        
+        adults.update(min_age=20)
+        db.update_age_group(adults)
+        
+        adults.update(max_age=70)
+        with pytest.raises(ValueError, match="Seniors"):
+            db.update_age_group(adults)
+        assert db.get_age_group(adults.id).max_age == 65
+        assert db.get_config_version() == 3
+
+    def test_lost_version_race_backs_off_then_gives_up(self, dynamodb_tables):
+        """Test every lost config version race waits before retrying and the last one raises"""
+        db = DatabaseService()
+        client, attempts = conflicting_client(db.client, conflicts=10)
+
+        with patch.object(DatabaseService, "client", new_callable=PropertyMock, return_value=client), \
+                patch("src.database.time.sleep") as sleep:
+            with pytest.raises(ConcurrentChangeError):
+                db.create_age_group(AgeGroup(name="Adults", min_age=18, max_age=65), max_attempts=3)
+
+        assert len(attempts) == 3
+        assert sleep.call_count == 2
+        assert db.list_age_groups(use_cache=False) == []
+
+
+def conflicting_client(client, conflicts: int):
+    """Client whose first `conflicts` transactions are cancelled by a TransactionConflict"""
+    attempts = []
+
+    def transact_write_items(**kwargs):
+        attempts.append(kwargs)
+        if len(attempts) <= conflicts:
+            raise ClientError({
+                "Error": {"Code": "TransactionCanceledException", "Message": "cancelled"},
+                "CancellationReasons": [{"Code": "None"}, {"Code": "TransactionConflict"}]
+            }, "TransactWriteItems")
+        return client.transact_write_items(**kwargs)
+
+    stub = type("ConflictingClient", (), {
+        "transact_write_items": staticmethod(transact_write_items),
+        "__getattr__": lambda self, name: getattr(client, name)
+    })()
+    return stub, attempts
+
+
+class TestEnrollmentWrites:
+    """Test enrollment writes and their counters"""
+
+    def enrollment(self, cpf: str) -> Enrollment:
+        return Enrollment(name="Test Person Name", age=30, cpf=cpf, age_group_id="group", age_group_name="Adults")
+
+    def test_conflict_on_counters_is_retried(self, dynamodb_tables):
+        """Test concurrent writers on the counters retry instead of failing"""
+        db = DatabaseService()
+        client, attempts = conflicting_client(db.client, conflicts=2)
+
+        with patch.object(DatabaseService, "client", new_callable=PropertyMock, return_value=client):
+            db.create_enrollment(self.enrollment("00000000001"))
+
+        assert len(attempts) == 3
+        assert db.get_enrollment_stats()["total"] == 1
+
+        client, attempts = conflicting_client(db.client, conflicts=1)
+        with patch.object(DatabaseService, "client", new_callable=PropertyMock, return_value=client):
+            assert db.delete_enrollment("00000000001")
+
+        assert len(attempts) == 2
+        assert db.get_enrollment_stats()["total"] == 0
+
+    def test_conflicts_give_up_after_max_attempts(self, dynamodb_tables):
+        """Test the cancellation is raised once the attempts run out"""
+        db = DatabaseService()
+        client, attempts = conflicting_client(db.client, conflicts=10)
+
+        with patch.object(DatabaseService, "client", new_callable=PropertyMock, return_value=client):
+            with pytest.raises(ClientError):
+                db.create_enrollment(self.enrollment("00000000001"), max_attempts=2)
+
+        assert len(attempts) == 2
+        assert db.get_enrollment("00000000001") is None
+
+    def test_batches_and_regroups_share_the_chunk_size(self, dynamodb_tables):
+        """Test both write TRANSACTION_CHUNK_SIZE enrollments plus one counters update per transaction"""
+        db = DatabaseService()
+        enrollments = [self.enrollment(f"{i:011d}") for i in range(TRANSACTION_CHUNK_SIZE + 5)]
+        sizes = []
+        record_call = lambda params, **kwargs: sizes.append(len(params["TransactItems"]))
+        events = db.client.meta.events
+        events.register("before-parameter-build.dynamodb.TransactWriteItems", record_call)
+
+        try:
+            assert db.create_enrollments(enrollments) == {}
+            created = sizes[:]
+            sizes.clear()
+            seniors = AgeGroup(name="Seniors", min_age=66, max_age=120)
+            assert db.regroup_enrollments([(enrollment, seniors) for enrollment in enrollments]) == len(enrollments)
+        finally:
+            events.unregister("before-parameter-build.dynamodb.TransactWriteItems", record_call)
+
+        assert created == sizes == [TRANSACTION_CHUNK_SIZE + 1, 6]
+
+    def test_processor_rows_are_not_counted(self, dynamodb_tables):
+        """Test rows without age group are deleted without touching the counters and left out of a rebuild"""
+        _, enrollments_table = dynamodb_tables
+        db = DatabaseService()
+        db.create_enrollment(self.enrollment("00000000001"))
+        for cpf in ("00000000002", "00000000003"):
+            enrollments_table.put_item(Item={"cpf": cpf, "name": "Legacy Person Name", "age": 30, "created_at": "2024-01-01T00:00:00"})
+
+        assert db.delete_enrollment("00000000002")
+
+        assert db.get_enrollment_stats() == {"total": 1, "by_group": {"group": 1}}
+        assert db.rebuild_enrollment_stats() == {"total": 1, "by_group": {"group": 1}}
+
+    def test_counters_are_summed_across_shards(self, dynamodb_tables):
+        """Test writes spread over the counter shards and reads add them up"""
+        age_groups_table, _ = dynamodb_tables
+        db = DatabaseService()
+        for i in range(20):
+            db.create_enrollment(self.enrollment(f"{i:011d}"))
+        db.delete_enrollment(f"{0:011d}")
+
+        shards = [item for item in age_groups_table.scan()["Items"] if item["id"].startswith("__enrollment_stats__")]
+        assert len(shards) > 1
+        assert db.get_enrollment_stats() == {"total": 19, "by_group": {"group": 19}}
+        assert db.list_age_groups(use_cache=False) == []
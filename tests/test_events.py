@@ -0,0 +1,169 @@
+import json
+import os
+import time
+import pytest
+from fastapi import status
+from unittest.mock import MagicMock, patch
+from src.events import EnrollmentEventPublisher
+
+
+@pytest.fixture
+def spill_path(tmp_path):
+    return str(tmp_path / "events.ndjson")
+
+
+@pytest.fixture
+def sqs():
+    client = MagicMock()
+    client.send_message_batch.return_value = {"Successful": [], "Failed": []}
+    return client
+
+
+class TestEnrollmentEventPublisher:
+    """Test batched SQS publishing of enrollment events"""
+
+    def test_publish_only_buffers(self, sqs, spill_path):
+        """Test publishing never calls SQS, even past a full batch"""
+        publisher = EnrollmentEventPublisher(sqs, "queue-url", spill_path=spill_path)
+        
+        for i in range(25):
+            publisher.publish(json.dumps({"i": i}))
+        
+        sqs.send_message_batch.assert_not_called()
+        assert publisher.pending() == 25
+
+    def test_flush_in_batches(self, sqs, spill_path):
+        """Test a flush sends the buffer in SendMessageBatch calls of up to 10 entries"""
+        publisher = EnrollmentEventPublisher(sqs, "queue-url", spill_path=spill_path)
+        for i in range(25):
+            publisher.publish(json.dumps({"i": i}))
+        
+        assert publisher.flush() == 25
+        
+        sizes = [len(call.kwargs["Entries"]) for call in sqs.send_message_batch.call_args_list]
+        assert sizes == [10, 10, 5]
+        assert publisher.pending() == 0
+
+    def test_retry_failed_entries(self, sqs, spill_path):
+        """Test only failed entries are retried"""
+        publisher = EnrollmentEventPublisher(sqs, "queue-url", spill_path=spill_path)
+        first_id = publisher.publish("first")
+        publisher.publish("second")
+        sqs.send_message_batch.side_effect = [
+            {"Failed": [{"Id": first_id, "SenderFault": False, "Code": "InternalError"}]},
+            {"Failed": []}
+        ]
+        
+        with patch("src.events.time.sleep"):
+            assert publisher.flush() == 2
+        
+        retried = sqs.send_message_batch.call_args.kwargs["Entries"]
+        assert [entry["Id"] for entry in retried] == [first_id]
+
+    def test_spill_when_unavailable(self, sqs, spill_path):
+        """Test events are spilled to disk and re-sent on the next flush"""
+        publisher = EnrollmentEventPublisher(sqs, "queue-url", spill_path=spill_path)
+        publisher.publish("event")
+        sqs.send_message_batch.side_effect = Exception("SQS unavailable")
+        
+        with patch("src.events.time.sleep"):
+            assert publisher.flush() == 0
+        with open(spill_path) as f:
+            assert json.loads(f.readline())["MessageBody"] == "event"
+        
+        sqs.send_message_batch.side_effect = None
+        assert publisher.flush() == 1
+        assert sqs.send_message_batch.call_args.kwargs["Entries"][0]["MessageBody"] == "event"
+
+    def test_spill_survives_interrupted_flush(self, sqs, spill_path):
+        """Test spilled events stay on disk until the resend is over"""
+        publisher = EnrollmentEventPublisher(sqs, "queue-url", spill_path=spill_path)
+        publisher.publish("event")
+        sqs.send_message_batch.side_effect = Exception("SQS unavailable")
+        with patch("src.events.time.sleep"):
+            publisher.flush()
+        
+        sqs.send_message_batch.side_effect = KeyboardInterrupt
+        with pytest.raises(KeyboardInterrupt):
+            publisher.flush()
+        
+        with open(spill_path) as f:
+            assert [json.loads(line)["MessageBody"] for line in f] == ["event"]
+        sqs.send_message_batch.side_effect = None
+        assert publisher.flush() == 1
+        assert not os.path.exists(spill_path)
+
+
+def wait_for_sends(sqs, count: int, timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while sqs.send_message_batch.call_count < count and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return [len(call.kwargs["Entries"]) for call in sqs.send_message_batch.call_args_list]
+
+
+class TestEventFlusher:
+    """Test the flusher thread sends by size or by time"""
+
+    def test_full_batch_is_sent_without_waiting(self, sqs, spill_path):
+        """Test a full batch goes out right away and a partial one waits"""
+        publisher = EnrollmentEventPublisher(sqs, "queue-url", spill_path=spill_path, max_wait=60)
+        publisher.start()
+        try:
+            for i in range(11):
+                publisher.publish(json.dumps({"i": i}))
+
+            assert wait_for_sends(sqs, 1) == [10]
+            time.sleep(0.05)
+            assert publisher.pending() == 1
+        finally:
+            publisher.stop()
+
+        assert wait_for_sends(sqs, 2) == [10, 1]
+
+    def test_partial_batch_is_sent_after_max_wait(self, sqs, spill_path):
+        """Test events below a full batch are sent together once the oldest has waited max_wait"""
+        publisher = EnrollmentEventPublisher(sqs, "queue-url", spill_path=spill_path, max_wait=0.05)
+        publisher.start()
+        try:
+            for i in range(3):
+                publisher.publish(json.dumps({"i": i}))
+
+            assert wait_for_sends(sqs, 1) == [3]
+            assert publisher.pending() == 0
+        finally:
+            publisher.stop()
+
+
+class TestEnrollmentEventEndpoints:
+    """Test enrollment endpoints publish events"""
+
+    def test_enroll_publishes_event(self, client, config_auth, final_auth, sample_enrollment, sqs, spill_path):
+        """Test POST /enroll on Lambda sends the event before the response is returned"""
+        from src.main import event_publisher
+        
+        client.post("/config/age-groups", json={"name": "Adults", "min_age": 18, "max_age": 65}, auth=config_auth)
+        with patch("src.main.QUEUE_URL", "queue-url"), \
+                patch("src.main.ON_LAMBDA", True), \
+                patch.object(event_publisher, "sqs", sqs), \
+                patch.object(event_publisher, "queue_url", "queue-url"), \
+                patch.object(event_publisher, "spill_path", spill_path):
+            response = client.post("/enroll", json=sample_enrollment, auth=final_auth)
+        
+        assert response.status_code == status.HTTP_201_CREATED
+        entries = sqs.send_message_batch.call_args.kwargs["Entries"]
+        assert json.loads(entries[0]["MessageBody"])["cpf"] == sample_enrollment["cpf"]
+
+    def test_legacy_enroll_publishes_event(self, client, sample_enrollment, sqs, spill_path):
+        """Test legacy endpoint returns the event id and leaves it to the flusher"""
+        from src.main import event_publisher
+        
+        with patch("src.main.QUEUE_URL", "queue-url"), \
+                patch.object(event_publisher, "sqs", sqs), \
+                patch.object(event_publisher, "queue_url", "queue-url"), \
+                patch.object(event_publisher, "spill_path", spill_path):
+            response = client.post("/enroll-legacy", json=sample_enrollment)
+            assert wait_for_sends(sqs, 1) == [1]
+        
+        assert response.status_code == status.HTTP_200_OK
+        entries = sqs.send_message_batch.call_args.kwargs["Entries"]
+        assert entries[0]["Id"] == response.json()["MessageId"]
@@ -0,0 +1,126 @@
+import csv
+import io
+import json
+import pytest
+import boto3
+from moto import mock_s3
+from unittest.mock import MagicMock
+from src.export import parallel_scan, write_csv, write_ndjson, export_table
+
+
+def make_segmented_table(items, page_size=2):
+    """Fake table whose client honours Segment/TotalSegments and paginates"""
+    def scan(TableName, Segment, TotalSegments, ExclusiveStartKey=None, **kwargs):
+        segment_items = [
+            item for position, item in enumerate(items)
+            if position % TotalSegments == Segment
+        ]
+        start = ExclusiveStartKey["position"] if ExclusiveStartKey else 0
+        response = {"Items": segment_items[start:start + page_size]}
+        if start + page_size < len(segment_items):
+            response["LastEvaluatedKey"] = {"position": start + page_size}
+        return response
+
+    table = MagicMock()
+    table.name = "test-enrollments"
+    table.meta.client.scan.side_effect = scan
+    return table
+
+
+def sample_items(count):
+    return [
+        {
+            "cpf": f"{i:011d}",
+            "name": f"Person {i}",
+            "age": 30,
+            "age_group_id": "group-1",
+            "age_group_name": "Adults",
+            "created_at": "2024-01-01T00:00:00"
+        }
+        for i in range(count)
+    ]
+
+
+class TestParallelScan:
+    """Test parallel segmented scan"""
+
+    def test_merges_all_segments(self):
+        """Test every item of every segment is yielded exactly once"""
+        items = sample_items(25)
+        table = make_segmented_table(items)
+        
+        scanned = list(parallel_scan(table, total_segments=4))
+        
+        assert sorted(i["cpf"] for i in scanned) == sorted(i["cpf"] for i in items)
+        segments = {call.kwargs["Segment"] for call in table.meta.client.scan.call_args_list}
+        assert segments == {0, 1, 2, 3}
+
+    def test_propagates_segment_errors(self):
+        """Test a failing segment fails the scan"""
+        table = MagicMock()
+        table.name = "test-enrollments"
+        table.meta.client.scan.side_effect = RuntimeError("boom")
+        
+        with pytest.raises(RuntimeError):
+            list(parallel_scan(table, total_segments=2))
+
+    def test_early_close(self):
+        """Test closing the stream early does not hang the workers"""
+        table = make_segmented_table(sample_items(200), page_size=1)
+        
+        stream = parallel_scan(table, total_segments=4)
+        next(stream)
+        stream.close()
+
+    def test_invalid_segment_count(self):
+        """Test segment count must be positive"""
+        with pytest.raises(ValueError):
+            list(parallel_scan(MagicMock(), total_segments=0))
+
+
+class TestExportWriters:
+    """Test export output formats"""
+
+    def test_write_csv(self):
+        """Test CSV output has a header and one row per item"""
+        output = io.StringIO()
+        count = write_csv(sample_items(3), output)
+        
+        rows = list(csv.DictReader(io.StringIO(output.getvalue())))
+        assert count == 3
+        assert rows[0]["cpf"] == "00000000000"
+
+    def test_write_ndjson(self):
+        """Test NDJSON output has one JSON object per line"""
+        output = io.StringIO()
+        count = write_ndjson(sample_items(3), output)
+        
+        lines = output.getvalue().strip().split("\n")
+        assert count == 3
+        assert json.loads(lines[2])["cpf"] == "00000000002"
+
+    def test_export_to_s3(self, dynamodb_tables):
+        """Test exporting the enrollments table to S3"""
+        _, enrollments_table = dynamodb_tables
+        for item in sample_items(5):
+            enrollments_table.put_item(Item=item)
+        
+        with mock_s3():
+            s3 = boto3.client("s3", region_name="us-east-1")
+            s3.create_bucket(Bucket="exports")
+            
+            count = export_table(
+                enrollments_table,
+                "s3://exports/enrollments.ndjson",
+                total_segments=1,
+                s3_client=s3
+            )
+            
+            body = s3.get_object(Bucket="exports", Key="enrollments.ndjson")["Body"].read()
+            assert count == 5
+            assert len(body.decode().strip().split("\n")) == 5
+
+    def test_export_invalid_format(self):
+        """Test unknown formats are rejected"""
+        with pytest.raises(ValueError):
+            export_table(MagicMock(), "out.xml", export_format="xml")
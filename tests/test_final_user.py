@@ -1,3 +1,5 @@
+import base64
+import json
 import pytest
 from fastapi import status
 
@@ -93,6 +95,20 @@ class TestEnrollmentEndpoints:
         
         assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
 
+    def test_create_enrollment_after_age_group_update(self, client, final_auth, config_auth):
+        """Test enrollment lookups see age group changes"""
+        group_id = self.setup_age_group(client, config_auth)
+        
+        child_enrollment = {"name": "Maria Silva Santos", "age": 10, "cpf": "11144477735"}
+        response1 = client.post("/enroll", json=child_enrollment, auth=final_auth)
+        assert response1.status_code == status.HTTP_400_BAD_REQUEST
+        
+        client.put(f"/config/age-groups/{group_id}", json={"min_age": 5}, auth=config_auth)
+        
+        response2 = client.post("/enroll", json=child_enrollment, auth=final_auth)
+        assert response2.status_code == status.HTTP_201_CREATED
+        assert response2.json()["age_group"] == "Adults"
+
     def test_list_enrollments_empty(self, client, final_auth):
         """Test listing enrollments when none exist"""
         response = client.get("/enrollments", auth=final_auth)
@@ -134,6 +150,24 @@ class TestEnrollmentEndpoints:
         
         assert response.status_code == status.HTTP_404_NOT_FOUND
 
+    def test_get_enrollment_not_modified(self, client, final_auth, config_auth, sample_enrollment):
+        """Test If-None-Match returns 304 until regrouping changes the enrollment"""
+        age_group_id = self.setup_age_group(client, config_auth)
+        client.post("/enroll", json=sample_enrollment, auth=final_auth)
+        url = f"/enrollments/{sample_enrollment['cpf']}"
+        
+        response = client.get(url, auth=final_auth)
+        tag = response.headers["ETag"]
+        assert "max-age" in response.headers["Cache-Control"]
+        
+        response = client.get(url, headers={"If-None-Match": f'W/{tag}, "other"'}, auth=final_auth)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        
+        client.put(f"/config/age-groups/{age_group_id}", json={"name": "Grown-ups"}, auth=config_auth)
+        response = client.get(url, headers={"If-None-Match": tag}, auth=final_auth)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["age_group"] == "Grown-ups"
+
     def test_delete_enrollment(self, client, final_auth, config_auth, sample_enrollment):
         """Test deleting enrollment"""
         # Setup and create enrollment
@@ -211,4 +245,128 @@ class TestEnrollmentEndpoints:
         
         # Config user can delete enrollment
         delete_response = client.delete(f"/enrollments/{sample_enrollment['cpf']}", auth=config_auth)
-        assert delete_response.status_code == status.HTTP_204_NO_CONTENT
\ No newline at end of file
+        assert delete_response.status_code == status.HTTP_204_NO_CONTENT
+
+class TestEnrollmentPagination:
+    """Test cursor pagination and NDJSON streaming of enrollments"""
+
+    enrollments = [
+        {"name": "João Silva Santos", "age": 25, "cpf": "11144477735"},
+        {"name": "Maria Silva Santos", "age": 30, "cpf": "12345678909"},
+        {"name": "Pedro Silva Santos", "age": 40, "cpf": "98765432100"}
+    ]
+
+    def setup_enrollments(self, client, config_auth, final_auth):
+        client.post("/config/age-groups", json={"name": "Adults", "min_age": 18, "max_age": 65}, auth=config_auth)
+        for enrollment in self.enrollments:
+            client.post("/enroll", json=enrollment, auth=final_auth)
+
+    def test_paginate_enrollments(self, client, config_auth, final_auth):
+        """Test following X-Next-Cursor returns every enrollment once"""
+        self.setup_enrollments(client, config_auth, final_auth)
+        
+        response1 = client.get("/enrollments?limit=2", auth=final_auth)
+        assert response1.status_code == status.HTTP_200_OK
+        assert len(response1.json()) == 2
+        cursor = response1.headers["X-Next-Cursor"]
+        
+        response2 = client.get("/enrollments", params={"limit": 2, "cursor": cursor}, auth=final_auth)
+        assert response2.status_code == status.HTTP_200_OK
+        assert "X-Next-Cursor" not in response2.headers
+        
+        cpfs = {e["cpf"] for e in response1.json() + response2.json()}
+        assert cpfs == {e["cpf"] for e in self.enrollments}
+
+    def test_invalid_cursor(self, client, final_auth):
+        """Test malformed cursors are rejected"""
+        response = client.get("/enrollments", params={"cursor": "not-a-cursor"}, auth=final_auth)
+        
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    @pytest.mark.parametrize("key", [{"foo": {"S": "x"}}, {"cpf": "x"}, {"cpf": {"N": "1"}}])
+    def test_cursor_with_wrong_key(self, client, final_auth, key):
+        """Test well-formed cursors whose key DynamoDB would reject return 400, also when streaming"""
+        cursor = base64.urlsafe_b64encode(json.dumps({"scope": "enrollments", "key": key}).encode()).decode()
+        
+        for params in ({"limit": 1, "cursor": cursor}, {"format": "ndjson", "cursor": cursor}):
+            response = client.get("/enrollments", params=params, auth=final_auth)
+            assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_cursor_from_another_query(self, client, config_auth, final_auth):
+        """Test an age group listing cursor is not accepted by /enrollments"""
+        self.setup_enrollments(client, config_auth, final_auth)
+        adults = client.get("/config/age-groups", auth=config_auth).json()[0]
+        cursor = client.get(f"/config/age-groups/{adults['id']}/enrollments?limit=1", auth=config_auth).headers["X-Next-Cursor"]
+        
+        response = client.get("/enrollments", params={"limit": 1, "cursor": cursor}, auth=final_auth)
+        
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_stream_enrollments_ndjson(self, client, config_auth, final_auth):
+        """Test NDJSON streaming yields one enrollment per line across pages"""
+        self.setup_enrollments(client, config_auth, final_auth)
+        
+        response = client.get("/enrollments?format=ndjson&limit=1", auth=final_auth)
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = response.text.strip().split("\n")
+        assert len(lines) == 3
+
+
+class TestBatchEnrollment:
+    """Test batch enrollment endpoint"""
+
+    def test_batch_enrollment_per_item_results(self, client, config_auth, final_auth):
+        """Test one bad item does not fail the whole batch"""
+        client.post("/config/age-groups", json={"name": "Adults", "min_age": 18, "max_age": 65}, auth=config_auth)
+        client.post("/enroll", json={"name": "João Silva Santos", "age": 25, "cpf": "11144477735"}, auth=final_auth)
+        
+        batch = {"enrollments": [
+            {"name": "Maria Silva Santos", "age": 30, "cpf": "123.456.789-09"},
+            {"name": "Pedro Silva Santos", "age": 30, "cpf": "12345678900"},
+            {"name": "Ana Silva Santos", "age": 10, "cpf": "98765432100"},
+            {"name": "João Silva Santos", "age": 25, "cpf": "11144477735"},
+            {"name": "Maria Costa Lima", "age": 40, "cpf": "12345678909"}
+        ]}
+        response = client.post("/enroll/batch", json=batch, auth=final_auth)
+        
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["created"] == 1
+        assert data["failed"] == 4
+        statuses = [(r["index"], r["status"]) for r in data["results"]]
+        assert statuses == [(0, "created"), (1, "failed"), (2, "failed"), (3, "failed"), (4, "failed")]
+        assert data["results"][0]["enrollment"]["age_group"] == "Adults"
+        assert "Invalid CPF" in data["results"][1]["detail"]
+        assert "No age group found" in data["results"][2]["detail"]
+        assert data["results"][3]["detail"] == "CPF already enrolled"
+        assert data["results"][4]["detail"] == "CPF repeated in batch"
+
+    def test_batch_enrollment_chunks(self, client, config_auth, final_auth):
+        """Test batches larger than one transaction are fully written"""
+        from src.validators import validate_cpf
+        
+        client.post("/config/age-groups", json={"name": "Adults", "min_age": 18, "max_age": 65}, auth=config_auth)
+        cpfs = []
+        base = 100000000
+        while len(cpfs) < 30:
+            base += 1
+            digits = str(base)
+            for check in range(100):
+                cpf = f"{digits}{check:02d}"
+                if validate_cpf(cpf):
+                    cpfs.append(cpf)
+                    break
+        
+        batch = {"enrollments": [{"name": "Batch Person Name", "age": 30, "cpf": cpf} for cpf in cpfs]}
+        response = client.post("/enroll/batch", json=batch, auth=final_auth)
+        
+        assert response.json()["created"] == 30
+        assert len(client.get("/enrollments", auth=final_auth).json()) == 30
+
+    def test_batch_enrollment_requires_auth(self, client):
+        """Test batch enrollment requires authentication"""
+        response = client.post("/enroll/batch", json={"enrollments": []})
+        
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
@@ -0,0 +1,106 @@
+import pytest
+from unittest.mock import patch
+from fastapi import status
+from src import main
+from src.main import event_publisher, idempotency_store
+
+
+@pytest.fixture
+def adults(client, config_auth):
+    client.post("/config/age-groups", json={"name": "Adults", "min_age": 18, "max_age": 65}, auth=config_auth)
+
+
+class TestIdempotentEnroll:
+    """Test Idempotency-Key on POST /enroll"""
+
+    def test_retry_replays_first_response(self, client, final_auth, adults, sample_enrollment):
+        """Test a retry returns the stored 201 instead of "CPF already enrolled" """
+        headers = {"Idempotency-Key": "retry-1"}
+        first = client.post("/enroll", json=sample_enrollment, headers=headers, auth=final_auth)
+
+        with patch.object(main.async_db_service, "create_enrollment") as create_enrollment:
+            retry = client.post("/enroll", json=sample_enrollment, headers=headers, auth=final_auth)
+
+        assert first.status_code == status.HTTP_201_CREATED
+        assert retry.status_code == status.HTTP_201_CREATED
+        assert retry.json() == first.json()
+        assert retry.headers["Idempotent-Replayed"] == "true"
+        assert "Idempotent-Replayed" not in first.headers
+        create_enrollment.assert_not_called()
+
+    def test_replay_from_table_after_cold_start(self, client, final_auth, adults, sample_enrollment):
+        """Test the stored response survives losing the in-process cache"""
+        headers = {"Idempotency-Key": "retry-2"}
+        first = client.post("/enroll", json=sample_enrollment, headers=headers, auth=final_auth)
+
+        idempotency_store.clear()
+        retry = client.post("/enroll", json=sample_enrollment, headers=headers, auth=final_auth)
+
+        assert retry.status_code == status.HTTP_201_CREATED
+        assert retry.json() == first.json()
+        assert retry.headers["Idempotent-Replayed"] == "true"
+
+    def test_client_errors_are_replayed(self, client, final_auth, sample_enrollment):
+        """Test a 4xx is stored like a success"""
+        headers = {"Idempotency-Key": "no-group"}
+        first = client.post("/enroll", json=sample_enrollment, headers=headers, auth=final_auth)
+        retry = client.post("/enroll", json=sample_enrollment, headers=headers, auth=final_auth)
+
+        assert first.status_code == status.HTTP_400_BAD_REQUEST
+        assert retry.status_code == status.HTTP_400_BAD_REQUEST
+        assert retry.json() == first.json()
+
+    def test_key_reused_with_different_body(self, client, final_auth, adults, sample_enrollment):
+        """Test reusing a key for another request is rejected"""
+        headers = {"Idempotency-Key": "reused"}
+        client.post("/enroll", json=sample_enrollment, headers=headers, auth=final_auth)
+
+        other = {**sample_enrollment, "cpf": "12345678909"}
+        response = client.post("/enroll", json=other, headers=headers, auth=final_auth)
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    def test_keys_are_scoped_per_user(self, client, final_auth, adults, sample_enrollment):
+        """Test another user's key does not replay this user's response"""
+        headers = {"Idempotency-Key": "shared"}
+        client.post("/enroll", json=sample_enrollment, headers=headers, auth=final_auth)
+
+        response = client.post("/enroll", json=sample_enrollment, headers=headers, auth=("final_user2", "password2"))
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "CPF already enrolled" in response.json()["detail"]
+
+    def test_failed_request_releases_key(self, client, final_auth, adults, sample_enrollment):
+        """Test an unexpected error lets the retry run again"""
+        headers = {"Idempotency-Key": "flaky"}
+        with patch.object(main.async_db_service, "create_enrollment", side_effect=RuntimeError("boom")):
+            with pytest.raises(RuntimeError):
+                client.post("/enroll", json=sample_enrollment, headers=headers, auth=final_auth)
+
+        retry = client.post("/enroll", json=sample_enrollment, headers=headers, auth=final_auth)
+
+        assert retry.status_code == status.HTTP_201_CREATED
+        assert "Idempotent-Replayed" not in retry.headers
+
+    def test_key_too_long(self, client, final_auth, adults, sample_enrollment):
+        """Test oversized keys are rejected"""
+        response = client.post("/enroll", json=sample_enrollment, headers={"Idempotency-Key": "k" * 256}, auth=final_auth)
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+class TestIdempotentLegacyEnroll:
+    """Test Idempotency-Key on POST /enroll-legacy"""
+
+    def test_retry_does_not_enqueue_twice(self, client, sample_enrollment):
+        """Test a retry returns the first MessageId without publishing again"""
+        headers = {"Idempotency-Key": "legacy-1"}
+        with patch.object(main, "QUEUE_URL", "https://sqs.test/queue"), \
+                patch.object(event_publisher, "publish", return_value="event-1") as publish:
+            first = client.post("/enroll-legacy", json=sample_enrollment, headers=headers)
+            retry = client.post("/enroll-legacy", json=sample_enrollment, headers=headers)
+
+        assert first.json()["MessageId"] == "event-1"
+        assert retry.json() == first.json()
+        assert retry.headers["Idempotent-Replayed"] == "true"
+        publish.assert_called_once()
@@ -0,0 +1,75 @@
+import json
+import os
+from unittest.mock import patch
+
+os.environ.setdefault("TABLE_NAME", "test-enrollments")
+
+from processor import processor
+
+
+def make_record(message_id, **body):
+    return {"messageId": message_id, "body": json.dumps(body)}
+
+
+class TestProcessor:
+    """Test SQS enrollment processor"""
+
+    def test_writes_valid_records(self, dynamodb_tables):
+        """Test valid records are written and no failures are reported"""
+        _, enrollments_table = dynamodb_tables
+        event = {"Records": [
+            make_record("m1", name="João Silva Santos", age=25, cpf="11144477735"),
+            make_record("m2", name="Maria Silva Santos", age=30, cpf="12345678909")
+        ]}
+        
+        with patch.object(processor, "table", enrollments_table):
+            result = processor.handler(event, None)
+        
+        assert result == {"batchItemFailures": []}
+        assert len(enrollments_table.scan()["Items"]) == 2
+
+    def test_reports_invalid_records(self, dynamodb_tables):
+        """Test only invalid messages are reported as failures"""
+        _, enrollments_table = dynamodb_tables
+        event = {"Records": [
+            make_record("m1", name="João Silva Santos", age=25, cpf="11144477735"),
+            make_record("m2", name="Maria Silva Santos", age="old", cpf="12345678909"),
+            make_record("m3", name="Pedro Silva Santos", age=40),
+            {"messageId": "m4", "body": "not json"}
+        ]}
+        
+        with patch.object(processor, "table", enrollments_table):
+            result = processor.handler(event, None)
+        
+        assert result["batchItemFailures"] == [
+            {"itemIdentifier": "m2"}, {"itemIdentifier": "m3"}, {"itemIdentifier": "m4"}
+        ]
+        assert len(enrollments_table.scan()["Items"]) == 1
+
+    def test_deduplicates_by_cpf(self, dynamodb_tables):
+        """Test the last record of a CPF in the batch wins"""
+        _, enrollments_table = dynamodb_tables
+        event = {"Records": [
+            make_record("m1", name="João Silva Santos", age=25, cpf="11144477735"),
+            make_record("m2", name="João Silva Souza", age=26, cpf="11144477735")
+        ]}
+        
+        with patch.object(processor, "table", enrollments_table):
+            result = processor.handler(event, None)
+        
+        items = enrollments_table.scan()["Items"]
+        assert result == {"batchItemFailures": []}
+        assert len(items) == 1
+        assert items[0]["name"] == "João Silva Souza"
+
+    def test_reports_failed_writes(self, dynamodb_tables):
+        """Test messages of a chunk that failed to write are reported"""
+        event = {"Records": [
+            make_record("m1", name="João Silva Santos", age=25, cpf="11144477735"),
+            make_record("m2", name="João Silva Souza", age=26, cpf="11144477735")
+        ]}
+        
+        with patch.object(processor.table, "batch_writer", side_effect=Exception("DynamoDB unavailable")):
+            result = processor.handler(event, None)
+        
+        assert result["batchItemFailures"] == [{"itemIdentifier": "m1"}, {"itemIdentifier": "m2"}]
@@ -0,0 +1,176 @@
+import asyncio
+import boto3
+import pytest
+from fastapi import HTTPException, status
+from src.database import AsyncDatabaseService, DatabaseService
+from src.main import rate_limiter
+from src.ratelimit import COST_READ, COST_SCAN, RateLimiter, RatePolicy, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def local_limiter(clock: FakeClock) -> RateLimiter:
+    db_service = DatabaseService()
+    db_service.rate_limit_table_name = None
+    return RateLimiter(
+        AsyncDatabaseService(db_service),
+        policies={"config": RatePolicy(capacity=20, rate=2), "final": RatePolicy(capacity=10, rate=1)},
+        clock=clock
+    )
+
+
+def retry_after(limiter: RateLimiter, username: str, cost: float) -> int:
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(limiter.acquire(username, cost))
+    assert e.value.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    return int(e.value.headers["Retry-After"])
+
+
+class TestTokenBucket:
+    """Test token accounting"""
+
+    def test_refill_up_to_capacity(self):
+        """Test tokens refill at the rate and never exceed the capacity"""
+        bucket = TokenBucket(capacity=10, rate=2, now=0)
+
+        assert bucket.take(10, now=0) == 0
+        assert bucket.take(4, now=1) == 1.0
+        assert bucket.take(4, now=2) == 0
+        assert bucket.take(10, now=100) == 0
+
+
+class TestRateLimiter:
+    """Test per-user and per-role buckets"""
+
+    def test_users_have_separate_buckets(self):
+        """Test one user running out does not limit another"""
+        clock = FakeClock()
+        limiter = local_limiter(clock)
+
+        asyncio.run(limiter.acquire("final_user1", COST_SCAN))
+
+        assert retry_after(limiter, "final_user1", COST_READ) == 1
+        asyncio.run(limiter.acquire("final_user2", COST_SCAN))
+
+    def test_role_sets_the_bucket(self):
+        """Test config users get their role's larger bucket"""
+        limiter = local_limiter(FakeClock())
+
+        asyncio.run(limiter.acquire("config_admin", COST_SCAN))
+        asyncio.run(limiter.acquire("config_admin", COST_SCAN))
+
+        assert retry_after(limiter, "config_admin", COST_SCAN) == 5
+
+    def test_tokens_come_back_over_time(self):
+        """Test a limited user passes again once Retry-After has elapsed"""
+        clock = FakeClock()
+        limiter = local_limiter(clock)
+        asyncio.run(limiter.acquire("final_user1", COST_SCAN))
+
+        wait = retry_after(limiter, "final_user1", COST_SCAN)
+        clock.now += wait
+
+        asyncio.run(limiter.acquire("final_user1", COST_SCAN))
+
+    def test_disabled(self):
+        """Test nothing is limited when disabled"""
+        limiter = local_limiter(FakeClock())
+        limiter.enabled = False
+
+        for _ in range(5):
+            asyncio.run(limiter.acquire("final_user1", COST_SCAN))
+
+
+class TestSharedBuckets:
+    """Test buckets shared through the rate limit table"""
+
+    @pytest.fixture
+    def shared_db(self, mock_aws):
+        boto3.resource("dynamodb", region_name="us-east-1").create_table(
+            TableName="test-rate-limits",
+            KeySchema=[{"AttributeName": "key", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "key", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST"
+        )
+        db_service = DatabaseService()
+        db_service.rate_limit_table_name = "test-rate-limits"
+        return AsyncDatabaseService(db_service)
+
+    def test_containers_share_a_bucket(self, shared_db):
+        """Test tokens taken in one container are missing in another"""
+        policies = {"final": RatePolicy(capacity=3, rate=0.01)}
+        container_a = RateLimiter(shared_db, policies=policies)
+        container_b = RateLimiter(shared_db, policies=policies)
+
+        asyncio.run(container_a.acquire("final_user1", 2))
+        asyncio.run(container_b.acquire("final_user1", 1))
+
+        assert retry_after(container_b, "final_user1", 1) == 100
+        asyncio.run(container_b.acquire("final_user2", 1))
+
+    def test_busy_user_costs_one_write(self, shared_db):
+        """Test taking from a bucket in use is a single update_item"""
+        limiter = RateLimiter(shared_db, policies={"final": RatePolicy(capacity=10, rate=0.01)})
+        asyncio.run(limiter.acquire("final_user1", 1))
+        calls = []
+        record_call = lambda model, **kwargs: calls.append(model.name)
+        events = shared_db.db_service.client.meta.events
+        events.register("before-call.dynamodb.*", record_call)
+
+        try:
+            asyncio.run(limiter.acquire("final_user1", 1))
+        finally:
+            events.unregister("before-call.dynamodb.*", record_call)
+
+        assert calls == ["UpdateItem"]
+
+    def test_limited_user_skips_the_table(self, shared_db):
+        """Test retries during Retry-After are rejected without a DynamoDB call"""
+        limiter = RateLimiter(shared_db, policies={"final": RatePolicy(capacity=1, rate=0.01)})
+        asyncio.run(limiter.acquire("final_user1", 1))
+        retry_after(limiter, "final_user1", 1)
+
+        shared_db.db_service.rate_limit_table_name = "missing-table"
+
+        assert retry_after(limiter, "final_user1", 1) == 100
+
+
+class TestRateLimitedEndpoints:
+    """Test endpoints answer 429 with Retry-After"""
+
+    @pytest.fixture
+    def small_buckets(self, monkeypatch):
+        monkeypatch.setattr(rate_limiter, "policies", {
+            "config": RatePolicy(capacity=20, rate=1),
+            "final": RatePolicy(capacity=20, rate=1)
+        })
+
+    def test_scans_cost_more_than_gets(self, client, final_auth, small_buckets):
+        """Test two scans empty the bucket that twenty gets need"""
+        for _ in range(2):
+            assert client.get("/enrollments", auth=final_auth).status_code == status.HTTP_200_OK
+
+        response = client.get("/enrollments/11144477735", auth=final_auth)
+
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert response.headers["Retry-After"] == "1"
+
+    def test_gets_are_cheap(self, client, final_auth, small_buckets):
+        """Test a get takes a single token"""
+        for _ in range(20):
+            assert client.get("/enrollments/11144477735", auth=final_auth).status_code == status.HTTP_404_NOT_FOUND
+
+        assert client.get("/enrollments/11144477735", auth=final_auth).status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+    def test_invalid_credentials_are_rejected_first(self, client, invalid_auth, small_buckets):
+        """Test unauthenticated requests get 401, not 429"""
+        for _ in range(3):
+            response = client.get("/enrollments", auth=invalid_auth)
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
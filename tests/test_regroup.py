@@ -0,0 +1,208 @@
+import json
+from unittest.mock import MagicMock, patch
+from fastapi import status
+from fastapi.testclient import TestClient
+from src.database import UNASSIGNED_AGE_GROUP_ID
+from src.domain import AgeGroup
+from src.main import app
+from src.regroup import handler, plan_regroup, resume_regroup_jobs, run_regroup_job
+
+
+def enroll_ages(client, final_auth, ages):
+    cpfs = ["11144477735", "12345678909", "98765432100", "52998224725", "39053344705"]
+    client.post("/enroll/batch", json={"enrollments": [
+        {"name": "Pessoa Teste Silva", "age": age, "cpf": cpf}
+        for age, cpf in zip(ages, cpfs)
+    ]}, auth=final_auth)
+    return dict(zip(cpfs, ages))
+
+
+class FakeLambdaContext:
+    def __init__(self, remaining_ms: int):
+        self.remaining_ms = remaining_ms
+
+    def get_remaining_time_in_millis(self) -> int:
+        return self.remaining_ms
+
+
+def with_lambda_context(asgi_app, context):
+    """The app as Mangum calls it, with the invocation context in the scope"""
+    async def wrapped(scope, receive, send):
+        await asgi_app({**scope, "aws.context": context}, receive, send)
+    return wrapped
+
+
+class TestPlanRegroup:
+    """Test the index lookups planned for an age group change"""
+
+    def test_range_change_reads_only_the_delta(self):
+        """Test only ages entering or leaving the group are read"""
+        old = AgeGroup(id="g", name="Adults", min_age=18, max_age=65)
+        new = AgeGroup(id="g", name="Adults", min_age=20, max_age=66)
+
+        assert plan_regroup(old, new) == ["age:18", "age:19", "age:66"]
+
+    def test_unchanged_group_needs_nothing(self):
+        """Test a change that keeps the range and name plans no lookups"""
+        old = AgeGroup(id="g", name="Adults", min_age=18, max_age=65)
+
+        assert plan_regroup(old, AgeGroup(id="g", name="Adults", min_age=18, max_age=65)) == []
+
+    def test_rename_reads_the_group(self):
+        """Test a rename rewrites the whole group plus the ages it gains"""
+        old = AgeGroup(id="g", name="Adults", min_age=18, max_age=65)
+        new = AgeGroup(id="g", name="Grown-ups", min_age=17, max_age=60)
+
+        assert plan_regroup(old, new) == ["group:g", "age:17"]
+
+    def test_create_and_delete(self):
+        """Test created groups pick up unassigned enrollments and deleted groups release theirs"""
+        group = AgeGroup(id="g", name="Adults", min_age=18, max_age=65)
+
+        assert plan_regroup(None, group) == [f"group:{UNASSIGNED_AGE_GROUP_ID}"]
+        assert plan_regroup(group, None) == ["group:g"]
+
+
+class TestRegroupJob:
+    """Test enrollments follow age group changes"""
+
+    def test_update_moves_affected_enrollments(self, client, config_auth, final_auth):
+        """Test ages leaving and entering groups are moved and counted"""
+        from src.main import db_service
+
+        adults = client.post("/config/age-groups", json={"name": "Adults", "min_age": 18, "max_age": 65}, auth=config_auth).json()
+        seniors = client.post("/config/age-groups", json={"name": "Seniors", "min_age": 66, "max_age": 120}, auth=config_auth).json()
+        enroll_ages(client, final_auth, [25, 64, 65, 70])
+
+        response = client.put(f"/config/age-groups/{adults['id']}", json={"max_age": 60}, auth=config_auth)
+        assert response.status_code == status.HTTP_200_OK
+        assert db_service.get_enrollment("12345678909").age_group_id == UNASSIGNED_AGE_GROUP_ID
+
+        client.put(f"/config/age-groups/{seniors['id']}", json={"min_age": 61}, auth=config_auth)
+
+        assert db_service.get_enrollment("11144477735").age_group_id == adults["id"]
+        assert db_service.get_enrollment("12345678909").age_group_id == seniors["id"]
+        assert db_service.get_enrollment("98765432100").age_group_name == "Seniors"
+        assert db_service.get_enrollment_stats()["by_group"] == {
+            adults["id"]: 1,
+            seniors["id"]: 3,
+            UNASSIGNED_AGE_GROUP_ID: 0
+        }
+        assert db_service.list_regroup_jobs() == []
+
+    def test_rename_rewrites_group_name(self, client, config_auth, final_auth):
+        """Test renaming a group renames its enrollments"""
+        from src.main import db_service
+
+        adults = client.post("/config/age-groups", json={"name": "Adults", "min_age": 18, "max_age": 65}, auth=config_auth).json()
+        enroll_ages(client, final_auth, [25, 30])
+
+        client.put(f"/config/age-groups/{adults['id']}", json={"name": "Grown-ups"}, auth=config_auth)
+
+        names = {e.age_group_name for e in db_service.list_enrollments()}
+        assert names == {"Grown-ups"}
+
+    def test_delete_then_recreate(self, client, config_auth, final_auth):
+        """Test a deleted group's enrollments become unassigned until a group covers them"""
+        from src.main import db_service
+
+        adults = client.post("/config/age-groups", json={"name": "Adults", "min_age": 18, "max_age": 65}, auth=config_auth).json()
+        enroll_ages(client, final_auth, [25, 30])
+
+        old = db_service.get_age_group(adults["id"])
+        assert db_service.delete_age_group(adults["id"])
+        assert run_regroup_job(db_service, db_service.create_regroup_job(old.id, plan_regroup(old, None)))
+        assert {e.age_group_id for e in db_service.list_enrollments()} == {UNASSIGNED_AGE_GROUP_ID}
+
+        young = client.post("/config/age-groups", json={"name": "Young", "min_age": 18, "max_age": 28}, auth=config_auth).json()
+
+        assert db_service.get_enrollment("11144477735").age_group_id == young["id"]
+        assert db_service.get_enrollment("12345678909").age_group_id == UNASSIGNED_AGE_GROUP_ID
+        assert db_service.get_enrollment_stats()["total"] == 2
+
+    def test_resume_after_interruption(self, client, config_auth, final_auth):
+        """Test a job stopped between pages resumes from its checkpoint"""
+        from src.main import db_service
+
+        adults = client.post("/config/age-groups", json={"name": "Adults", "min_age": 18, "max_age": 65}, auth=config_auth).json()
+        enroll_ages(client, final_auth, [30, 30, 30])
+        old = db_service.get_age_group(adults["id"])
+        renamed = AgeGroup(id=old.id, name="Grown-ups", min_age=18, max_age=65, created_at=old.created_at)
+        db_service.update_age_group(renamed)
+        job_id = db_service.create_regroup_job(old.id, plan_regroup(old, renamed))
+
+        pages = iter([False, True])
+        assert not run_regroup_job(db_service, job_id, page_size=1, should_stop=lambda: next(pages))
+
+        job = db_service.get_regroup_job(job_id)
+        assert job["cursor"]
+        assert job["moved"] == 1
+
+        assert resume_regroup_jobs(db_service) == 1
+        assert db_service.get_regroup_job(job_id) is None
+        assert {e.age_group_name for e in db_service.list_enrollments()} == {"Grown-ups"}
+
+    def test_resume_with_unreadable_checkpoint(self, client, config_auth, final_auth):
+        """Test a checkpoint cursor that is no longer accepted restarts its step"""
+        from src.main import db_service
+
+        adults = client.post("/config/age-groups", json={"name": "Adults", "min_age": 18, "max_age": 65}, auth=config_auth).json()
+        enroll_ages(client, final_auth, [30, 30])
+        old = db_service.get_age_group(adults["id"])
+        renamed = AgeGroup(id=old.id, name="Grown-ups", min_age=18, max_age=65, created_at=old.created_at)
+        db_service.update_age_group(renamed)
+        steps = plan_regroup(old, renamed)
+        job_id = db_service.create_regroup_job(old.id, steps)
+        db_service.checkpoint_regroup_job(job_id, steps, "eyJjcGYiOnsiUyI6IngifX0=", 0)
+
+        assert run_regroup_job(db_service, job_id)
+        assert {e.age_group_name for e in db_service.list_enrollments()} == {"Grown-ups"}
+
+    def test_request_job_stops_before_lambda_timeout(self, client, config_auth, final_auth):
+        """Test a job started by a request near the timeout is left for the scheduled resume"""
+        from src.main import db_service
+
+        adults = client.post("/config/age-groups", json={"name": "Adults", "min_age": 18, "max_age": 65}, auth=config_auth).json()
+        enroll_ages(client, final_auth, [30, 40])
+        lambda_client = TestClient(with_lambda_context(app, FakeLambdaContext(remaining_ms=1000)))
+
+        response = lambda_client.put(f"/config/age-groups/{adults['id']}", json={"name": "Grown-ups"}, auth=config_auth)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(db_service.list_regroup_jobs()) == 1
+        assert {e.age_group_name for e in db_service.list_enrollments()} == {"Adults"}
+
+        assert handler({}, FakeLambdaContext(remaining_ms=300000)) == {"finished": 1}
+        assert db_service.list_regroup_jobs() == []
+        assert {e.age_group_name for e in db_service.list_enrollments()} == {"Grown-ups"}
+
+    def test_job_is_handed_to_the_regroup_function(self, client, config_auth, final_auth, monkeypatch):
+        """Test with REGROUP_FUNCTION_NAME the request only records the job and invokes the function"""
+        from src.main import db_service
+
+        adults = client.post("/config/age-groups", json={"name": "Adults", "min_age": 18, "max_age": 65}, auth=config_auth).json()
+        enroll_ages(client, final_auth, [30, 40])
+        monkeypatch.setattr("src.main.REGROUP_FUNCTION_NAME", "regroup-resume-test")
+        lambda_client = MagicMock()
+
+        with patch("src.regroup.aws", client=MagicMock(return_value=lambda_client)):
+            response = client.put(f"/config/age-groups/{adults['id']}", json={"name": "Grown-ups"}, auth=config_auth)
+
+        assert response.status_code == status.HTTP_200_OK
+        [job] = db_service.list_regroup_jobs()
+        invoke = lambda_client.invoke.call_args.kwargs
+        assert (invoke["FunctionName"], invoke["InvocationType"]) == ("regroup-resume-test", "Event")
+        assert json.loads(invoke["Payload"]) == {"job_id": job["id"]}
+        assert {e.age_group_name for e in db_service.list_enrollments()} == {"Adults"}
+
+        assert handler({"job_id": job["id"]}, FakeLambdaContext(remaining_ms=300000)) == {"finished": 1}
+        assert {e.age_group_name for e in db_service.list_enrollments()} == {"Grown-ups"}
+
+    def test_jobs_are_hidden_from_age_groups(self, client, config_auth):
+        """Test job items are not listed or served as age groups"""
+        from src.main import db_service
+
+        job_id = db_service.create_regroup_job("any", ["age:1"])
+
+        assert client.get("/config/age-groups", auth=config_auth).json() == []
+        assert client.get(f"/config/age-groups/{job_id}", auth=config_auth).status_code == status.HTTP_404_NOT_FOUND
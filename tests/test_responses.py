@@ -0,0 +1,101 @@
+import json
+from unittest.mock import patch
+from starlette.responses import JSONResponse
+from src import responses
+from src.domain import AgeGroup, Enrollment
+from src.main import app
+from src.models import AgeGroupResponse, EnrollmentResponse
+from src.responses import (
+    FastJSONResponse,
+    age_group_body,
+    cache_headers,
+    enrollment_body,
+    enrollments_ndjson,
+    etag,
+    etag_matches
+)
+
+
+def sample_enrollment() -> Enrollment:
+    return Enrollment(
+        name="João Silva Santos",
+        age=30,
+        cpf="11144477735",
+        age_group_id="g",
+        age_group_name="Adults"
+    )
+
+
+class TestResponseBodies:
+    """Test the fast path builds exactly what the response models would"""
+
+    def test_age_group_body_matches_model(self):
+        """Test the age group body has the AgeGroupResponse fields and values"""
+        age_group = AgeGroup(name="Adults", min_age=18, max_age=65)
+
+        assert age_group_body(age_group) == AgeGroupResponse(**age_group.to_dict()).dict()
+
+    def test_enrollment_body_matches_model(self):
+        """Test the enrollment body has the EnrollmentResponse fields and values"""
+        enrollment = sample_enrollment()
+        expected = EnrollmentResponse(
+            cpf=enrollment.cpf,
+            name=enrollment.name,
+            age=enrollment.age,
+            age_group=enrollment.age_group_name,
+            created_at=enrollment.created_at
+        )
+
+        assert enrollment_body(enrollment) == expected.dict()
+
+    def test_ndjson_lines(self):
+        """Test each enrollment is rendered on its own line"""
+        lines = enrollments_ndjson([sample_enrollment(), sample_enrollment()]).decode().splitlines()
+
+        assert [json.loads(line)["cpf"] for line in lines] == ["11144477735", "11144477735"]
+
+
+class TestFastJSONResponse:
+    """Test rendering with and without orjson"""
+
+    def test_same_json_as_starlette(self):
+        """Test the rendered body decodes to the same content as JSONResponse"""
+        content = [enrollment_body(sample_enrollment())]
+
+        assert json.loads(FastJSONResponse(content).body) == json.loads(JSONResponse(content).body)
+
+    def test_fallback_without_orjson(self):
+        """Test the stdlib fallback renders the same bytes as JSONResponse"""
+        content = {"name": "João", "ages": [1, 2]}
+
+        with patch.object(responses, "orjson", None):
+            assert FastJSONResponse(content).body == JSONResponse(content).body
+
+    def test_openapi_keeps_response_models(self):
+        """Test routes on the fast path still document their response models"""
+        paths = app.openapi()["paths"]
+        schema = paths["/enrollments"]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+
+        assert schema["items"]["$ref"] == "#/components/schemas/EnrollmentResponse"
+        schema = paths["/config/age-groups/{age_group_id}"]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+        assert schema["$ref"] == "#/components/schemas/AgeGroupResponse"
+
+
+class TestConditionalHelpers:
+    """Test ETag matching and cache headers"""
+
+    def test_etag_matches(self):
+        """Test If-None-Match lists, weak tags and the wildcard"""
+        tag = etag("age-groups", 3)
+
+        assert etag_matches(tag, tag)
+        assert etag_matches(f'"other", W/{tag}', tag)
+        assert etag_matches("*", tag)
+        assert not etag_matches(None, tag)
+        assert not etag_matches(etag("age-groups", 4), tag)
+
+    def test_cache_headers(self, monkeypatch):
+        """Test CACHE_MAX_AGE=0 turns freshness off but keeps the validator"""
+        monkeypatch.setenv("CACHE_MAX_AGE", "0")
+
+        assert cache_headers('"x"') == {"ETag": '"x"', "Cache-Control": "no-cache", "Vary": "Authorization"}
@@ -0,0 +1,79 @@
+import json
+import pytest
+from fastapi.testclient import TestClient
+from src.main import app
+from src.timing import ServerTimingMiddleware, emf_record, server_timing_header, span
+
+
+@pytest.fixture
+def timed_client(client):
+    """Test client for the app wrapped in the timing middleware"""
+    return TestClient(ServerTimingMiddleware(app))
+
+
+def parse_server_timing(header: str) -> dict:
+    metrics = {}
+    for metric in header.split(", "):
+        name, *params = metric.split(";")
+        metrics[name] = dict(param.split("=", 1) for param in params)
+    return metrics
+
+
+class TestSpans:
+    """Test span recording outside the middleware"""
+
+    def test_span_is_noop_without_request(self):
+        """Test spans outside a timed request share one no-op context manager"""
+        assert span("db.get_age_group") is span("auth")
+        with span("db.get_age_group"):
+            pass
+
+    def test_server_timing_header(self):
+        """Test repeated spans are summed and counted"""
+        header = server_timing_header([("db.get", 1.0), ("auth", 2.5), ("db.get", 1.5)], 10.0)
+
+        assert header == 'db.get;dur=2.50;desc="x2", auth;dur=2.50, total;dur=10.00'
+
+    def test_emf_record(self):
+        """Test the record declares one millisecond metric per span under the endpoint dimension"""
+        record = emf_record("EnrollmentApi", "list_age_groups", "GET", 200, [("auth", 1.0)], 3.0)
+
+        directive = record["_aws"]["CloudWatchMetrics"][0]
+        assert directive["Namespace"] == "EnrollmentApi"
+        assert directive["Dimensions"] == [["Endpoint"]]
+        assert [metric["Name"] for metric in directive["Metrics"]] == ["auth", "total"]
+        assert record["Endpoint"] == "list_age_groups"
+        assert record["auth"] == 1.0
+        assert record["total"] == 3.0
+
+
+class TestServerTimingMiddleware:
+    """Test per-request stage timings"""
+
+    def test_response_carries_stage_timings(self, timed_client, config_auth):
+        """Test auth and DynamoDB stages are reported in Server-Timing"""
+        response = timed_client.get("/config/enrollment-stats", auth=config_auth)
+
+        assert response.status_code == 200
+        metrics = parse_server_timing(response.headers["server-timing"])
+        assert "auth" in metrics
+        assert "db.get_enrollment_stats" in metrics
+        assert float(metrics["total"]["dur"]) >= float(metrics["auth"]["dur"])
+
+    def test_emf_log_per_request(self, timed_client, config_auth, capsys):
+        """Test one EMF line is printed per request, keyed by endpoint and status"""
+        timed_client.get("/config/age-groups", auth=config_auth)
+        timed_client.get("/config/age-groups", auth=("config_admin", "wrong"))
+
+        records = [json.loads(line) for line in capsys.readouterr().out.splitlines() if line.startswith("{")]
+        assert [(r["Endpoint"], r["StatusCode"]) for r in records] == [
+            ("list_age_groups", 200),
+            ("list_age_groups", 401)
+        ]
+        assert "auth" in records[1]
+
+    def test_app_without_middleware_has_no_header(self, client, config_auth):
+        """Test timing is off unless the middleware is installed"""
+        response = client.get("/config/age-groups", auth=config_auth)
+
+        assert "server-timing" not in response.headers
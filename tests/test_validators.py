@@ -1,6 +1,7 @@
 import pytest
-from src.validators import validate_cpf, validate_name, validate_age_in_groups, clean_cpf, format_cpf
-from src.domain import AgeGroup
+from unittest.mock import patch
+from src.validators import check_cpf, validate_cpf, validate_cpfs, validate_name, validate_age_in_groups, clean_cpf, format_cpf
+from src.domain import AgeGroup, AgeGroupIndex
 
 
 class TestCPFValidation:
@@ -49,6 +50,14 @@ class TestCPFValidation:
         for cpf in invalid_cpfs:
             assert not validate_cpf(cpf), f"CPF {cpf} should be invalid"
 
+    def test_check_cpf_returns_cleaned_cpf(self):
+        """Test single-pass check returns the cleaned CPF with the verdict"""
+        assert check_cpf("111.444.777-35") == ("11144477735", True)
+        assert check_cpf("11144477735") == ("11144477735", True)
+        assert check_cpf("111.444.777-36") == ("11144477736", False)
+        assert check_cpf("111.111.111-11") == ("11111111111", False)
+        assert check_cpf("123") == ("123", False)
+
     def test_clean_cpf(self):
         """Test CPF cleaning function"""
         assert clean_cpf("111.444.777-35") == "11144477735"
@@ -216,6 +225,46 @@ class TestAgeGroupValidation:
         assert "18" in message
 
 
+class TestBulkCPFValidation:
+    """Test bulk CPF validation"""
+
+    cpfs = [
+        "11144477735",
+        "123.456.789-09",
+        "98765432100",
+        "12345678900",
+        "11111111111",
+        "123456789",
+        "",
+        "abc.def.ghi-jk"
+    ]
+    expected = [True, True, True, False, False, False, False, False]
+
+    def test_bulk_matches_single_validation(self):
+        """Test the bulk mask matches validate_cpf item by item"""
+        mask = validate_cpfs(self.cpfs)
+        
+        assert [bool(valid) for valid in mask] == self.expected
+        assert [bool(valid) for valid in mask] == [validate_cpf(cpf) for cpf in self.cpfs]
+
+    def test_bulk_in_chunks(self):
+        """Test chunked validation keeps the order of the input"""
+        mask = validate_cpfs(iter(self.cpfs * 3), chunk_size=5)
+        
+        assert [bool(valid) for valid in mask] == self.expected * 3
+
+    def test_bulk_pure_python_fallback(self):
+        """Test bulk validation without numpy"""
+        with patch("src.validators.np", None):
+            mask = validate_cpfs(self.cpfs)
+        
+        assert mask == self.expected
+
+    def test_bulk_empty(self):
+        """Test empty input gives an empty mask"""
+        assert len(validate_cpfs([])) == 0
+
+
 class TestAgeGroupDomainLogic:
     """Test age group domain logic"""
 
@@ -255,4 +304,56 @@ class TestAgeGroupDomainLogic:
         
         assert age_group.name == "Updated Name"
         assert age_group.min_age == 18  # Should remain unchanged
-        assert age_group.max_age == 65  # Should remain unchanged
\ No newline at end of file
+        assert age_group.max_age == 65  # Should remain unchanged
+
+
+class TestAgeGroupIndex:
+    """Test in-memory age group interval index"""
+
+    def test_find_age_in_groups(self):
+        """Test lookups resolve to the group containing the age"""
+        index = AgeGroupIndex([
+            AgeGroup(name="Adults", min_age=18, max_age=65),
+            AgeGroup(name="Children", min_age=0, max_age=12),
+            AgeGroup(name="Seniors", min_age=66, max_age=120)
+        ])
+        
+        assert index.find(0).name == "Children"
+        assert index.find(12).name == "Children"
+        assert index.find(18).name == "Adults"
+        assert index.find(65).name == "Adults"
+        assert index.find(120).name == "Seniors"
+
+    def test_find_age_outside_groups(self):
+        """Test gaps and out-of-range ages return None"""
+        index = AgeGroupIndex([
+            AgeGroup(name="Children", min_age=0, max_age=12),
+            AgeGroup(name="Adults", min_age=18, max_age=65)
+        ])
+        
+        assert index.find(15) is None
+        assert index.find(70) is None
+        assert index.find(-1) is None
+
+    def test_empty_index(self):
+        """Test empty index never matches"""
+        index = AgeGroupIndex()
+        
+        assert len(index) == 0
+        assert index.find(25) is None
+
+    def test_find_overlap(self):
+        """Test overlap checks only look at the neighbouring group"""
+        adults = AgeGroup(name="Adults", min_age=18, max_age=65)
+        index = AgeGroupIndex([
+            AgeGroup(name="Children", min_age=0, max_age=12),
+            adults,
+            AgeGroup(name="Seniors", min_age=66, max_age=120)
+        ])
+        
+        assert index.find_overlap(13, 17) is None
+        assert index.find_overlap(10, 14).name == "Children"
+        assert index.find_overlap(60, 70).name == "Seniors"
+        assert index.find_overlap(20, 30).name == "Adults"
+        assert index.find_overlap(13, 65, exclude_id=adults.id) is None
+        assert index.find_overlap(10, 65, exclude_id=adults.id).name == "Children"